@@ -0,0 +1,17 @@
+import { useEffect, useState } from 'react';
+import { subscribeLiveFeed, type LiveFeedState } from '../services/liveFeed.ts';
+
+// Latest live state of a session, pushed by the server; undefined while no session is given
+export function useLiveFeed(sessionKey?: number) {
+    const [state, setState] = useState<LiveFeedState | undefined>(undefined);
+
+    useEffect(() => {
+        if (!sessionKey) {
+            setState(undefined);
+            return;
+        }
+        return subscribeLiveFeed(sessionKey, setState);
+    }, [sessionKey]);
+
+    return state;
+}
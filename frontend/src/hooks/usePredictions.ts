@@ -11,16 +11,22 @@ import {
     fetchTyreWearPrediction,
     fetchPitWindowRecommendation,
     fetchOvertakeProbability,
-    fetchAnomalyDetection
+    fetchAnomalyDetection,
+    adaptLapPrediction,
+    getDriverNumber
 } from '../services/api.ts';
+import { useLiveFeed } from './useLiveFeed.ts';
 
 export function usePredictions(driver: string, isLive: boolean, sessionKey?: number) {
+    // Live sessions push lap time predictions over the shared feed instead of polling
+    const feed = useLiveFeed(isLive ? sessionKey : undefined);
+    const streamedLapTime = feed?.predictions[getDriverNumber(driver)];
 
     const lapTime = useQuery<LapPrediction>({
         queryKey: ['lapTime', driver, isLive, sessionKey],
         queryFn: () => fetchLapTimePrediction(driver, sessionKey),
-        enabled: !!sessionKey,
-        refetchInterval: isLive ? 5000 : false,
+        enabled: !!sessionKey && streamedLapTime == null,
+        refetchInterval: isLive && !feed ? 5000 : false,
     });
 
     const tyreWear = useQuery<TyreWearPrediction>({
@@ -52,7 +58,7 @@ export function usePredictions(driver: string, isLive: boolean, sessionKey?: num
     });
 
     return {
-        lapTime: lapTime.data,
+        lapTime: streamedLapTime != null ? adaptLapPrediction({ predicted_next_lap: streamedLapTime }, driver) : lapTime.data,
         tyreWear: tyreWear.data,
         pitWindow: pitWindow.data,
         overtake: overtake.data,
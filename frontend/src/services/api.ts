@@ -6,12 +6,14 @@ import type {
     PitWindowRecommendation,
     OvertakeProbability,
     AnomalyDetection,
+    DownsampledTelemetry,
+    DeltaComparison,
 } from '../types/index.ts';
 
 // API base URL configuration
 // In Production, VITE_API_URL should differ from localhost.
 // Example VITE_API_URL: "https://your-app.vercel.app/api" (NO trailing slash)
-const API_BASE_URL = import.meta.env.VITE_API_URL || (import.meta.env.DEV ? 'http://localhost:8000/api' : '');
+export const API_BASE_URL = import.meta.env.VITE_API_URL || (import.meta.env.DEV ? 'http://localhost:8000/api' : '');
 
 if (!API_BASE_URL) {
     console.warn('API URL is missing! Check VITE_API_URL configuration.');
@@ -30,10 +32,10 @@ const DRIVER_MAP: Record<string, number> = {
     'PIA': 81, 'LAW': 30, 'ANT': 12, 'DOO': 19
 };
 
-const getDriverNumber = (code: string): number => DRIVER_MAP[code] || 1; // Default to Max
+export const getDriverNumber = (code: string): number => DRIVER_MAP[code] || 1; // Default to Max
 
 // --- Adaptors ---
-const adaptLapPrediction = (data: any, driver: string): LapPrediction => ({
+export const adaptLapPrediction = (data: any, driver: string): LapPrediction => ({
     driver,
     predictedLapTime: data.predicted_next_lap || 0,
     confidence: 0.85, // Mock confidence for now
@@ -96,6 +98,46 @@ export const fetchTelemetry = async (driver: string): Promise<TelemetryData> =>
     return generateMockTelemetry(driver);
 };
 
+// Decimated server-side to about `points` samples per channel; pass a lap or time range to zoom
+export const fetchDownsampledTelemetry = async (
+    sessionKey: number,
+    driver: string,
+    options: { points?: number; channels?: string[]; method?: 'lttb' | 'minmax'; lapStart?: number; lapEnd?: number; start?: string; end?: string } = {},
+): Promise<DownsampledTelemetry> => {
+    const response = await api.get(`/telemetry/car_data`, {
+        params: {
+            session_key: sessionKey,
+            driver_number: getDriverNumber(driver),
+            points: options.points,
+            channels: options.channels?.join(','),
+            method: options.method,
+            lap_start: options.lapStart,
+            lap_end: options.lapEnd,
+            start: options.start,
+            end: options.end,
+        }
+    });
+    return response.data;
+};
+
+// Distance-aligned delta time and speed of several drivers; the first driver is the reference
+export const fetchDeltaComparison = async (
+    sessionKey: number,
+    drivers: string[],
+    options: { lapStart?: number; lapEnd?: number; points?: number } = {},
+): Promise<DeltaComparison> => {
+    const response = await api.get(`/comparison/delta`, {
+        params: {
+            session_key: sessionKey,
+            drivers: drivers.map(getDriverNumber).join(','),
+            lap_start: options.lapStart,
+            lap_end: options.lapEnd,
+            points: options.points,
+        }
+    });
+    return response.data;
+};
+
 export const fetchTelemetryHistory = async (driver: string): Promise<TelemetryData[]> => {
     return Array.from({ length: 20 }, () => generateMockTelemetry(driver));
 };
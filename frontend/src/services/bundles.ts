@@ -0,0 +1,52 @@
+// Per-season data bundles generated by scripts/build_data_bundles.py
+// One request per season instead of one per race; callers fall back to the
+// per-file JSON when a bundle (or the index) is unavailable.
+
+interface BundleIndex {
+    version: number;
+    bundles: Record<string, { file: string; sha256: string; bytes: number }>;
+}
+
+export interface SeasonBundle {
+    year: number;
+    season: any | null;
+    races: Record<string, any>;
+}
+
+const BUNDLE_BASE = `${import.meta.env.BASE_URL}data/bundles/`;
+
+let indexPromise: Promise<BundleIndex | null> | null = null;
+const bundleCache = new Map<number, Promise<SeasonBundle | null>>();
+
+const fetchJson = async <T>(url: string): Promise<T | null> => {
+    try {
+        const response = await fetch(url);
+        return response.ok ? await response.json() : null;
+    } catch {
+        return null;
+    }
+};
+
+const loadIndex = (): Promise<BundleIndex | null> => {
+    if (!indexPromise) {
+        // The index is small and revalidated; bundle files are content-addressed
+        indexPromise = fetchJson<BundleIndex>(`${BUNDLE_BASE}index.json`);
+    }
+    return indexPromise;
+};
+
+/**
+ * Load (once) the bundle holding a season's summary and all its race details.
+ * Resolves to null if there is no bundle for that season.
+ */
+export const loadSeasonBundle = (year: number): Promise<SeasonBundle | null> => {
+    let bundle = bundleCache.get(year);
+    if (!bundle) {
+        bundle = loadIndex().then((index) => {
+            const entry = index?.bundles[String(year)];
+            return entry ? fetchJson<SeasonBundle>(`${BUNDLE_BASE}${entry.file}`) : null;
+        });
+        bundleCache.set(year, bundle);
+    }
+    return bundle;
+};
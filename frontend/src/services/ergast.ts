@@ -1,6 +1,7 @@
 // Ergast API service for historical F1 data
 // Now using local JSON files generated by scripts/fetch_historical_data.py
 
+import { loadSeasonBundle } from './bundles';
 
 
 export interface ErgastDriver {
@@ -90,6 +91,11 @@ export interface SeasonData {
  */
 export const fetchSeasonData = async (year: number): Promise<SeasonData> => {
     try {
+        const bundle = await loadSeasonBundle(year);
+        if (bundle?.season) {
+            return bundle.season;
+        }
+
         // Use local JSON files generated by the python script
         // import.meta.env.BASE_URL handles the deployment path (e.g. /StratX/)
         const response = await fetch(`${import.meta.env.BASE_URL}data/seasons/${year}.json`);
@@ -112,6 +118,11 @@ export const fetchSeasonData = async (year: number): Promise<SeasonData> => {
  */
 export const fetchRaceResults = async (year: number, round: number) => {
     try {
+        const bundle = await loadSeasonBundle(year);
+        if (bundle?.races[String(round)]) {
+            return bundle.races[String(round)];
+        }
+
         const response = await fetch(`${import.meta.env.BASE_URL}data/races/${year}/${round}.json`);
 
         if (!response.ok) {
@@ -0,0 +1,102 @@
+// Live session feed over server-sent events (GET /api/live/stream).
+// One EventSource per session per tab, shared by every component that
+// subscribes; the backend runs a single upstream poller per session however
+// many viewers are connected. If the stream is dropped (e.g. the tab fell
+// behind) EventSource reconnects and the state restarts from a new snapshot.
+import { API_BASE_URL } from './api.ts';
+
+export interface LiveFeedState {
+    sessionKey: number;
+    // Latest row per driver number
+    laps: Record<number, any>;
+    intervals: Record<number, any>;
+    telemetry: Record<number, any>;
+    predictions: Record<number, number | null>;
+    raceControl: any[];
+}
+
+type Listener = (state: LiveFeedState) => void;
+
+interface Feed {
+    source: EventSource;
+    state: LiveFeedState;
+    listeners: Set<Listener>;
+}
+
+const RACE_CONTROL_HISTORY = 50;
+const feeds = new Map<number, Feed>();
+
+const emptyState = (sessionKey: number): LiveFeedState => ({
+    sessionKey, laps: {}, intervals: {}, telemetry: {}, predictions: {}, raceControl: [],
+});
+
+const byDriver = (rows: any[], into: Record<number, any> = {}): Record<number, any> => {
+    const next = { ...into };
+    for (const row of rows) {
+        if (row.driver_number != null) next[row.driver_number] = row;
+    }
+    return next;
+};
+
+const reduce = (state: LiveFeedState, event: string, data: any): LiveFeedState => {
+    switch (event) {
+        case 'snapshot':
+            return {
+                sessionKey: state.sessionKey,
+                laps: byDriver(data.laps),
+                intervals: byDriver(data.intervals),
+                telemetry: byDriver(data.telemetry),
+                predictions: Object.fromEntries(data.predictions.map((p: any) => [p.driver_number, p.predicted_next_lap])),
+                raceControl: data.race_control,
+            };
+        case 'laps':
+            return { ...state, laps: byDriver(data, state.laps) };
+        case 'intervals':
+            return { ...state, intervals: byDriver(data, state.intervals) };
+        case 'telemetry':
+            return { ...state, telemetry: byDriver(data, state.telemetry) };
+        case 'predictions':
+            return {
+                ...state,
+                predictions: { ...state.predictions, ...Object.fromEntries(data.map((p: any) => [p.driver_number, p.predicted_next_lap])) },
+            };
+        case 'race_control':
+            return { ...state, raceControl: [...state.raceControl, ...data].slice(-RACE_CONTROL_HISTORY) };
+        default:
+            return state;
+    }
+};
+
+const openFeed = (sessionKey: number): Feed => {
+    const source = new EventSource(`${API_BASE_URL}/live/stream?session_key=${sessionKey}`);
+    const feed: Feed = { source, state: emptyState(sessionKey), listeners: new Set() };
+    for (const event of ['snapshot', 'laps', 'intervals', 'telemetry', 'predictions', 'race_control']) {
+        source.addEventListener(event, (message) => {
+            feed.state = reduce(feed.state, event, JSON.parse((message as MessageEvent).data));
+            feed.listeners.forEach((listener) => listener(feed.state));
+        });
+    }
+    return feed;
+};
+
+/**
+ * Subscribe to a session's live feed; returns the unsubscribe function.
+ * The stream is opened by the first subscriber and closed with the last.
+ */
+export const subscribeLiveFeed = (sessionKey: number, listener: Listener): (() => void) => {
+    let feed = feeds.get(sessionKey);
+    if (!feed) {
+        feed = openFeed(sessionKey);
+        feeds.set(sessionKey, feed);
+    }
+    feed.listeners.add(listener);
+    listener(feed.state);
+    const current = feed;
+    return () => {
+        current.listeners.delete(listener);
+        if (current.listeners.size === 0) {
+            current.source.close();
+            feeds.delete(sessionKey);
+        }
+    };
+};
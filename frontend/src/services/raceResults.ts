@@ -1,4 +1,5 @@
 import axios from 'axios';
+import { loadSeasonBundle } from './bundles';
 
 const API_BASE_URL = import.meta.env.VITE_API_URL || (import.meta.env.DEV ? 'http://localhost:8000' : '');
 
@@ -31,6 +32,11 @@ export interface RaceResultsResponse {
 
 export const fetchRaceResults = async (round: number): Promise<RaceResultsResponse> => {
     try {
+        const bundle = await loadSeasonBundle(2025);
+        if (bundle?.races[String(round)]) {
+            return bundle.races[String(round)];
+        }
+
         // Use static JSON file from public directory
         const response = await fetch(`${import.meta.env.BASE_URL}data/2025/race_${round}.json`);
 
@@ -45,9 +51,33 @@ export const fetchRaceResults = async (round: number): Promise<RaceResultsRespon
     }
 };
 
-export const fetchDriverPerformance = async (driverCode: string, round: number) => {
+export interface DriverStint {
+    stint_number: number;
+    compound: string;
+    start_lap: number;
+    end_lap: number;
+    total_laps: number;
+}
+
+export interface DriverLap {
+    lap_number: number | null;
+    lap_time: number | null;
+}
+
+export interface DriverPerformance {
+    driver: string;
+    round: number;
+    fastest_lap: number | null;
+    average_lap: number | null;
+    total_laps: number;
+    stints: DriverStint[];
+    finish_position: number | null;
+    laps: DriverLap[];
+}
+
+export const fetchDriverPerformance = async (driverCode: string, round: number): Promise<DriverPerformance> => {
     try {
-        const response = await api.get(`/api/results/2025/driver/${driverCode}/performance`, {
+        const response = await api.get<DriverPerformance>(`/api/results/2025/driver/${driverCode}/performance`, {
             params: { round_number: round }
         });
         return response.data;
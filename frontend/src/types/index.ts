@@ -67,3 +67,38 @@ export interface DriverStanding {
     lastLapTime: number;
     bestLapTime: number;
 }
+
+export interface TelemetrySeries {
+    t: number[]; // ms after t0
+    v: number[];
+}
+
+export interface DownsampledTelemetry {
+    session_key: number;
+    driver_number: number;
+    method: 'lttb' | 'minmax';
+    points: number;
+    raw_points: number;
+    t0: string | null;
+    end: string | null;
+    series: Record<string, TelemetrySeries>;
+}
+
+export interface DeltaTrace {
+    driver: number;
+    available: boolean;
+    time?: number[];
+    delta?: number[]; // s behind the reference driver at each distance
+    speed?: number[];
+    lap_lengths?: number[];
+}
+
+export interface DeltaComparison {
+    session_key: number;
+    lap_start: number;
+    lap_end: number;
+    reference: number;
+    lap_length: number;
+    distance: number[]; // m from the start of lap_start
+    drivers: DeltaTrace[];
+}
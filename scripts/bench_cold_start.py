@@ -0,0 +1,58 @@
+"""
+Benchmark: API cold start.
+
+Each run starts a fresh interpreter (so nothing is cached in sys.modules) and measures:
+  import      time to import stratx.api.main
+  health      time for the first GET /
+  predictor   time for the first get_predictor() (model load)
+It also reports which heavy packages were imported before the first health check.
+
+Usage: python scripts/bench_cold_start.py [--runs N]
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+HEAVY_MODULES = ['fastf1', 'pandas', 'sklearn', 'joblib']
+
+PROBE = '''
+import json, sys, time
+start = time.perf_counter()
+import stratx.api.main as main
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+client = TestClient(main.app)
+t = time.perf_counter()
+assert client.get("/").status_code == 200
+health = time.perf_counter() - t
+loaded = [m for m in %r if m in sys.modules]
+t = time.perf_counter()
+main.get_predictor()
+predictor = time.perf_counter() - t
+print(json.dumps({"import": imported - start, "health": health, "predictor": predictor, "loaded": loaded}))
+''' % (HEAVY_MODULES,)
+
+
+def run_once() -> dict:
+    out = subprocess.run([sys.executable, '-c', PROBE], capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    results = [run_once() for _ in range(args.runs)]
+    print(f"{'phase':<10} {'median ms':>10} {'min ms':>8} {'max ms':>8}")
+    for phase in ('import', 'health', 'predictor'):
+        values = [r[phase] * 1000 for r in results]
+        print(f"{phase:<10} {statistics.median(values):>10.1f} {min(values):>8.1f} {max(values):>8.1f}")
+    loaded = sorted({m for r in results for m in r['loaded']})
+    print(f"\nHeavy modules imported before first GET /: {', '.join(loaded) or 'none'}")
+
+
+if __name__ == '__main__':
+    main()
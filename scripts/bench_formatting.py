@@ -0,0 +1,143 @@
+"""
+Benchmark: iterrows() formatting vs stratx.data.formatting on a season's worth of data.
+
+Builds synthetic FastF1-style results (24 races x 20 drivers) and Ergast-style
+results/standings (a historical season), checks that both implementations
+produce identical records and reports the timings.
+
+Usage: python scripts/bench_formatting.py [--seasons N]
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from stratx.data.formatting import (
+    to_records, race_results_records, ERGAST_RESULT_FIELDS, DRIVER_STANDINGS_FIELDS,
+)
+
+
+def fastf1_results(n: int, rng) -> pd.DataFrame:
+    position = rng.permutation(n).astype(float) + 1
+    position[rng.random(n) < 0.1] = np.nan
+    return pd.DataFrame({
+        'Position': position,
+        'Abbreviation': [f"D{i:02d}" for i in range(n)],
+        'DriverNumber': [str(i + 1) for i in range(n)],
+        'TeamName': [f"Team {i // 2}" for i in range(n)],
+        'Time': [pd.Timedelta(seconds=5000 + rng.random() * 60) if rng.random() > 0.2 else pd.NaT for _ in range(n)],
+        'Points': np.where(rng.random(n) < 0.5, rng.integers(0, 26, n), np.nan),
+        'Status': [None if rng.random() < 0.1 else 'Finished' for _ in range(n)],
+        'GridPosition': np.where(rng.random(n) < 0.9, rng.integers(1, n + 1, n), np.nan),
+    })
+
+
+def ergast_results(n: int, rng) -> pd.DataFrame:
+    return pd.DataFrame({
+        'position': np.arange(1, n + 1),
+        'givenName': [f"Given{i}" for i in range(n)],
+        'familyName': [f"Family{i}" for i in range(n)],
+        'constructorName': [f"Constructor {i // 2}" for i in range(n)],
+        'points': rng.integers(0, 10, n).astype(float),
+        'wins': rng.integers(0, 3, n),
+        'status': ['Finished' if rng.random() > 0.3 else '+1 Lap' for _ in range(n)],
+    })
+
+
+# The per-row implementations these replaced
+def safe_int(val, default=0):
+    try:
+        if pd.isna(val): return default
+        return int(val)
+    except:
+        return default
+
+def safe_float(val, default=0.0):
+    try:
+        if pd.isna(val): return default
+        return float(val)
+    except:
+        return default
+
+def iterrows_fastf1(results):
+    race_results = []
+    for idx, row in results.iterrows():
+        race_results.append({
+            "position": int(row['Position']) if pd.notna(row['Position']) else None,
+            "driver": row['Abbreviation'],
+            "driver_number": int(row['DriverNumber']),
+            "team": row['TeamName'],
+            "time": str(row['Time']) if pd.notna(row['Time']) else 'DNF',
+            "points": int(row['Points']) if pd.notna(row['Points']) else 0,
+            "status": row['Status'] if pd.notna(row['Status']) else 'Finished',
+            "grid_position": int(row['GridPosition']) if pd.notna(row['GridPosition']) else None,
+        })
+    return race_results
+
+def iterrows_ergast(race_res):
+    race_simple_results = []
+    for _, row in race_res.iterrows():
+        status = row.get('status', 'Finished')
+        race_simple_results.append({
+            "position": safe_int(row['position']),
+            "driver": f"{row['givenName']} {row['familyName']}",
+            "team": row.get('constructorName', 'Unknown'),
+            "time": status,
+            "points": safe_float(row['points']),
+            "status": status
+        })
+    return race_simple_results
+
+def iterrows_standings(drivers_df):
+    format_drivers = []
+    for _, d in drivers_df.iterrows():
+        team = "Unknown"
+        if 'constructorName' in d: team = d['constructorName']
+        format_drivers.append({
+            "position": safe_int(d['position']),
+            "driver": f"{d['givenName']} {d['familyName']}",
+            "team": team,
+            "points": safe_float(d['points']),
+            "wins": safe_int(d['wins'])
+        })
+    return format_drivers
+
+
+def timed(fn, frames) -> float:
+    start = time.perf_counter()
+    for frame in frames:
+        fn(frame)
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--seasons', type=int, default=1, help="number of seasons to format")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    fastf1_frames = [fastf1_results(20, rng) for _ in range(24 * args.seasons)]
+    ergast_frames = [ergast_results(26, rng) for _ in range(17 * args.seasons)]
+    cases = [
+        ("FastF1 results", fastf1_frames, iterrows_fastf1, race_results_records),
+        # Whole season in one frame: per-call overhead amortized over ~500 rows
+        ("  as one frame", [pd.concat(fastf1_frames, ignore_index=True)], iterrows_fastf1, race_results_records),
+        ("Ergast results", ergast_frames, iterrows_ergast, lambda df: to_records(df, ERGAST_RESULT_FIELDS)),
+        ("  as one frame", [pd.concat(ergast_frames, ignore_index=True)],
+         iterrows_ergast, lambda df: to_records(df, ERGAST_RESULT_FIELDS)),
+        ("Driver standings", [ergast_results(30, rng) for _ in range(args.seasons)],
+         iterrows_standings, lambda df: to_records(df, DRIVER_STANDINGS_FIELDS)),
+    ]
+
+    print(f"{'case':<18} {'frames':>6} {'iterrows ms':>12} {'vectorized ms':>14} {'speedup':>8}")
+    for name, frames, old, new in cases:
+        for frame in frames:
+            assert old(frame) == new(frame), f"{name}: outputs differ"
+        old_ms = timed(old, frames)
+        new_ms = timed(new, frames)
+        print(f"{name:<18} {len(frames):>6} {old_ms:>12.1f} {new_ms:>14.1f} {old_ms / new_ms:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+Benchmark: sklearn Pipeline vs CompiledLapTimeModel for lap time inference.
+
+Checks that both paths agree to 1e-9 and reports single-row and batch latency.
+
+Usage: python scripts/bench_lap_time_model.py [--repeat N]
+"""
+import argparse
+import os
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from stratx.ml.fast_inference import CompiledLapTimeModel, FAST_PATH_MAX_ROWS
+from stratx.ml.features import LAP_TIME_FEATURES
+
+MODEL_PATH = os.path.join(os.path.dirname(__file__), '..', 'src', 'stratx', 'ml', 'models', 'lap_time_model.pkl')
+TOLERANCE = 1e-9
+
+
+def sample_rows(compiled: CompiledLapTimeModel, n: int, seed: int = 0):
+    """Random feature rows drawn from the model's own categories (plus some unknowns)."""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for _ in range(n):
+        row = {}
+        for feature, values in zip(compiled.categorical_features, compiled.categories):
+            row[feature] = values[rng.integers(len(values))] if rng.random() > 0.05 else 'Unknown'
+        row['TyreLife'] = float(rng.integers(1, 40))
+        row['LapNumber'] = float(rng.integers(1, 70))
+        row['TrackTemp'] = float(rng.uniform(15, 55))
+        rows.append(row)
+    return rows
+
+
+def timed(fn, repeat: int) -> float:
+    """Best-of-repeat wall time in milliseconds."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    pipeline = joblib.load(MODEL_PATH)
+    start = time.perf_counter()
+    compiled = CompiledLapTimeModel.from_pipeline(pipeline)
+    print(f"Compiled {len(compiled.roots)} trees / {len(compiled.value)} nodes in "
+          f"{(time.perf_counter() - start) * 1000:.1f} ms")
+
+    # Agreement
+    rows = sample_rows(compiled, 2000)
+    df = pd.DataFrame(rows, columns=LAP_TIME_FEATURES)
+    expected = pipeline.predict(df)
+    diff = np.abs(compiled.predict_rows(rows) - expected).max()
+    diff_one = max(abs(compiled.predict_one(r) - e) for r, e in zip(rows[:200], expected[:200]))
+    print(f"Max abs diff: batch {diff:.2e}, single {diff_one:.2e}")
+    assert diff <= TOLERANCE and diff_one <= TOLERANCE, "compiled model disagrees with sklearn"
+
+    # Latency
+    row = rows[0]
+    one_df = pd.DataFrame([row])
+    sk_one = timed(lambda: pipeline.predict(one_df), args.repeat)
+    fast_one = timed(lambda: compiled.predict_one(row), args.repeat)
+    print(f"\n{'rows':>6} {'sklearn ms':>12} {'compiled ms':>12} {'speedup':>8}")
+    print(f"{1:>6} {sk_one:>12.3f} {fast_one:>12.3f} {sk_one / fast_one:>7.1f}x")
+    for n in (20, 64, FAST_PATH_MAX_ROWS, 512, 2000):
+        batch = rows[:n]
+        batch_df = pd.DataFrame(batch, columns=LAP_TIME_FEATURES)
+        sk = timed(lambda: pipeline.predict(batch_df), args.repeat)
+        fast = timed(lambda: compiled.predict_rows(batch), max(1, args.repeat // 4))
+        print(f"{n:>6} {sk:>12.3f} {fast:>12.3f} {sk / fast:>7.1f}x")
+    print(f"\nRacePredictor uses the compiled path for batches up to {FAST_PATH_MAX_ROWS} rows.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,458 @@
+"""
+Benchmark suite: predictor, OpenF1 client and race results paths, offline.
+
+Every case runs against recorded OpenF1 responses (scripts/fixtures/openf1,
+gzipped JSON in the API's exact layout) and a FastF1-shaped results table
+built from them, with fixed seeds, so two runs on the same machine measure
+the same work. Cases:
+
+  predictor.*  RacePredictor: next lap time (compiled model, sklearn pipeline,
+               recent-average heuristic and online fit), batch scoring, tyre
+               life, pit window (strategy cache cleared per call) and anomaly
+               detection (per packet and over a window)
+  client.*     OpenF1Client fetches served from the fixtures by a transport
+               adapter: query building, JSON decode and cache insert, no network
+  results.*    race_results serialization: _format_race, _distill_laps and
+               the encoded round / season payloads
+
+Each case reports the median (and min/max) time per call over --repeat
+timeit rounds. --save writes the results with the environment and a fixture
+digest as JSON; --compare checks a run against such a baseline and exits
+with status 1 if any case got slower by more than --threshold (a fraction).
+Baselines are per machine: save one on the base revision, then compare.
+
+The checked-in fixtures are synthetic (seeded) but field-for-field OpenF1;
+--record SESSION_KEY replaces them with a real session (needs network).
+
+Usage: python scripts/bench_suite.py [--save PATH] [--compare PATH] [--threshold 0.25]
+                                     [--filter SUBSTRING] [--repeat N] [--record SESSION_KEY]
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import timeit
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+import requests
+from requests.adapters import BaseAdapter
+
+from stratx.api.race_results import _distill_laps, _format_race
+from stratx.api.responses import EncodedPayload
+from stratx.data.openf1_client import OpenF1Client
+from stratx.data.timeutils import to_epoch_ns
+from stratx.ml.race_predictor import RacePredictor
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'openf1')
+FIXTURES = ['sessions', 'drivers', 'laps', 'stints', 'intervals', 'car_data', 'weather']
+# Lap time model category of the recorded session
+CIRCUIT = 'Emilia Romagna Grand Prix'
+BASELINE_VERSION = 1
+
+
+class Case:
+    """A benchmark: `fn` does `calls` operations; timings are reported per call."""
+
+    def __init__(self, name: str, fn: Callable[[], Any], calls: int = 1):
+        self.name = name
+        self.fn = fn
+        self.calls = calls
+
+
+def load_fixtures() -> Dict[str, bytes]:
+    """Raw (decompressed) response bodies by endpoint name."""
+    bodies = {}
+    for name in FIXTURES:
+        with gzip.open(os.path.join(FIXTURE_DIR, f'{name}.json.gz'), 'rb') as f:
+            bodies[name] = f.read()
+    return bodies
+
+
+def fixture_digest(bodies: Dict[str, bytes]) -> str:
+    digest = hashlib.sha256()
+    for name in FIXTURES:
+        digest.update(name.encode())
+        digest.update(bodies[name])
+    return digest.hexdigest()[:16]
+
+
+class FixtureAdapter(BaseAdapter):
+    """requests transport answering OpenF1 URLs from fixture bodies (query ignored)."""
+
+    def __init__(self, bodies: Dict[str, bytes]):
+        super().__init__()
+        self.bodies = bodies
+
+    def send(self, request, **kwargs):
+        endpoint = request.path_url.split('?')[0].rsplit('/', 1)[-1]
+        response = requests.Response()
+        response.status_code = 200 if endpoint in self.bodies else 404
+        response._content = self.bodies.get(endpoint, b'[]')
+        response.headers['Content-Type'] = 'application/json'
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+def fixture_client(bodies: Dict[str, bytes]) -> OpenF1Client:
+    client = OpenF1Client()
+    client.session.mount(client.base_url, FixtureAdapter(bodies))
+    return client
+
+
+# Inputs derived from the fixtures
+
+def lap_contexts(laps: List[Dict], stints: List[Dict], drivers: List[Dict], weather: List[Dict]) -> List[Dict]:
+    """predict_next_lap_time inputs at every completed lap of every driver."""
+    acronym = {d['driver_number']: d['name_acronym'] for d in drivers}
+    team = {d['driver_number']: d['team_name'] for d in drivers}
+    track_temp = float(np.median([w['track_temperature'] for w in weather]))
+    by_driver: Dict[int, List[Dict]] = {}
+    for lap in sorted(laps, key=lambda l: l['lap_number']):
+        by_driver.setdefault(lap['driver_number'], []).append(lap)
+
+    contexts = []
+    for number, driver_laps in by_driver.items():
+        driver_stints = [s for s in stints if s['driver_number'] == number]
+        for i, lap in enumerate(driver_laps):
+            stint = next((s for s in driver_stints if s['lap_start'] <= lap['lap_number'] <= s['lap_end']), None)
+            contexts.append({
+                'driver_id': acronym.get(number, str(number)),
+                'driver_number': number,
+                'current_laps': driver_laps[:i + 1],
+                'context': {
+                    'Team': team.get(number, 'Unknown'),
+                    'Circuit': CIRCUIT,
+                    'Compound': stint['compound'] if stint else 'MEDIUM',
+                    'TyreLife': float(lap['lap_number'] - stint['lap_start'] + 1) if stint else 1.0,
+                    'LapNumber': float(lap['lap_number'] + 1),
+                    'TrackTemp': track_temp,
+                },
+            })
+    return contexts
+
+
+def car_data_window(car_data: List[Dict]) -> Dict[str, np.ndarray]:
+    """The columnar window detect_anomalies_batch gets from the SessionStore."""
+    window = {'date': to_epoch_ns([row['date'] for row in car_data])}
+    for channel in ('speed', 'rpm', 'throttle', 'brake', 'n_gear', 'drs'):
+        window[channel] = np.array([row[channel] for row in car_data], dtype=np.float64)
+    return window
+
+
+def fastf1_session(laps: List[Dict], stints: List[Dict], drivers: List[Dict], seed: int = 0) -> SimpleNamespace:
+    """A loaded FastF1 race Session as _format_race/_distill_laps see it: results, laps, event."""
+    rng = np.random.default_rng(seed)
+    info = {d['driver_number']: d for d in drivers}
+    frame = pd.DataFrame(laps)
+    frame['LapTime'] = pd.to_timedelta(frame['lap_duration'], unit='s')
+    stint_of = {(s['driver_number'], lap): s for s in stints for lap in range(s['lap_start'], s['lap_end'] + 1)}
+    frame['Stint'] = [float(stint_of[(n, l)]['stint_number']) if (n, l) in stint_of else np.nan
+                      for n, l in zip(frame['driver_number'], frame['lap_number'])]
+    frame['Compound'] = [stint_of[(n, l)]['compound'] if (n, l) in stint_of else None
+                         for n, l in zip(frame['driver_number'], frame['lap_number'])]
+    # Running order at the end of each lap
+    frame['Elapsed'] = frame.groupby('driver_number')['lap_duration'].cumsum()
+    frame['Position'] = frame.groupby('lap_number')['Elapsed'].rank(method='first')
+    session_laps = pd.DataFrame({
+        'Driver': frame['driver_number'].map(lambda n: info[n]['name_acronym']),
+        'DriverNumber': frame['driver_number'].astype(str),
+        'LapNumber': frame['lap_number'].astype(float),
+        'LapTime': frame['LapTime'],
+        'Stint': frame['Stint'],
+        'Compound': frame['Compound'],
+        'TyreLife': frame['lap_number'].astype(float),
+        'Position': frame['Position'],
+    })
+
+    final = frame.loc[frame.groupby('driver_number')['lap_number'].idxmax()].sort_values('Elapsed')
+    n = len(final)
+    points = [25, 18, 15, 12, 10, 8, 6, 4, 2, 1] + [0] * max(0, n - 10)
+    winner = final['Elapsed'].iloc[0]
+    results = pd.DataFrame({
+        'DriverNumber': final['driver_number'].astype(str).to_numpy(),
+        'BroadcastName': [info[d]['broadcast_name'] for d in final['driver_number']],
+        'Abbreviation': [info[d]['name_acronym'] for d in final['driver_number']],
+        'TeamName': [info[d]['team_name'] for d in final['driver_number']],
+        'TeamColor': [info[d]['team_colour'] for d in final['driver_number']],
+        'FullName': [info[d]['full_name'] for d in final['driver_number']],
+        'Position': np.arange(1, n + 1, dtype=float),
+        'ClassifiedPosition': [str(p) for p in range(1, n + 1)],
+        'GridPosition': rng.permutation(n).astype(float) + 1,
+        # FastF1: the winner's total race time, everyone else's gap to it
+        'Time': [pd.Timedelta(seconds=t if i == 0 else t - winner) for i, t in enumerate(final['Elapsed'])],
+        'Status': ['Finished'] * n,
+        'Points': np.array(points[:n], dtype=float),
+    })
+    event = pd.Series({'EventName': CIRCUIT, 'Country': 'Italy', 'Location': 'Imola',
+                       'OfficialEventName': f"FORMULA 1 {CIRCUIT.upper()} 2024",
+                       'EventDate': pd.Timestamp('2024-05-19')})
+    return SimpleNamespace(results=results, laps=session_laps, event=event,
+                           total_laps=int(frame['lap_number'].max()))
+
+
+# Cases
+
+def predictor_cases(fixtures: Dict[str, List[Dict]]) -> List[Case]:
+    predictor = RacePredictor()
+    contexts = lap_contexts(fixtures['laps'], fixtures['stints'], fixtures['drivers'], fixtures['weather'])
+    # Every 7th lap: a spread over drivers, compounds and tyre ages
+    sample = contexts[::7]
+    cases = []
+
+    if predictor.fast_lap_time_model is not None:
+        cases.append(Case('predictor.lap_time.ml', lambda: [
+            predictor.predict_next_lap_time(c['driver_id'], c['current_laps'], c['context']) for c in sample
+        ], len(sample)))
+    if os.path.exists(predictor.lap_time_model_path):
+        sklearn = RacePredictor()
+        sklearn.fast_lap_time_model = None
+        few = sample[:20]
+        cases.append(Case('predictor.lap_time.ml_sklearn', lambda: [
+            sklearn.predict_next_lap_time(c['driver_id'], c['current_laps'], c['context']) for c in few
+        ], len(few)))
+
+    cases.append(Case('predictor.lap_time.heuristic', lambda: [
+        predictor.predict_next_lap_time(c['driver_id'], c['current_laps']) for c in sample
+    ], len(sample)))
+
+    session_key = fixtures['sessions'][0]['session_key']
+    online = RacePredictor()
+    online.observe_laps(session_key, fixtures['laps'])
+    cases.append(Case('predictor.lap_time.online', lambda: [
+        online.predict_next_lap_time(str(c['driver_number']), c['current_laps'], session_key=session_key)
+        for c in sample
+    ], len(sample)))
+
+    # One live refresh: the latest lap of every driver
+    latest = {c['driver_number']: c for c in contexts}
+    batch = list(latest.values())
+    cases.append(Case('predictor.lap_time_batch', lambda: predictor.predict_next_lap_times_batch(batch)))
+
+    tyres = [(compound, age) for compound in ('SOFT', 'MEDIUM', 'HARD', 'INTERMEDIATE', 'WET') for age in range(0, 45)]
+    cases.append(Case('predictor.tyre_life', lambda: [
+        predictor.predict_tyre_life('VER', compound, age) for compound, age in tyres
+    ], len(tyres)))
+
+    total_laps = max(lap['lap_number'] for lap in fixtures['laps'])
+    windows = [(5, 'SOFT', 5), (12, 'MEDIUM', 12), (25, 'HARD', 3), (40, 'MEDIUM', 15)]
+
+    def pit_windows():
+        # Cold: the strategy cache would otherwise answer every repeat
+        predictor._simulate_strategy.cache_clear()
+        return [predictor.predict_pit_window('VER', lap, total_laps, compound, age) for lap, compound, age in windows]
+    cases.append(Case('predictor.pit_window', pit_windows, len(windows)))
+
+    packets = fixtures['car_data']
+    cases.append(Case('predictor.anomalies.packet', lambda: [
+        predictor.detect_anomalies(packet) for packet in packets
+    ], len(packets)))
+    window = car_data_window(packets)
+    cases.append(Case('predictor.anomalies.batch', lambda: predictor.detect_anomalies_batch(window, as_events=True)))
+    return cases
+
+
+def client_cases(bodies: Dict[str, bytes], fixtures: Dict[str, List[Dict]]) -> List[Case]:
+    client = fixture_client(bodies)
+    session_key = fixtures['sessions'][0]['session_key']
+    driver = fixtures['car_data'][0]['driver_number']
+    # Learn that the session is finished once, as a running server would
+    client.get_session(session_key)
+
+    def miss(fetch):
+        def run():
+            client.cache.clear()
+            return fetch()
+        return run
+
+    cases = [
+        Case('client.decode.laps', miss(lambda: client.get_laps(session_key))),
+        Case('client.decode.intervals', miss(lambda: client.get_intervals(session_key))),
+        Case('client.decode.car_data', miss(lambda: client.get_car_data(session_key, driver))),
+        Case('client.decode.stints', miss(lambda: client.get_stints(session_key))),
+        Case('client.decode.weather', miss(lambda: client.get_weather(session_key))),
+    ]
+    client.get_laps(session_key)
+    cases.append(Case('client.cache_hit.laps', lambda: client.get_laps(session_key)))
+    # The bare decode, for reference against the client overhead
+    cases.append(Case('client.json_loads.laps', lambda: json.loads(bodies['laps'])))
+    return cases
+
+
+def results_cases(fixtures: Dict[str, List[Dict]]) -> List[Case]:
+    session = fastf1_session(fixtures['laps'], fixtures['stints'], fixtures['drivers'])
+    race = _format_race(session, 7)
+    rounds = [EncodedPayload.from_obj({**race, 'round': r}) for r in range(1, 25)]
+    return [
+        Case('results.format_race', lambda: _format_race(session, 7)),
+        Case('results.distill_laps', lambda: _distill_laps(session.laps)),
+        Case('results.encode_round', lambda: EncodedPayload.from_obj(race)),
+        Case('results.encode_season', lambda: EncodedPayload.join(rounds)),
+    ]
+
+
+# Running and comparing
+
+def measure(case: Case, repeat: int) -> Dict[str, Any]:
+    """Seconds per call: timeit rounds of at least 0.2 s each (gc disabled while timing)."""
+    timer = timeit.Timer(case.fn)
+    number, _ = timer.autorange()
+    rounds = [t / number / case.calls for t in timer.repeat(repeat=repeat, number=number)]
+    return {
+        'median': statistics.median(rounds),
+        'min': min(rounds),
+        'max': max(rounds),
+        'calls': case.calls,
+        'number': number,
+        'repeat': repeat,
+    }
+
+
+def environment() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+        'commit': commit,
+    }
+
+
+def format_time(seconds: float) -> str:
+    for unit, scale in (('s', 1.0), ('ms', 1e-3), ('us', 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], threshold: float, selected: str = '') -> List[str]:
+    """Print current vs baseline per case; returns the names of the regressed cases."""
+    if baseline.get('fixtures') != results['fixtures']:
+        print("Warning: baseline was recorded with different fixtures; timings are not comparable.")
+    base_env, env = baseline.get('environment', {}), results['environment']
+    changed = [k for k in ('python', 'numpy', 'pandas', 'machine', 'cpus') if base_env.get(k) != env.get(k)]
+    if changed:
+        print(f"Warning: environment differs from the baseline ({', '.join(changed)}).")
+
+    regressions = []
+    print(f"\n{'case':<32} {'baseline':>11} {'current':>11} {'change':>8}")
+    for name, current in results['cases'].items():
+        base = baseline.get('cases', {}).get(name)
+        if base is None:
+            print(f"{name:<32} {'-':>11} {format_time(current['median']):>11} {'new':>8}")
+            continue
+        change = current['median'] / base['median'] - 1
+        flag = ''
+        if change > threshold:
+            regressions.append(name)
+            flag = '  REGRESSION'
+        print(f"{name:<32} {format_time(base['median']):>11} {format_time(current['median']):>11} "
+              f"{change:>+7.0%}{flag}")
+    for name in baseline.get('cases', {}):
+        if selected in name and name not in results['cases']:
+            print(f"{name:<32} {'(not run)':>11}")
+    return regressions
+
+
+def record(session_key: int, driver_number: Optional[int]):
+    """Replace the fixtures with a real session's responses (car data: one driver, laps 10-17)."""
+    client = OpenF1Client()
+    laps = client.get_laps(session_key)
+    if not laps:
+        sys.exit(f"No laps for session {session_key}")
+    driver_number = driver_number or laps[0]['driver_number']
+    starts = {l['lap_number']: l['date_start'] for l in laps
+              if l['driver_number'] == driver_number and l.get('date_start')}
+    responses = {
+        'sessions': client.get_session(session_key),
+        'drivers': client._fetch('/drivers', {'session_key': session_key}),
+        'laps': laps,
+        'stints': client.get_stints(session_key),
+        'intervals': client.get_intervals(session_key),
+        'car_data': client._fetch('/car_data', {'session_key': session_key, 'driver_number': driver_number,
+                                                'date>=': starts.get(10), 'date<': starts.get(18)}),
+        'weather': client.get_weather(session_key),
+    }
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    for name, rows in responses.items():
+        with gzip.GzipFile(os.path.join(FIXTURE_DIR, f'{name}.json.gz'), 'wb', 9, mtime=0) as f:
+            f.write(json.dumps(rows).encode())
+        print(f"{name:<10} {len(rows):>6} rows")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--save', metavar='PATH', help="write the results as a JSON baseline")
+    parser.add_argument('--compare', metavar='PATH', help="compare against a saved baseline")
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="slowdown (fraction of the baseline median) counted as a regression")
+    parser.add_argument('--filter', default='', help="only run cases whose name contains this")
+    parser.add_argument('--repeat', type=int, default=7)
+    parser.add_argument('--record', type=int, metavar='SESSION_KEY', help="re-record the fixtures from OpenF1")
+    parser.add_argument('--driver', type=int, help="driver number for recorded car data")
+    args = parser.parse_args()
+
+    if args.record:
+        record(args.record, args.driver)
+        return
+
+    baseline = None
+    if args.compare:
+        if not os.path.exists(args.compare):
+            sys.exit(f"No baseline at {args.compare}; create one with --save {args.compare}")
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    bodies = load_fixtures()
+    fixtures = {name: json.loads(body) for name, body in bodies.items()}
+    cases = predictor_cases(fixtures) + client_cases(bodies, fixtures) + results_cases(fixtures)
+    cases = [case for case in cases if args.filter in case.name]
+
+    results = {
+        'version': BASELINE_VERSION,
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'fixtures': fixture_digest(bodies),
+        'environment': environment(),
+        'cases': {},
+    }
+    print(f"{'case':<32} {'median':>11} {'min':>11} {'max':>11}")
+    for case in cases:
+        result = results['cases'][case.name] = measure(case, args.repeat)
+        print(f"{case.name:<32} {format_time(result['median']):>11} {format_time(result['min']):>11} "
+              f"{format_time(result['max']):>11}")
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nSaved baseline to {args.save}")
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.threshold, args.filter)
+        if regressions:
+            print(f"\n{len(regressions)} case(s) slower than the baseline by more than {args.threshold:.0%}: "
+                  f"{', '.join(regressions)}")
+            sys.exit(1)
+        print(f"\nNo regressions beyond {args.threshold:.0%}.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,25 @@
+"""
+Build the per-season frontend data bundles (minified + precompressed) and
+their index from the per-file JSON in frontend/public/data.
+
+Usage: python scripts/build_data_bundles.py [YEAR ...]
+"""
+import argparse
+
+from stratx.data.bundles import write_bundles, format_report
+
+DATA_DIR = "frontend/public/data"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('years', type=int, nargs='*', help="seasons to rebuild (default: all)")
+    parser.add_argument('--data-dir', default=DATA_DIR)
+    args = parser.parse_args()
+
+    report = write_bundles(args.data_dir, args.years or None)
+    print(format_report(report))
+
+
+if __name__ == '__main__':
+    main()
@@ -7,6 +7,9 @@ import json
 import os
 from pathlib import Path
 
+from stratx.data.bundles import write_bundles, format_report
+from stratx.data.formatting import race_results_records
+
 # Enable FastF1 cache
 cache_dir = '/tmp/fastf1_cache'
 os.makedirs(cache_dir, exist_ok=True)
@@ -32,18 +35,7 @@ for round_number in range(1, 25):  # 24 races
             continue
         
         # Format results
-        race_results = []
-        for idx, row in results.iterrows():
-            race_results.append({
-                "position": int(row['Position']) if not row.isna()['Position'] else None,
-                "driver": row['Abbreviation'],
-                "driver_number": int(row['DriverNumber']),
-                "team": row['TeamName'],
-                "time": str(row['Time']) if not row.isna()['Time'] else 'DNF',
-                "points": int(row['Points']) if not row.isna()['Points'] else 0,
-                "status": row['Status'] if not row.isna()['Status'] else 'Finished',
-                "grid_position": int(row['GridPosition']) if not row.isna()['GridPosition'] else None,
-            })
+        race_results = race_results_records(results)
         
         event = session.event
         
@@ -76,3 +68,6 @@ with open(all_races_file, 'w') as f:
 
 print(f"\n🎉 Generated {len(all_races)} race files!")
 print(f"📁 Output directory: {output_dir}")
+
+# Refresh the 2025 bundle so the frontend picks up the new data
+print(format_report(write_bundles(str(output_dir.parent), [2025])))
@@ -0,0 +1,271 @@
+"""
+Server-sent live feed: one upstream poller per session, fanned out to every viewer.
+
+Without it every browser tab polls the REST endpoints for every driver, so
+upstream load grows with the audience. Here a LiveFeedHub runs a single
+background task per subscribed session_key that polls OpenF1 incrementally
+(new laps, intervals, car data and race control messages, via the shared
+IncrementalFetcher), refreshes lap time predictions when laps complete, and
+publishes the deltas as server-sent events. Upstream requests per session are
+constant, however many viewers are connected.
+
+Each event is encoded once and queued to every subscriber. Queues are bounded:
+a subscriber that falls `queue_size` events behind is disconnected rather
+than buffered without limit, and EventSource reconnects it with a fresh
+snapshot. The poller stops when its last subscriber leaves.
+
+Car data starts at the latest lap (or a few seconds ago) rather than at the
+start of the session: the first poll would otherwise download every sample of
+every car.
+"""
+import asyncio
+import json
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Set
+
+from stratx.data.incremental import IncrementalFetcher
+from stratx.data.timeutils import format_openf1_date
+
+logger = logging.getLogger(__name__)
+
+POLL_SECONDS = float(os.getenv('STRATX_LIVE_POLL_SECONDS', '2.0'))
+QUEUE_SIZE = 64
+KEEPALIVE_SECONDS = 15.0
+RACE_CONTROL_HISTORY = 50
+# Car data a new feed starts with when the session has no laps yet
+CAR_DATA_LOOKBACK = timedelta(seconds=5)
+
+# Ends a subscriber's stream
+_CLOSE = None
+
+
+def encode_event(event: str, data: Any) -> bytes:
+    """One server-sent event frame."""
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'), default=str)}\n\n".encode()
+
+
+def _latest_by_driver(rows: List[Dict[str, Any]], order_by: str) -> Dict[int, Dict[str, Any]]:
+    latest: Dict[int, Dict[str, Any]] = {}
+    for row in rows:
+        number = row.get('driver_number')
+        if number is None:
+            continue
+        current = latest.get(number)
+        if current is None or (row.get(order_by) or 0) >= (current.get(order_by) or 0):
+            latest[number] = row
+    return latest
+
+
+def _car_data_start(laps: List[Dict[str, Any]]) -> str:
+    """Where a new feed's car data starts: the start of the latest lap, else a few seconds ago."""
+    starts = [lap['date_start'] for lap in laps if lap.get('date_start')]
+    if starts:
+        return max(starts)
+    return format_openf1_date(datetime.now(timezone.utc) - CAR_DATA_LOOKBACK)
+
+
+class FeedSubscriber:
+    """One connected viewer: a bounded queue of encoded events."""
+
+    def __init__(self, session_key: int, queue_size: int = QUEUE_SIZE):
+        self.session_key = session_key
+        self.queue: "asyncio.Queue[Optional[bytes]]" = asyncio.Queue(maxsize=queue_size)
+        self.dropped = False
+
+    def offer(self, frame: bytes) -> bool:
+        """Queue a frame without waiting; False if the subscriber is too far behind."""
+        try:
+            self.queue.put_nowait(frame)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    def close(self, dropped: bool = False):
+        """Discard anything still queued and end the stream."""
+        self.dropped = self.dropped or dropped
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(_CLOSE)
+
+
+class SessionFeed:
+    """The poller of one session and the latest state new subscribers start from."""
+
+    def __init__(self, session_key: int, fetcher: IncrementalFetcher,
+                 predictor: Optional[Callable[[], Any]] = None, interval: float = POLL_SECONDS):
+        self.session_key = session_key
+        self.fetcher = fetcher
+        self.predictor = predictor
+        self.interval = interval
+        self.subscribers: Set[FeedSubscriber] = set()
+        self.task: Optional["asyncio.Task[None]"] = None
+        self.ticks = 0
+        # Latest per driver number, plus recent race control messages
+        self.laps: Dict[int, Dict[str, Any]] = {}
+        self.intervals: Dict[int, Dict[str, Any]] = {}
+        self.telemetry: Dict[int, Dict[str, Any]] = {}
+        self.predictions: Dict[int, Optional[float]] = {}
+        self.race_control: List[Dict[str, Any]] = []
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "session_key": self.session_key,
+            "laps": list(self.laps.values()),
+            "intervals": list(self.intervals.values()),
+            "telemetry": list(self.telemetry.values()),
+            "predictions": [{"driver_number": d, "predicted_next_lap": p} for d, p in self.predictions.items()],
+            "race_control": self.race_control,
+        }
+
+    def publish(self, event: str, data: Any) -> int:
+        """Queue an event to every subscriber, dropping the ones that cannot keep up."""
+        frame = encode_event(event, data)
+        for subscriber in list(self.subscribers):
+            if not subscriber.offer(frame):
+                logger.info(f"Live feed {self.session_key}: dropping a slow subscriber")
+                self.subscribers.discard(subscriber)
+                subscriber.close(dropped=True)
+        return len(self.subscribers)
+
+    async def run(self):
+        backoff = self.interval
+        while True:
+            try:
+                await self.tick()
+                backoff = self.interval
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Upstream trouble: keep the viewers connected and retry, backing off
+                logger.warning(f"Live feed {self.session_key} poll failed: {e}")
+                backoff = min(backoff * 2, 30.0)
+            await asyncio.sleep(backoff)
+
+    async def tick(self):
+        """One upstream round: poll every stream once and publish what changed."""
+        key = self.session_key
+        if self.fetcher.cursor("/car_data", key) is None:
+            # First round: laps first, so car data can start at the latest lap
+            laps = await self.fetcher.poll("/laps", key)
+            self.fetcher.seed_cursor("/car_data", key, _car_data_start(self.fetcher.rows("/laps", key)))
+            intervals, car_data, race_control = await asyncio.gather(
+                self.fetcher.poll("/intervals", key), self.fetcher.poll("/car_data", key),
+                self.fetcher.poll("/race_control", key))
+        else:
+            laps, intervals, car_data, race_control = await asyncio.gather(
+                self.fetcher.poll("/laps", key), self.fetcher.poll("/intervals", key),
+                self.fetcher.poll("/car_data", key), self.fetcher.poll("/race_control", key))
+        self.ticks += 1
+
+        if laps:
+            self.laps.update(_latest_by_driver(laps, 'lap_number'))
+            self.publish("laps", laps)
+        if intervals:
+            latest = _latest_by_driver(intervals, 'date')
+            self.intervals.update(latest)
+            self.publish("intervals", list(latest.values()))
+        if car_data:
+            latest = _latest_by_driver(car_data, 'date')
+            self.telemetry.update(latest)
+            self.publish("telemetry", list(latest.values()))
+        if race_control:
+            self.race_control = (self.race_control + race_control)[-RACE_CONTROL_HISTORY:]
+            self.publish("race_control", race_control)
+        if laps and self.predictor is not None:
+            # Copied here, on the loop: the fetcher keeps appending to (and sorting) its buffers
+            drivers = sorted({lap['driver_number'] for lap in laps if lap.get('driver_number') is not None})
+            laps_by_driver: Dict[int, List[Dict[str, Any]]] = {d: [] for d in drivers}
+            for lap in self.fetcher.rows("/laps", key):
+                if lap.get('driver_number') in laps_by_driver:
+                    laps_by_driver[lap['driver_number']].append(lap)
+            predictions = await asyncio.get_running_loop().run_in_executor(
+                None, self._predict, laps, laps_by_driver)
+            if predictions:
+                self.predictions.update((p["driver_number"], p["predicted_next_lap"]) for p in predictions)
+                self.publish("predictions", predictions)
+
+    def _predict(self, new_laps: List[Dict[str, Any]],
+                 laps_by_driver: Dict[int, List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """
+        Next lap predictions for the drivers whose laps changed (runs in a worker
+        thread, so it only sees the copies it is given, never the fetcher's buffers).
+        """
+        predictor = self.predictor()
+        predictor.observe_laps(self.session_key, new_laps)
+        drivers = sorted(laps_by_driver)
+        values = predictor.predict_next_lap_times_batch([
+            {'driver_id': str(d), 'current_laps': laps_by_driver[d], 'session_key': self.session_key}
+            for d in drivers
+        ])
+        return [{"driver_number": d, "predicted_next_lap": v} for d, v in zip(drivers, values)]
+
+
+class LiveFeedHub:
+    """Session feeds, started by their first subscriber and stopped with their last."""
+
+    def __init__(self, fetcher: IncrementalFetcher, predictor: Optional[Callable[[], Any]] = None,
+                 interval: float = POLL_SECONDS, queue_size: int = QUEUE_SIZE,
+                 keepalive: float = KEEPALIVE_SECONDS):
+        self.fetcher = fetcher
+        self.predictor = predictor
+        self.interval = interval
+        self.queue_size = queue_size
+        self.keepalive = keepalive
+        self.feeds: Dict[int, SessionFeed] = {}
+
+    def subscribe(self, session_key: int) -> FeedSubscriber:
+        """Register a viewer; its first event is a snapshot of the session's current state."""
+        feed = self.feeds.get(session_key)
+        if feed is None:
+            feed = self.feeds[session_key] = SessionFeed(session_key, self.fetcher, self.predictor, self.interval)
+        subscriber = FeedSubscriber(session_key, self.queue_size)
+        subscriber.offer(encode_event("snapshot", feed.snapshot()))
+        feed.subscribers.add(subscriber)
+        if feed.task is None or feed.task.done():
+            feed.task = asyncio.get_running_loop().create_task(feed.run())
+            logger.info(f"Live feed {session_key}: poller started")
+        return subscriber
+
+    def unsubscribe(self, subscriber: FeedSubscriber):
+        feed = self.feeds.get(subscriber.session_key)
+        if feed is None:
+            return
+        feed.subscribers.discard(subscriber)
+        if not feed.subscribers:
+            # Buffers and cursors stay in the fetcher, so a restart resumes incrementally
+            if feed.task is not None:
+                feed.task.cancel()
+            del self.feeds[subscriber.session_key]
+            logger.info(f"Live feed {subscriber.session_key}: poller stopped")
+
+    async def stream(self, subscriber: FeedSubscriber,
+                     is_disconnected: Optional[Callable[[], Any]] = None) -> AsyncIterator[bytes]:
+        """SSE body for one subscriber; comment frames keep idle connections open."""
+        try:
+            while True:
+                try:
+                    frame = await asyncio.wait_for(subscriber.queue.get(), self.keepalive)
+                except asyncio.TimeoutError:
+                    if is_disconnected is not None and await is_disconnected():
+                        return
+                    yield b": keepalive\n\n"
+                    continue
+                if frame is _CLOSE:
+                    return
+                yield frame
+        finally:
+            self.unsubscribe(subscriber)
+
+    def stats(self) -> Dict[int, Dict[str, int]]:
+        return {key: {"subscribers": len(feed.subscribers), "ticks": feed.ticks} for key, feed in self.feeds.items()}
+
+    async def shutdown(self):
+        """Stop every poller and end all streams."""
+        for feed in list(self.feeds.values()):
+            for subscriber in list(feed.subscribers):
+                subscriber.close()
+            if feed.task is not None:
+                feed.task.cancel()
+        self.feeds.clear()
@@ -1,12 +1,25 @@
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
-from typing import List, Dict, Any, Optional
-import uvicorn
+from typing import List, Dict, Any, Optional, Tuple, TYPE_CHECKING
+import asyncio
+import os
+import threading
+import time
 
-from stratx.data.openf1_client import OpenF1Client
-from stratx.ml.race_predictor import RacePredictor
-from stratx.api.race_results import router as results_router
+from stratx.data.openf1_client import AsyncOpenF1Client
+from stratx.data.incremental import IncrementalFetcher
+from stratx.data.session_store import SessionStore
+from stratx.api.race_results import router as results_router, start_warm_up, shutdown_warm_up
+from stratx.api.live_feed import LiveFeedHub
+from stratx.api.telemetry import TelemetryDownsampler, CHANNELS, DEFAULT_CHANNELS
+from stratx.data.timeutils import NAT_NS, to_epoch_ns
+from stratx.data import delta_time
+from stratx.metrics import REGISTRY, CONTENT_TYPE, HTTP_REQUEST_SECONDS
+
+if TYPE_CHECKING:
+    from stratx.ml.race_predictor import RacePredictor
 
 app = FastAPI(title="StratX Race Strategy Engine")
 
@@ -22,40 +35,229 @@ app.add_middleware(
 # Include routers
 app.include_router(results_router)
 
+@app.middleware("http")
+async def record_latency(request: Request, call_next):
+    """Per-route latency histogram (route templates, so ids do not explode the label set)."""
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, method=request.method,
+                                     route=getattr(route, "path", "unmatched"), status=str(status))
+
 # Startup event to pre-load 2025 race data
 @app.on_event("startup")
 async def startup_event():
-    """Pre-load all 2025 race data into memory for instant retrieval."""
-    from stratx.api.race_results import load_all_2025_races
-    load_all_2025_races()
+    """
+    Pre-load all 2025 race data and the predictor in the background, so the
+    server (and GET /) is up before FastF1 or the ML stack is imported.
+    """
+    if os.getenv('VERCEL'):
+        return  # serverless: everything loads on first use
+    start_warm_up()
+    asyncio.get_running_loop().run_in_executor(None, get_predictor)
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release pooled upstream connections and the race loading workers."""
+    shutdown_warm_up()
+    await feeds.shutdown()
+    await client.aclose()
+
+client = AsyncOpenF1Client()
+store = SessionStore()
+fetcher = IncrementalFetcher(client, store=store)
+telemetry = TelemetryDownsampler(store)
+
+_predictor: Optional["RacePredictor"] = None
+_predictor_lock = threading.Lock()
+
+def get_predictor() -> "RacePredictor":
+    """The shared RacePredictor, created (and its models loaded) on first use."""
+    global _predictor
+    if _predictor is None:
+        with _predictor_lock:
+            if _predictor is None:
+                from stratx.ml.race_predictor import RacePredictor
+                _predictor = RacePredictor()
+    return _predictor
+
+# One upstream poller per live session, shared by every /api/live/stream viewer
+feeds = LiveFeedHub(fetcher, predictor=get_predictor)
 
-client = OpenF1Client()
-predictor = RacePredictor()
+def _openf1_cache_metrics():
+    stats = client.cache.stats()
+    for result in ("hits", "misses", "coalesced"):
+        yield {"result": result}, stats[result]
+
+def _cache_entries():
+    yield {"cache": "openf1_responses"}, len(client.cache)
+    yield {"cache": "telemetry_downsampled"}, telemetry.stats()["entries"]
+
+REGISTRY.gauge_callback("stratx_openf1_cache_lookups_total", "OpenF1 response cache lookups, by result",
+                        _openf1_cache_metrics, kind="counter")
+REGISTRY.gauge_callback("stratx_cache_entries", "Entries held by the in-memory API caches", _cache_entries)
+REGISTRY.gauge_callback("stratx_openf1_cache_bytes", "Response bytes held by the OpenF1 response cache",
+                        lambda: [({}, client.cache.nbytes())])
+REGISTRY.gauge_callback("stratx_session_store_bytes", "Memory held by the columnar telemetry store",
+                        lambda: [({}, store.nbytes())])
+REGISTRY.gauge_callback("stratx_live_feed_subscribers", "Connected live feed viewers, by session",
+                        lambda: (({"session_key": str(k)}, v["subscribers"]) for k, v in feeds.stats().items()))
 
 class PredictionRequest(BaseModel):
     driver_number: int
     session_key: int
 
+class LapTimeContext(BaseModel):
+    driver_number: int
+    context: Optional[Dict[str, Any]] = None
+
+class LapTimeBatchRequest(BaseModel):
+    session_key: int
+    # One entry per prediction; a driver may appear several times (e.g. future laps).
+    # Defaults to every driver with laps in the session.
+    items: Optional[List[LapTimeContext]] = None
+
 @app.get("/")
 def health_check():
     return {"status": "online", "system": "StratX Engine"}
 
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus text exposition of the process metrics (see stratx.metrics)."""
+    return PlainTextResponse(REGISTRY.render(), media_type=CONTENT_TYPE)
+
 @app.get("/api/live/session")
-def get_live_session():
+async def get_live_session():
     """Get the current live session key."""
-    key = client.get_active_session_key()
+    key = await client.get_active_session_key()
     if not key:
         return {"status": "no_live_session", "session_key": None}
     return {"status": "live", "session_key": key}
 
+@app.get("/api/live/stream")
+async def live_stream(request: Request, session_key: int):
+    """
+    Server-sent events for a session: a `snapshot` first, then `laps`,
+    `intervals`, `telemetry`, `race_control` and `predictions` deltas as the
+    shared poller sees them. Viewers that fall too far behind are
+    disconnected; EventSource reconnects and starts from a new snapshot.
+    """
+    subscriber = feeds.subscribe(session_key)
+    return StreamingResponse(
+        feeds.stream(subscriber, request.is_disconnected),
+        media_type="text/event-stream",
+        # No proxy buffering: events must reach the browser as they are sent
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+async def _lap_range_ns(session_key: int, driver_number: int, lap_start: Optional[int],
+                        lap_end: Optional[int]) -> Tuple[Optional[int], Optional[int]]:
+    """Epoch-ns bounds of a driver's laps lap_start..lap_end (inclusive); None = open."""
+    laps = {l['lap_number']: l for l in await fetcher.get_laps(session_key, driver_number)
+            if l.get('lap_number') is not None and l.get('date_start')}
+    start_ns = end_ns = None
+    if lap_start is not None:
+        if lap_start not in laps:
+            raise HTTPException(status_code=404, detail=f"Lap {lap_start} not found")
+        start_ns = int(to_epoch_ns([laps[lap_start]['date_start']])[0])
+    if lap_end is not None:
+        following = laps.get(lap_end + 1)
+        if following is not None:
+            end_ns = int(to_epoch_ns([following['date_start']])[0])
+        elif lap_end in laps and laps[lap_end].get('lap_duration'):
+            end_ns = int(to_epoch_ns([laps[lap_end]['date_start']])[0] + laps[lap_end]['lap_duration'] * 1e9)
+    return start_ns, end_ns
+
+@app.get("/api/telemetry/car_data")
+async def get_downsampled_car_data(request: Request, session_key: int, driver_number: int,
+                                   start: Optional[str] = None, end: Optional[str] = None,
+                                   lap_start: Optional[int] = None, lap_end: Optional[int] = None,
+                                   channels: str = ",".join(DEFAULT_CHANNELS),
+                                   points: int = Query(1000, ge=10, le=10000),
+                                   method: str = Query("lttb", pattern="^(lttb|minmax)$")):
+    """
+    Car telemetry decimated for charts: each channel reduced to about `points`
+    samples by LTTB (default) or per-bucket min/max, keeping spikes visible.
+    The range is a time window (start/end, ISO 8601) or a lap range
+    (lap_start/lap_end, inclusive); default is everything received so far.
+    """
+    names = [c.strip() for c in channels.split(",") if c.strip()]
+    unknown = [c for c in names if c not in CHANNELS]
+    if unknown or not names:
+        raise HTTPException(status_code=400, detail=f"Unknown channels {unknown}; available: {list(CHANNELS)}")
+
+    await fetcher.poll("/car_data", session_key, driver_number)
+    if lap_start is not None or lap_end is not None:
+        start_ns, end_ns = await _lap_range_ns(session_key, driver_number, lap_start, lap_end)
+    else:
+        try:
+            start_ns, end_ns = (None if value is None else int(to_epoch_ns([value])[0]) for value in (start, end))
+        except ValueError:
+            start_ns = end_ns = NAT_NS
+        if NAT_NS in (start_ns, end_ns):
+            raise HTTPException(status_code=400, detail="start and end must be ISO 8601 timestamps")
+
+    payload = await asyncio.get_running_loop().run_in_executor(
+        None, telemetry.query, session_key, driver_number, start_ns, end_ns, names, points, method)
+    return payload.response(request)
+
+@app.get("/api/comparison/delta")
+async def compare_drivers(session_key: int, drivers: str, lap_start: Optional[int] = None,
+                          lap_end: Optional[int] = None, points: int = Query(2000, ge=100, le=20000)):
+    """
+    Distance-aligned comparison of two or more drivers over the same laps:
+    elapsed time, delta time to the first driver (positive = behind) and
+    speed, all on one shared distance grid. Defaults to every lap all of
+    them have completed.
+    """
+    try:
+        numbers = list(dict.fromkeys(int(d) for d in drivers.split(",") if d.strip()))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="drivers must be comma separated driver numbers")
+    if len(numbers) < 2:
+        raise HTTPException(status_code=400, detail="Compare at least two drivers")
+
+    results = await asyncio.gather(*(fetcher.get_laps(session_key, d) for d in numbers),
+                                   *(fetcher.poll("/car_data", session_key, d) for d in numbers))
+    laps = dict(zip(numbers, results[:len(numbers)]))
+    completed = [{l['lap_number'] for l in laps[d] if l.get('lap_number') and l.get('lap_duration')} for d in numbers]
+    common = set.intersection(*completed)
+    if not common:
+        raise HTTPException(status_code=404, detail="No laps completed by all drivers")
+    lap_start = min(common) if lap_start is None else lap_start
+    lap_end = max(common) if lap_end is None else lap_end
+    if lap_end < lap_start:
+        raise HTTPException(status_code=400, detail="lap_end is before lap_start")
+
+    traces = {}
+    for d in numbers:
+        bounds = delta_time.lap_bounds(laps[d], lap_start, lap_end)
+        if bounds is None:
+            raise HTTPException(status_code=404, detail=f"Laps {lap_start}-{lap_end} not available for driver {d}")
+        # Copied: the poller may append to the buffer while the comparison runs in a worker thread
+        window = store.window("/car_data", session_key, d, int(bounds[0]), int(bounds[-1]) + 1)
+        traces[d] = (window["date"].copy(), window["speed"].copy(), bounds)
+
+    comparison = await asyncio.get_running_loop().run_in_executor(
+        None, delta_time.compare, traces, numbers[0], points)
+    return {"session_key": session_key, "lap_start": lap_start, "lap_end": lap_end, **comparison}
+
 @app.get("/api/predictions/lap_time")
-def predict_lap_time(session_key: int, driver_number: int):
+async def predict_lap_time(session_key: int, driver_number: int):
     """Predict next lap time for a driver."""
-    # 1. Fetch recent laps
-    laps = client.get_laps(session_key, driver_number)
+    # 1. Fetch recent laps (only laps newer than the last poll go upstream)
+    new_laps = await fetcher.poll("/laps", session_key, driver_number)
+    laps = fetcher.rows("/laps", session_key, driver_number)
     
-    # 2. Run Inference
-    prediction = predictor.predict_next_lap_time(str(driver_number), laps)
+    # 2. Update the session's online pace fit with the new laps, then run inference
+    predictor = get_predictor()
+    predictor.observe_laps(session_key, new_laps)
+    prediction = predictor.predict_next_lap_time(str(driver_number), laps, session_key=session_key)
     
     return {
         "driver_number": driver_number,
@@ -63,6 +265,42 @@ def predict_lap_time(session_key: int, driver_number: int):
         "unit": "seconds"
     }
 
+@app.post("/api/predictions/lap_time/batch")
+async def predict_lap_time_batch(request: LapTimeBatchRequest):
+    """Predict next lap times for the whole grid in a single model call."""
+    # 1. One upstream query for every driver's laps
+    new_laps = await fetcher.poll("/laps", request.session_key)
+    laps = fetcher.rows("/laps", request.session_key)
+    predictor = get_predictor()
+    predictor.observe_laps(request.session_key, new_laps)
+    laps_by_driver: Dict[int, List[Dict[str, Any]]] = {}
+    for lap in laps:
+        laps_by_driver.setdefault(lap.get('driver_number'), []).append(lap)
+    
+    items = request.items
+    if items is None:
+        items = [LapTimeContext(driver_number=d) for d in sorted(k for k in laps_by_driver if k is not None)]
+    
+    # 2. Batched inference
+    predictions = predictor.predict_next_lap_times_batch([
+        {
+            'driver_id': str(item.driver_number),
+            'current_laps': laps_by_driver.get(item.driver_number, []),
+            'context': item.context,
+            'session_key': request.session_key,
+        }
+        for item in items
+    ])
+    
+    return [
+        {
+            "driver_number": item.driver_number,
+            "predicted_next_lap": prediction,
+            "unit": "seconds"
+        }
+        for item, prediction in zip(items, predictions)
+    ]
+
 @app.get("/api/predictions/tyre_life")
 def predict_tyre_life(session_key: int, driver_number: int, compound: str = "SOFT"):
     """Predict tyre degradation."""
@@ -70,7 +308,7 @@ def predict_tyre_life(session_key: int, driver_number: int, compound: str = "SOF
     # For now, we mock the stint lap count logic
     stint_laps = 12 # Mock value: assume 12 laps into the stint
     
-    life_percentage = predictor.predict_tyre_life(str(driver_number), compound, stint_laps)
+    life_percentage = get_predictor().predict_tyre_life(str(driver_number), compound, stint_laps)
     
     return {
         "driver_number": driver_number,
@@ -81,19 +319,48 @@ def predict_tyre_life(session_key: int, driver_number: int, compound: str = "SOF
     }
 
 @app.get("/api/predictions/strategy_window")
-def strategy_window(session_key: int, driver_number: int, total_laps: int = 50):
-    """Get pit stop window recommendation."""
-    # Fetch current lap
-    # Mocking current lap as 20
-    current_lap = 20 
+async def strategy_window(session_key: int, driver_number: int, total_laps: int = 50,
+                          compound: str = "MEDIUM", current_lap: Optional[int] = None,
+                          tyre_age: Optional[int] = None):
+    """
+    Get pit stop window recommendation.
+    Current lap and tyre age come from the driver's laps so far unless given.
+    """
+    if current_lap is None or tyre_age is None:
+        laps = await fetcher.get_laps(session_key, driver_number)
+        last_lap = max((l['lap_number'] for l in laps if l.get('lap_number')), default=0)
+        stint_start = max((l['lap_number'] for l in laps if l.get('is_pit_out_lap') and l.get('lap_number')), default=1)
+        if current_lap is None:
+            current_lap = last_lap
+        if tyre_age is None:
+            tyre_age = max(0, current_lap - stint_start + 1) if stint_start > 1 else current_lap
     
-    window = predictor.predict_pit_window(str(driver_number), current_lap, total_laps)
+    # ~100 ms of NumPy on a cold state: keep it off the event loop
+    window = await asyncio.get_running_loop().run_in_executor(
+        None, get_predictor().predict_pit_window, str(driver_number), current_lap, total_laps, compound, tyre_age)
     return window
 
+@app.get("/api/predictions/grid")
+async def grid_forecast(session_key: int, total_laps: int = 50, horizon: int = Query(3, ge=1, le=20),
+                        samples: int = Query(500, ge=50, le=5000)):
+    """
+    Whole-grid forecast: finishing position probabilities for every car and
+    the full matrix of P(car i ahead of car j) after `horizon` laps.
+    """
+    new_laps, intervals, stints = await asyncio.gather(
+        fetcher.poll("/laps", session_key), fetcher.get_intervals(session_key), client.get_stints(session_key))
+    predictor = get_predictor()
+    predictor.observe_laps(session_key, new_laps)
+    # Copied on the loop: the fetcher appends to (and re-sorts) these buffers while the worker runs
+    laps, intervals = list(fetcher.rows("/laps", session_key)), list(intervals)
+    return await asyncio.get_running_loop().run_in_executor(
+        None, predictor.predict_grid, session_key, laps, intervals, stints, total_laps, horizon, samples)
+
 @app.get("/api/race-control/feed")
-def get_race_admin_feed(session_key: int):
+async def get_race_admin_feed(session_key: int):
     """Proxy for Race Control messages."""
-    return client.get_race_control(session_key)
+    return await client.get_race_control(session_key)
 
 if __name__ == "__main__":
+    import uvicorn
     uvicorn.run("stratx.api.main:app", host="0.0.0.0", port=8000, reload=True)
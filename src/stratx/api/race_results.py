@@ -1,161 +1,378 @@
 """
 Race Results API endpoints using FastF1 for real historical data.
 Optimized with in-memory caching for instant retrieval.
+
+FastF1 and pandas are imported on first use (see _fastf1), so importing this
+router does not slow down API cold starts.
+
+Rounds are loaded in a background worker pool (processes, since FastF1
+parsing is CPU-bound; threads on Vercel). start_warm_up() queues every round
+at startup and the caches fill as each one completes. A request for a round
+that is not loaded yet waits for (or starts) that round's load; concurrent
+requests share a single load per round.
+
+Every processed round is also written to an on-disk snapshot
+(stratx.data.race_snapshot). Rounds with a fresh snapshot are restored from
+it, memory-mapped, instead of being loaded through FastF1 again, so a restart
+takes well under a second.
 """
-import fastf1
-from fastapi import APIRouter, HTTPException
-from typing import List, Dict, Any, Optional
-import pandas as pd
+from fastapi import APIRouter, HTTPException, Request, Response
+from typing import List, Dict, Any, Optional, Tuple
+import asyncio
+import multiprocessing
 import os
-from functools import lru_cache
+import threading
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+
+from stratx.api.responses import EncodedPayload
+from stratx.data.race_snapshot import RaceSnapshotStore
+from stratx.metrics import REGISTRY, ROUND_LOAD_SECONDS, UPSTREAM_REQUEST_SECONDS, UPSTREAM_REQUESTS
 
 router = APIRouter(prefix="/api/results", tags=["results"])
 
-# Enable FastF1 cache
+SEASON = 2025
+ROUNDS = range(1, 25)  # 24 races
+
+# FastF1 cache
 cache_dir = '/tmp/fastf1_cache'
-os.makedirs(cache_dir, exist_ok=True)
-fastf1.Cache.enable_cache(cache_dir)
+_FASTF1 = None
+
+# Processed race snapshots (see RaceSnapshotStore)
+snapshot_dir = os.getenv('STRATX_SNAPSHOT_DIR', '/tmp/stratx_snapshots')
+# Bump when _format_race or _distill_laps output changes, so existing snapshots are rebuilt
+PAYLOAD_VERSION = 1
+SNAPSHOT_MAX_AGE = float(os.getenv('STRATX_SNAPSHOT_MAX_AGE', str(7 * 24 * 3600)))
+_SNAPSHOTS = RaceSnapshotStore(snapshot_dir, payload_version=PAYLOAD_VERSION, max_age=SNAPSHOT_MAX_AGE)
+
+def _fastf1():
+    """Import FastF1 and enable its cache on first use."""
+    global _FASTF1
+    if _FASTF1 is None:
+        import fastf1
+        os.makedirs(cache_dir, exist_ok=True)
+        fastf1.Cache.enable_cache(cache_dir)
+        _FASTF1 = fastf1
+    return _FASTF1
 
 # In-memory cache for all 2025 race data
 _RACE_DATA_CACHE: Dict[int, Dict[str, Any]] = {}
-_RACE_SESSIONS_CACHE: Dict[int, Any] = {}  # Store FastF1 session objects
-_CACHE_LOADED = False
+# round -> driver code and number -> per-driver artifact (see _distill_laps)
+_DRIVER_PERFORMANCE_CACHE: Dict[int, Dict[str, Dict[str, Any]]] = {}
+# Results are immutable once loaded, so they are served as pre-encoded bytes
+_ENCODED_ROUNDS: Dict[int, EncodedPayload] = {}
+_ENCODED_ALL: Optional[EncodedPayload] = None  # rebuilt when a round is added
+_ENCODED_VERSION = 0  # bumped with every round added, so a join built meanwhile is not stored
+# Guards the three above. Not _ROUND_LOCK: done-callbacks of finished futures run inside _submit_round
+_ENCODED_LOCK = threading.Lock()
+
+# Per-round load state: "pending", "loading", "ready", "missing" (no results) or "failed"
+_ROUND_STATUS: Dict[int, Dict[str, Any]] = {r: {"state": "pending"} for r in ROUNDS}
+_ROUND_FUTURES: Dict[int, Future] = {}
+_ROUND_LOCK = threading.Lock()
+_EXECUTOR: Optional[Executor] = None
+
+def _on_vercel() -> bool:
+    return bool(os.getenv('VERCEL'))
+
+def _executor() -> Executor:
+    """Worker pool for round loads, created on first use."""
+    global _EXECUTOR
+    if _EXECUTOR is None:
+        workers = int(os.getenv('STRATX_WARMUP_WORKERS', '0')) or min(4, os.cpu_count() or 1)
+        if _on_vercel():
+            # No multiprocessing in serverless functions
+            _EXECUTOR = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='race-load')
+        else:
+            _EXECUTOR = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+    return _EXECUTOR
+
+def _format_race(session, round_number: int) -> Dict[str, Any]:
+    """API payload for a loaded race session."""
+    from stratx.data.formatting import race_results_records
+
+    race_results = race_results_records(session.results)
+
+    event = session.event
+
+    return {
+        "round": round_number,
+        "race_name": event['EventName'],
+        "country": event['Country'],
+        "location": event['Location'],
+        "circuit": event['OfficialEventName'],
+        "date": str(event['EventDate']),
+        "results": race_results,
+        "total_laps": int(session.total_laps) if hasattr(session, 'total_laps') else None,
+    }
+
+def _distill_laps(laps) -> Dict[str, Dict[str, Any]]:
+    """
+    Precompute everything the driver performance endpoint serves, per driver:
+    lap numbers and lap times (seconds, NaN if unknown) as arrays, stints,
+    fastest/average lap and finishing position. Keyed by driver abbreviation;
+    the laps DataFrame (and the Session behind it) can then be dropped.
+    """
+    import numpy as np
+    import pandas as pd
+
+    performance = {}
+    for driver, driver_laps in laps.groupby('Driver', sort=False):
+        driver_laps = driver_laps.sort_values('LapNumber')
+
+        # Calculate metrics
+        fastest_lap = driver_laps['LapTime'].min()
+        avg_lap = driver_laps['LapTime'].mean()
+
+        # Tyre stints
+        stints = driver_laps.groupby('Stint').agg(
+            compound=('Compound', 'first'),
+            start_lap=('LapNumber', 'min'),
+            end_lap=('LapNumber', 'max'),
+            total_laps=('LapNumber', 'count'),
+        )
+        stint_info = [
+            {
+                "stint_number": int(stint_number),
+                "compound": compound,
+                "start_lap": int(start_lap),
+                "end_lap": int(end_lap),
+                "total_laps": int(total_laps),
+            }
+            for stint_number, compound, start_lap, end_lap, total_laps in stints.itertuples()
+        ]
+
+        position = driver_laps['Position'].iloc[-1] if 'Position' in driver_laps.columns else None
+        performance[str(driver)] = {
+            "driver_number": str(driver_laps['DriverNumber'].iloc[0]),
+            "lap_numbers": driver_laps['LapNumber'].fillna(-1).to_numpy(dtype=np.int16),
+            "lap_times": driver_laps['LapTime'].dt.total_seconds().to_numpy(dtype=np.float64),
+            "fastest_lap": str(fastest_lap),
+            "average_lap": str(avg_lap),
+            "total_laps": len(driver_laps),
+            "stints": stint_info,
+            "finish_position": int(position) if pd.notna(position) else None,
+        }
+    return performance
+
+def _load_round(round_number: int) -> Optional[Tuple[Dict[str, Any], Dict[str, Dict[str, Any]]]]:
+    """
+    Load one race (runs in a worker) and snapshot it. Returns (race payload,
+    per-driver performance), or None if the round has no results. The Session
+    itself stays in the worker and is discarded: only the distilled data is
+    sent back.
+    """
+    session = _fastf1().get_session(SEASON, round_number, 'R')
+    session.load()
+    if session.results.empty:
+        return None
+    race, performance = _format_race(session, round_number), _distill_laps(session.laps)
+
+    # FastF1 caches this session's API responses here (see fastf1.req.Cache)
+    api_path = getattr(session, 'api_path', None)
+    source_dir = os.path.join(cache_dir, api_path[len('/static/'):]) if api_path else None
+    try:
+        _SNAPSHOTS.save(SEASON, round_number, race, performance, source_dir)
+    except OSError as e:
+        print(f"  ⚠️  Round {round_number}: could not write snapshot - {e}")
+    return race, performance
+
+def _round_loaded(round_number: int, started: float, source: str, future: Future):
+    """Done-callback of a round load: fill the caches and record the outcome."""
+    global _ENCODED_ALL, _ENCODED_VERSION
+    elapsed = round(time.perf_counter() - started, 2)
+    try:
+        loaded = future.result()
+    except Exception as e:
+        _ROUND_STATUS[round_number] = {"state": "failed", "seconds": elapsed, "error": str(e)}
+        _record_load(source, "failed", elapsed)
+        print(f"  ⚠️  Round {round_number}: Failed - {str(e)}")
+        return
+    if loaded is None:
+        _ROUND_STATUS[round_number] = {"state": "missing", "seconds": elapsed}
+        _record_load(source, "missing", elapsed)
+        return
+    race, performance = loaded
+    # Also reachable by driver number, as with Laps.pick_driver
+    performance.update({p["driver_number"]: p for p in list(performance.values())})
+    # Encoded first: anything that sees the round in _RACE_DATA_CACHE can serve its bytes
+    encoded = EncodedPayload.from_obj(race)
+    with _ENCODED_LOCK:
+        _ENCODED_ROUNDS[round_number] = encoded
+        _ENCODED_ALL = None
+        _ENCODED_VERSION += 1
+    _DRIVER_PERFORMANCE_CACHE[round_number] = performance
+    _RACE_DATA_CACHE[round_number] = race
+    _ROUND_STATUS[round_number] = {"state": "ready", "seconds": elapsed, "source": source}
+    _record_load(source, "ready", elapsed)
+    if source != "snapshot":
+        print(f"  ✅ Round {round_number}: {race['race_name']} ({len(race['results'])} drivers, {race['total_laps'] or '?'} laps)")
+
+def _record_load(source: str, state: str, elapsed: float):
+    ROUND_LOAD_SECONDS.observe(elapsed, source=source, state=state)
+    if source == "fastf1":
+        # The FastF1 load itself runs in a worker, so it is timed here (queueing included)
+        UPSTREAM_REQUEST_SECONDS.observe(elapsed, service="fastf1", endpoint="session.load")
+        UPSTREAM_REQUESTS.inc(service="fastf1", endpoint="session.load",
+                              outcome="error" if state == "failed" else "ok")
+
+def _round_metrics():
+    for round_number, status in sorted(_ROUND_STATUS.items()):
+        if "seconds" in status:
+            yield {"round": str(round_number), "state": status["state"]}, status["seconds"]
+
+def _cache_metrics():
+    yield {"cache": "race_data"}, len(_RACE_DATA_CACHE)
+    yield {"cache": "driver_performance"}, len(_DRIVER_PERFORMANCE_CACHE)
+    yield {"cache": "encoded_rounds"}, len(_ENCODED_ROUNDS)
+
+REGISTRY.gauge_callback("stratx_warm_up_round_seconds", "How long each race round took to load, by round", _round_metrics)
+REGISTRY.gauge_callback("stratx_results_cache_entries", "Races held by the results caches", _cache_metrics)
+
+def _submit_round(round_number: int) -> Future:
+    """Single-flight: the in-progress (or finished) load of a round, starting one if needed."""
+    with _ROUND_LOCK:
+        future = _ROUND_FUTURES.get(round_number)
+        if future is not None and _ROUND_STATUS[round_number]["state"] != "failed":
+            return future
+        started = time.perf_counter()
+        snapshot = _SNAPSHOTS.load(SEASON, round_number)
+        if snapshot is not None:
+            source = "snapshot"
+            future = Future()
+            future.set_result(snapshot)
+        else:
+            source = "fastf1"
+            try:
+                future = _executor().submit(_load_round, round_number)
+            except BrokenProcessPool:
+                # A worker died (e.g. OOM): start a fresh pool
+                shutdown_warm_up()
+                future = _executor().submit(_load_round, round_number)
+            _ROUND_STATUS[round_number] = {"state": "loading"}
+        _ROUND_FUTURES[round_number] = future
+        # Registered under the lock so the caches are filled before any waiter wakes up
+        future.add_done_callback(partial(_round_loaded, round_number, started, source))
+        return future
+
+async def ensure_round(round_number: int) -> Optional[Dict[str, Any]]:
+    """Race payload for a round, loading it (once) if needed. None if unavailable."""
+    if round_number in _RACE_DATA_CACHE:
+        return _RACE_DATA_CACHE[round_number]
+    try:
+        await asyncio.wrap_future(_submit_round(round_number))
+    except Exception:
+        pass  # recorded in _ROUND_STATUS
+    return _RACE_DATA_CACHE.get(round_number)
+
+def start_warm_up() -> List[Future]:
+    """
+    Restore snapshotted rounds and queue the rest on the worker pool without
+    waiting (called at startup).
+    """
+    futures = [_submit_round(r) for r in ROUNDS]
+    restored = sum(1 for r in ROUNDS if _ROUND_STATUS[r].get("source") == "snapshot")
+    if restored < len(futures):
+        print(f"🏎️  Restored {restored} races from snapshots, loading the rest of {SEASON} in the background...")
+    else:
+        print(f"🏎️  Restored all {restored} {SEASON} races from snapshots")
+    return futures
+
+def shutdown_warm_up():
+    """Stop the worker pool, dropping rounds that have not started."""
+    global _EXECUTOR
+    if _EXECUTOR is not None:
+        _EXECUTOR.shutdown(wait=False, cancel_futures=True)
+        _EXECUTOR = None
+
+def warm_up_complete() -> bool:
+    return all(status["state"] in ("ready", "missing", "failed") for status in _ROUND_STATUS.values())
 
 def load_all_2025_races():
     """
-    Pre-load all 2025 race data into memory on startup.
-    This makes subsequent API calls instant.
+    Pre-load all 2025 race data into memory, blocking until every round is done.
+    The API uses start_warm_up() instead; this is for scripts and the shell.
     Includes: race results, lap data, and session information.
     """
-    global _CACHE_LOADED
-    
-    if _CACHE_LOADED:
-        return
-    
     # Skip pre-loading on Vercel (serverless) - load on-demand instead
-    import os
-    if os.getenv('VERCEL'):
+    if _on_vercel():
         print("⚠️  Running on Vercel - skipping pre-load, will load on-demand")
-        _CACHE_LOADED = True  # Mark as "loaded" to prevent re-attempts
         return
-    
-    print("🏎️  Loading all 2025 race data into memory...")
-    
-    for round_number in range(1, 25):  # 24 races
+
+    for future in start_warm_up():
         try:
-            session = fastf1.get_session(2025, round_number, 'R')
-            session.load()
-            
-            results = session.results
-            if results.empty:
-                continue
-            
-            # Store the session object for detailed queries
-            _RACE_SESSIONS_CACHE[round_number] = session
-            
-            # Format results
-            race_results = []
-            for idx, row in results.iterrows():
-                race_results.append({
-                    "position": int(row['Position']) if pd.notna(row['Position']) else None,
-                    "driver": row['Abbreviation'],
-                    "driver_number": int(row['DriverNumber']),
-                    "team": row['TeamName'],
-                    "time": str(row['Time']) if pd.notna(row['Time']) else 'DNF',
-                    "points": int(row['Points']) if pd.notna(row['Points']) else 0,
-                    "status": row['Status'] if pd.notna(row['Status']) else 'Finished',
-                    "grid_position": int(row['GridPosition']) if pd.notna(row['GridPosition']) else None,
-                })
-            
-            event = session.event
-            
-            # Cache basic race info
-            _RACE_DATA_CACHE[round_number] = {
-                "round": round_number,
-                "race_name": event['EventName'],
-                "country": event['Country'],
-                "location": event['Location'],
-                "circuit": event['OfficialEventName'],
-                "date": str(event['EventDate']),
-                "results": race_results,
-                "total_laps": int(session.total_laps) if hasattr(session, 'total_laps') else None,
-            }
-            
-            print(f"  ✅ Round {round_number}: {event['EventName']} ({len(race_results)} drivers, {session.total_laps if hasattr(session, 'total_laps') else '?'} laps)")
-            
-        except Exception as e:
-            print(f"  ⚠️  Round {round_number}: Failed - {str(e)}")
-    
-    _CACHE_LOADED = True
+            future.result()
+        except Exception:
+            pass  # recorded in _ROUND_STATUS
+
     print(f"🎉 Loaded {len(_RACE_DATA_CACHE)} races into memory!")
-    print(f"📊 Total data cached: {len(_RACE_SESSIONS_CACHE)} full sessions with lap data")
+    print(f"📊 Total data cached: {len(_DRIVER_PERFORMANCE_CACHE)} races with lap data")
+
+@router.get("/2025/status")
+async def get_warm_up_status() -> Dict[str, Any]:
+    """Readiness of the 2025 race cache, per round."""
+    rounds = [{"round": r, **_ROUND_STATUS[r]} for r in ROUNDS]
+    return {
+        "season": SEASON,
+        "ready": sum(1 for r in rounds if r["state"] == "ready"),
+        "total": len(rounds),
+        "complete": warm_up_complete(),
+        "rounds": rounds,
+    }
+
+def _encoded_all() -> EncodedPayload:
+    """Season payload, spliced from the per-round bytes (no re-serialization)."""
+    global _ENCODED_ALL
+    with _ENCODED_LOCK:
+        if _ENCODED_ALL is not None:
+            return _ENCODED_ALL
+        version = _ENCODED_VERSION
+        rounds = [_ENCODED_ROUNDS[r] for r in sorted(_ENCODED_ROUNDS)]
+    # Joined (and compressed) outside the lock; kept only if no round was added meanwhile
+    encoded = EncodedPayload.join(rounds)
+    with _ENCODED_LOCK:
+        if _ENCODED_VERSION == version:
+            _ENCODED_ALL = encoded
+    return encoded
 
-@router.get("/2025/all")
-async def get_all_race_results() -> List[Dict[str, Any]]:
+@router.get("/2025/all", response_model=List[Dict[str, Any]])
+async def get_all_race_results(request: Request) -> Response:
     """
     Get all 2025 race results in a single request.
-    Optimized for bulk data fetching.
+    Optimized for bulk data fetching: pre-encoded, precompressed bytes with an
+    ETag, so unchanged data is answered with 304.
     """
-    if not _CACHE_LOADED:
-        load_all_2025_races()
-    
-    return [_RACE_DATA_CACHE[round_num] for round_num in sorted(_RACE_DATA_CACHE.keys())]
+    if not _on_vercel() and not warm_up_complete():
+        # Waits for the warm-up (starting it if needed) without blocking the event loop
+        await asyncio.gather(*(ensure_round(r) for r in ROUNDS))
 
-@router.get("/2025/{round_number}")
-async def get_race_results(round_number: int) -> Dict[str, Any]:
+    return _encoded_all().response(request)
+
+@router.get("/2025/{round_number}", response_model=Dict[str, Any])
+async def get_race_results(round_number: int, request: Request) -> Response:
     """
     Fetch real 2025 race results using FastF1.
     Returns race winner, podium, and full classification.
-    Data is served from in-memory cache for instant response.
+    Data is served as pre-encoded bytes from the in-memory cache (304 if the
+    client's ETag is current); a round that is not loaded yet is loaded on demand.
     """
-    # Load cache on first request
-    if not _CACHE_LOADED:
-        load_all_2025_races()
-    
-    # Serve from cache if available
-    if round_number in _RACE_DATA_CACHE:
-        return _RACE_DATA_CACHE[round_number]
-    
-    # On Vercel (serverless), load individual race on-demand
-    import os
-    if os.getenv('VERCEL'):
-        try:
-            session = fastf1.get_session(2025, round_number, 'R')
-            session.load()
-            
-            results = session.results
-            if results.empty:
-                raise HTTPException(status_code=404, detail=f"No results found for round {round_number}")
-            
-            # Format results
-            race_results = []
-            for idx, row in results.iterrows():
-                race_results.append({
-                    "position": int(row['Position']) if pd.notna(row['Position']) else None,
-                    "driver": row['Abbreviation'],
-                    "driver_number": int(row['DriverNumber']),
-                    "team": row['TeamName'],
-                    "time": str(row['Time']) if pd.notna(row['Time']) else 'DNF',
-                    "points": int(row['Points']) if pd.notna(row['Points']) else 0,
-                    "status": row['Status'] if pd.notna(row['Status']) else 'Finished',
-                    "grid_position": int(row['GridPosition']) if pd.notna(row['GridPosition']) else None,
-                })
-            
-            event = session.event
-            
-            return {
-                "round": round_number,
-                "race_name": event['EventName'],
-                "country": event['Country'],
-                "location": event['Location'],
-                "circuit": event['OfficialEventName'],
-                "date": str(event['EventDate']),
-                "results": race_results,
-                "total_laps": int(session.total_laps) if hasattr(session, 'total_laps') else None,
-            }
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Failed to load race data: {str(e)}")
-    
+    encoded = _ENCODED_ROUNDS.get(round_number)
+    if encoded is not None:
+        return encoded.response(request)
+
+    if round_number not in ROUNDS:
+        raise HTTPException(status_code=404, detail=f"No results found for round {round_number}")
+
+    race = await ensure_round(round_number)
+    if race is not None:
+        return _ENCODED_ROUNDS[round_number].response(request)
+
+    status = _ROUND_STATUS[round_number]
+    if status["state"] == "failed":
+        raise HTTPException(status_code=500, detail=f"Failed to load race data: {status.get('error')}")
+
     raise HTTPException(
         status_code=404,
         detail=f"No results found for round {round_number}"
@@ -167,54 +384,35 @@ async def get_driver_race_performance(driver_code: str, round_number: int) -> Di
     Get detailed performance metrics for a specific driver in a race.
     Used for model validation. Served from in-memory cache for instant response.
     """
-    # Ensure cache is loaded
-    if not _CACHE_LOADED:
-        load_all_2025_races()
-    
+    # Ensure the round is loaded
+    if round_number in ROUNDS:
+        await ensure_round(round_number)
+
     # Check if we have this race cached
-    if round_number not in _RACE_SESSIONS_CACHE:
+    if round_number not in _DRIVER_PERFORMANCE_CACHE:
         raise HTTPException(status_code=404, detail=f"No data for round {round_number}")
-    
-    try:
-        session = _RACE_SESSIONS_CACHE[round_number]
-        
-        # Get driver laps from cached session
-        driver_laps = session.laps.pick_driver(driver_code)
-        
-        if driver_laps.empty:
-            raise HTTPException(status_code=404, detail=f"No data for driver {driver_code}")
-        
-        # Calculate metrics
-        fastest_lap = driver_laps['LapTime'].min()
-        avg_lap = driver_laps['LapTime'].mean()
-        
-        # Tyre stints
-        stints = driver_laps.groupby('Stint').agg({
-            'Compound': 'first',
-            'LapNumber': ['min', 'max', 'count']
-        }).reset_index()
-        
-        stint_info = []
-        for _, stint in stints.iterrows():
-            stint_info.append({
-                "stint_number": int(stint['Stint']),
-                "compound": stint['Compound']['first'],
-                "start_lap": int(stint['LapNumber']['min']),
-                "end_lap": int(stint['LapNumber']['max']),
-                "total_laps": int(stint['LapNumber']['count'])
-            })
-        
-        return {
-            "driver": driver_code,
-            "round": round_number,
-            "fastest_lap": str(fastest_lap),
-            "average_lap": str(avg_lap),
-            "total_laps": len(driver_laps),
-            "stints": stint_info,
-            "finish_position": int(driver_laps.iloc[-1]['Position']) if 'Position' in driver_laps.columns else None
+
+    performance = _DRIVER_PERFORMANCE_CACHE[round_number].get(driver_code)
+    if performance is None:
+        raise HTTPException(status_code=404, detail=f"No data for driver {driver_code}")
+
+    return {
+        "driver": driver_code,
+        "round": round_number,
+        "fastest_lap": performance["fastest_lap"],
+        "average_lap": performance["average_lap"],
+        "total_laps": performance["total_laps"],
+        "stints": performance["stints"],
+        "finish_position": performance["finish_position"],
+        "laps": _lap_rows(performance["lap_numbers"], performance["lap_times"]),
+    }
+
+def _lap_rows(lap_numbers, lap_times) -> List[Dict[str, Any]]:
+    """Lap-by-lap times (s) from the distilled (possibly memory-mapped) arrays; None where FastF1 had none."""
+    return [
+        {
+            "lap_number": lap_number if lap_number >= 0 else None,
+            "lap_time": lap_time if lap_time == lap_time else None,  # NaN -> None
         }
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        for lap_number, lap_time in zip(lap_numbers.tolist(), lap_times.tolist())
+    ]
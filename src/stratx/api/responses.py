@@ -0,0 +1,83 @@
+"""
+Pre-encoded JSON responses for data that does not change between requests.
+
+An EncodedPayload serializes its body once, precompresses it (gzip, and brotli
+when the optional `brotli` package is installed) and derives strong ETags, so
+serving it is a header check plus a bytes write.
+"""
+import gzip
+import hashlib
+import json
+from typing import Any, Dict, List
+
+from fastapi import Request, Response
+
+try:
+    import brotli
+except ImportError:  # optional: pip install stratx[compression]
+    brotli = None
+
+# Preferred encodings, best first
+ENCODINGS = ["br", "gzip", "identity"]
+
+# Browsers revalidate on every use; unchanged data costs a 304
+CACHE_CONTROL = "no-cache"
+
+
+class EncodedPayload:
+    """A JSON body encoded once, with precompressed variants and strong ETags."""
+
+    def __init__(self, body: bytes):
+        self.body = body
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        self.variants: Dict[str, bytes] = {"identity": body, "gzip": gzip.compress(body, 9, mtime=0)}
+        if brotli is not None:
+            self.variants["br"] = brotli.compress(body)
+        # Each encoding is a different representation, so it gets its own strong ETag
+        self.etags: Dict[str, str] = {
+            encoding: f'"{digest}"' if encoding == "identity" else f'"{digest}-{encoding}"'
+            for encoding in self.variants
+        }
+
+    @classmethod
+    def from_obj(cls, obj: Any) -> "EncodedPayload":
+        return cls(json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8"))
+
+    @classmethod
+    def join(cls, payloads: List["EncodedPayload"]) -> "EncodedPayload":
+        """JSON array of already encoded payloads, without re-serializing them."""
+        return cls(b"[" + b",".join(p.body for p in payloads) + b"]")
+
+    def response(self, request: Request) -> Response:
+        """200 with the best encoding the client accepts, or 304 if its copy is current."""
+        encoding = negotiate(request.headers.get("accept-encoding", ""), self.variants)
+        headers = {"ETag": self.etags[encoding], "Cache-Control": CACHE_CONTROL, "Vary": "Accept-Encoding"}
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and self._matches(if_none_match):
+            return Response(status_code=304, headers=headers)
+
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return Response(content=self.variants[encoding], media_type="application/json", headers=headers)
+
+    def _matches(self, if_none_match: str) -> bool:
+        if if_none_match.strip() == "*":
+            return True
+        # If-None-Match uses weak comparison: ignore W/ prefixes
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return any(etag in tags for etag in self.etags.values())
+
+
+def negotiate(accept_encoding: str, available: Dict[str, bytes]) -> str:
+    """Pick the preferred available encoding from an Accept-Encoding header."""
+    accepted = set()
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        if params.replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        accepted.add(name.strip())
+    for encoding in ENCODINGS:
+        if encoding in available and (encoding in accepted or encoding == "identity" or "*" in accepted):
+            return encoding
+    return "identity"
@@ -0,0 +1,98 @@
+"""
+Downsampled car telemetry for charts.
+
+Raw /car_data runs at ~4 Hz per car, so a race is tens of thousands of
+samples per driver, far more than a chart can draw. Queries here read the
+columnar SessionStore window for one driver, decimate each requested channel
+server-side (stratx.data.decimation) to about `points` samples and return
+compact arrays: integer millisecond offsets from `t0` plus values.
+
+Results are cached as pre-encoded payloads (gzip, ETags) keyed by the query
+and by the window's row count and last timestamp, so repeated zoom levels of
+a finished session, or of a closed window of a live one, are served without
+recomputing, while windows that receive new rows are recomputed.
+"""
+import threading
+import numpy as np
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from stratx.api.responses import EncodedPayload
+from stratx.data.decimation import decimate
+from stratx.data.session_store import CAR_DATA_SCHEMA, SessionStore
+from stratx.data.timeutils import epoch_ns_to_iso
+
+CHANNELS = tuple(name for name in CAR_DATA_SCHEMA if name != "date")
+DEFAULT_CHANNELS = ("speed", "throttle", "brake", "rpm", "n_gear", "drs")
+
+
+class TelemetryDownsampler:
+    """Decimated /car_data windows from a SessionStore, with an LRU of encoded results."""
+
+    def __init__(self, store: SessionStore, max_entries: int = 256):
+        self.store = store
+        self.max_entries = max_entries
+        self._cache: "OrderedDict[Tuple[Any, ...], EncodedPayload]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def query(self, session_key: int, driver_number: int, start_ns: Optional[int] = None,
+              end_ns: Optional[int] = None, channels: Sequence[str] = DEFAULT_CHANNELS, points: int = 1000,
+              method: str = "lttb") -> EncodedPayload:
+        # Copied: the live poller may merge late rows into the buffer while this runs in a worker thread
+        window = {name: values.copy() for name, values in
+                  self.store.window("/car_data", session_key, driver_number, start_ns, end_ns).items()}
+        dates = window["date"]
+        key = (session_key, driver_number, start_ns, end_ns, tuple(channels), points, method,
+               len(dates), int(dates[-1]) if len(dates) else None)
+        with self._lock:
+            payload = self._cache.get(key)
+            if payload is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return payload
+            self.misses += 1
+
+        payload = EncodedPayload.from_obj(
+            self._downsample(session_key, driver_number, window, channels, points, method))
+        with self._lock:
+            self._cache[key] = payload
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return payload
+
+    def _downsample(self, session_key: int, driver_number: int, window: Dict[str, np.ndarray],
+                    channels: Sequence[str], points: int, method: str) -> Dict[str, Any]:
+        dates = window["date"]
+        t0 = int(dates[0]) if len(dates) else None
+        # Seconds from the first sample: exact enough for triangle areas, unlike raw epoch ns
+        seconds = (dates - t0) / 1e9 if t0 is not None else np.empty(0)
+        series = {}
+        for name in channels:
+            values = window[name]
+            keep = ~np.isnan(values) if values.dtype.kind == "f" else values >= 0
+            if not keep.all():
+                idx = np.flatnonzero(keep)
+                chosen = idx[decimate(seconds[idx], values[idx], points, method)]
+            else:
+                chosen = decimate(seconds, values, points, method)
+            v = values[chosen]
+            series[name] = {
+                "t": np.round(seconds[chosen] * 1000).astype(np.int64).tolist(),
+                "v": (np.round(v.astype(np.float64), 1) if v.dtype.kind == "f" else v.astype(np.int64)).tolist(),
+            }
+        return {
+            "session_key": session_key,
+            "driver_number": driver_number,
+            "method": method,
+            "points": points,
+            "raw_points": int(len(dates)),
+            "t0": epoch_ns_to_iso(t0) if t0 is not None else None,
+            "end": epoch_ns_to_iso(int(dates[-1])) if len(dates) else None,
+            # t: milliseconds after t0
+            "series": series,
+        }
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._cache), "hits": self.hits, "misses": self.misses}
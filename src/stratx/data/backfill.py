@@ -0,0 +1,319 @@
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+import pandas as pd
+import httpx
+from typing import Any, Dict, Iterable, List, Optional
+
+from stratx.data.fileutils import write_json_atomic
+from stratx.data.formatting import (
+    to_records, ERGAST_RESULT_FIELDS, DRIVER_STANDINGS_FIELDS, CONSTRUCTOR_STANDINGS_FIELDS,
+)
+
+# Ergast-compatible API (Ergast itself was retired; Jolpica serves the same schema)
+ERGAST_BASE_URL = "https://api.jolpi.ca/ergast/f1"
+
+MANIFEST_VERSION = 1
+
+
+class TokenBucket:
+    """
+    Async token bucket: `rate` requests per second on average, bursts of up to
+    `capacity`. pause() empties the bucket for a while (e.g. after a 429) so
+    every caller backs off, not just the one that was throttled.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        if rate <= 0 or capacity < 1:
+            raise ValueError("rate must be > 0 and capacity >= 1")
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def pause(self, seconds: float):
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self._tokens = 0.0
+        self._updated = max(self._updated, self._paused_until)
+
+
+class RateLimitedClient:
+    """
+    JSON GETs against a rate-limited API: a token bucket paces request starts,
+    a semaphore bounds requests in flight, and 429/5xx responses are retried
+    with exponential backoff (honouring Retry-After).
+    """
+
+    RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+    def __init__(self, base_url: str = ERGAST_BASE_URL, rate: float = 4.0, burst: float = 4.0,
+                 concurrency: int = 8, max_retries: int = 6, backoff: float = 1.0, max_backoff: float = 60.0,
+                 timeout: float = 30.0):
+        self.logger = logging.getLogger(__name__)
+        self.base_url = base_url.rstrip("/")
+        self.bucket = TokenBucket(rate, burst)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._client = httpx.AsyncClient(timeout=timeout, limits=httpx.Limits(max_connections=concurrency))
+        self.stats = {"requests": 0, "retries": 0, "throttled": 0}
+
+    async def aclose(self):
+        await self._client.aclose()
+
+    async def get_json(self, path: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        url = f"{self.base_url}/{path.lstrip('/')}"
+        for attempt in range(self.max_retries + 1):
+            await self.bucket.acquire()
+            async with self._semaphore:
+                self.stats["requests"] += 1
+                try:
+                    response = await self._client.get(url, params=params)
+                except httpx.TransportError as e:
+                    if attempt == self.max_retries:
+                        raise
+                    delay = self._delay(attempt)
+                    self.logger.warning(f"{url}: {e!r}, retrying in {delay:.1f}s")
+                    self.stats["retries"] += 1
+                    await asyncio.sleep(delay)
+                    continue
+
+            if response.status_code not in self.RETRY_STATUSES:
+                response.raise_for_status()
+                return response.json()
+            if attempt == self.max_retries:
+                response.raise_for_status()
+
+            delay = self._delay(attempt, response.headers.get("retry-after"))
+            self.stats["retries"] += 1
+            if response.status_code == 429:
+                self.stats["throttled"] += 1
+                # Everyone waits, not just this request
+                self.bucket.pause(delay)
+            self.logger.warning(f"{url}: HTTP {response.status_code}, retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+        raise RuntimeError("unreachable")
+
+    def _delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        if retry_after:
+            try:
+                return min(self.max_backoff, float(retry_after))
+            except ValueError:
+                pass
+        # Exponential backoff with full jitter
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+
+class BackfillManifest:
+    """
+    Checkpoint of a backfill run: finished seasons plus, per season, the
+    summary of every race already written. Saved atomically after each step,
+    so a rerun resumes where the last one stopped.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.seasons: List[int] = []
+        self.races: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                data = json.load(f)
+            if data.get("version") == MANIFEST_VERSION:
+                self.seasons = data.get("seasons", [])
+                self.races = data.get("races", {})
+
+    def season_done(self, year: int) -> bool:
+        return year in self.seasons
+
+    def race(self, year: int, round_number: int) -> Optional[Dict[str, Any]]:
+        return self.races.get(str(year), {}).get(str(round_number))
+
+    def mark_race(self, year: int, round_number: int, summary: Dict[str, Any]):
+        self.races.setdefault(str(year), {})[str(round_number)] = summary
+        self.save()
+
+    def mark_season(self, year: int):
+        if year not in self.seasons:
+            self.seasons = sorted(self.seasons + [year])
+        self.save()
+
+    def save(self):
+        write_json_atomic(self.path, {"version": MANIFEST_VERSION, "seasons": self.seasons, "races": self.races})
+
+
+class ErgastBackfill:
+    """
+    Writes the historical archive (one season file and one file per race, in
+    the format the frontend reads) from the Ergast API. All seasons and rounds
+    are fetched concurrently; the RateLimitedClient keeps the request rate at
+    the allowed budget, and the manifest lets reruns skip finished work.
+    """
+
+    def __init__(self, client: RateLimitedClient, seasons_dir: str, races_dir: str, manifest: BackfillManifest):
+        self.logger = logging.getLogger(__name__)
+        self.client = client
+        self.seasons_dir = seasons_dir
+        self.races_dir = races_dir
+        self.manifest = manifest
+
+    async def run(self, years: Iterable[int]) -> Dict[str, Any]:
+        """Backfill the given seasons. Returns written/skipped/failed seasons and request stats."""
+        years = list(years)
+        todo = [y for y in years if not self.manifest.season_done(y)]
+        outcomes = await asyncio.gather(*(self.season(y) for y in todo), return_exceptions=True)
+        failed = {}
+        for year, outcome in zip(todo, outcomes):
+            if isinstance(outcome, BaseException):
+                failed[year] = repr(outcome)
+                self.logger.error(f"Season {year} failed: {outcome!r}")
+        return {
+            "written": [y for y in todo if y not in failed],
+            "skipped": [y for y in years if y not in todo],
+            "failed": failed,
+            **self.client.stats,
+        }
+
+    async def season(self, year: int):
+        schedule, drivers, constructors = await asyncio.gather(
+            self.client.get_json(f"{year}.json", {"limit": 100}),
+            self.client.get_json(f"{year}/driverStandings.json", {"limit": 100}),
+            self.client.get_json(f"{year}/constructorStandings.json", {"limit": 100}) if year >= 1958 else _empty(),
+        )
+        events = schedule["MRData"]["RaceTable"]["Races"]
+
+        summaries = await asyncio.gather(*(self.race(year, event) for event in events))
+        formatted_races = [s for s in summaries if s is not None]
+
+        format_drivers = to_records(_driver_standings_frame(drivers), DRIVER_STANDINGS_FIELDS)
+        format_constructors = to_records(_constructor_standings_frame(constructors), CONSTRUCTOR_STANDINGS_FIELDS)
+
+        # Identify Champions
+        d_champ = format_drivers[0] if format_drivers else None
+        c_champ = format_constructors[0] if format_constructors else None
+
+        season_data = {
+            "year": year,
+            "driverChampion": {
+                "name": d_champ['driver'] if d_champ else "Unknown",
+                "team": d_champ['team'] if d_champ else "Unknown",
+                "points": d_champ['points'] if d_champ else 0
+            },
+            "constructorChampion": {
+                "name": c_champ['constructor'] if c_champ else "Unknown",
+                "points": c_champ['points'] if c_champ else 0
+            },
+            "races": formatted_races,
+            "driverStandings": format_drivers,
+            "constructorStandings": format_constructors
+        }
+        write_json_atomic(os.path.join(self.seasons_dir, f"{year}.json"), season_data)
+        self.manifest.mark_season(year)
+        self.logger.info(f"Season {year}: {len(formatted_races)} races")
+
+    async def race(self, year: int, event: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Write one race's detail file and return its season summary (None if no results)."""
+        r = int(event.get("round") or 0)
+        if r == 0:
+            return None
+        done = self.manifest.race(year, r)
+        if done is not None:
+            return done
+
+        data = await self.client.get_json(f"{year}/{r}/results.json", {"limit": 100})
+        races = data["MRData"]["RaceTable"]["Races"]
+        race_res = _results_frame(races[0]["Results"] if races else [])
+        if race_res.empty:
+            return None
+
+        location = event.get("Circuit", {}).get("Location", {})
+        race_name = event.get("raceName", f"Round {r}")
+        circuit_name = location.get("locality", "Unknown")
+        country = location.get("country", "Unknown")
+        date = event.get("date", "Unknown")
+
+        # Find winner (position 1)
+        winner = race_res[race_res['position'] == 1]
+        winner = winner.iloc[0] if not winner.empty else None
+
+        summary = {
+            "round": r,
+            "name": race_name,
+            "circuit": circuit_name,
+            "country": country,
+            "date": date,
+            "winner": f"{winner['givenName']} {winner['familyName']}" if winner is not None else "Unknown",
+            "team": winner.get('constructorName', 'Unknown') if winner is not None else "Unknown",
+        }
+
+        race_detail_json = {
+            "raceName": race_name,
+            "circuit": circuit_name,
+            "country": country,
+            "date": date,
+            "results": to_records(race_res, ERGAST_RESULT_FIELDS)
+        }
+        write_json_atomic(os.path.join(self.races_dir, str(year), f"{r}.json"), race_detail_json)
+        self.manifest.mark_race(year, r, summary)
+        return summary
+
+
+async def _empty() -> Dict[str, Any]:
+    return {}
+
+
+def _results_frame(results: List[Dict[str, Any]]) -> pd.DataFrame:
+    return pd.DataFrame({
+        "position": pd.to_numeric(pd.Series([r.get("position") for r in results], dtype=object), errors="coerce"),
+        "givenName": [r.get("Driver", {}).get("givenName") for r in results],
+        "familyName": [r.get("Driver", {}).get("familyName") for r in results],
+        "constructorName": [r.get("Constructor", {}).get("name", "Unknown") for r in results],
+        "points": [r.get("points") for r in results],
+        "status": [r.get("status", "Finished") for r in results],
+    })
+
+
+def _standings(data: Dict[str, Any], key: str) -> List[Dict[str, Any]]:
+    lists = data.get("MRData", {}).get("StandingsTable", {}).get("StandingsLists", [])
+    return lists[0].get(key, []) if lists else []
+
+
+def _driver_standings_frame(data: Dict[str, Any]) -> pd.DataFrame:
+    rows = _standings(data, "DriverStandings")
+    return pd.DataFrame({
+        "position": [r.get("position") for r in rows],
+        "givenName": [r.get("Driver", {}).get("givenName") for r in rows],
+        "familyName": [r.get("Driver", {}).get("familyName") for r in rows],
+        "constructorNames": [[c.get("name") for c in r.get("Constructors", [])] for r in rows],
+        "points": [r.get("points") for r in rows],
+        "wins": [r.get("wins") for r in rows],
+    })
+
+
+def _constructor_standings_frame(data: Dict[str, Any]) -> pd.DataFrame:
+    rows = _standings(data, "ConstructorStandings")
+    return pd.DataFrame({
+        "position": [r.get("position") for r in rows],
+        "constructorName": [r.get("Constructor", {}).get("name", "Unknown") for r in rows],
+        "points": [r.get("points") for r in rows],
+        "wins": [r.get("wins") for r in rows],
+    })
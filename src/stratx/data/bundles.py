@@ -0,0 +1,147 @@
+"""
+Per-season static data bundles for the frontend.
+
+The static archive is one pretty-printed JSON file per season and per race,
+so browsing a season costs a request per race. A bundle packs a season's
+summary and all its race details into one minified file, precompressed
+(gzip, plus brotli when installed) for hosts that serve precompressed
+siblings. File names carry a content hash and are listed in a small index
+manifest, so bundles can be cached forever and only the index revalidated.
+
+The per-file JSON stays in place as the fallback.
+
+Layout (under frontend/public/data):
+  seasons/{year}.json, races/{year}/{round}.json   historical (fetch_historical_data.py)
+  2025/race_{round}.json                            current season (generate_static_data.py)
+  bundles/index.json, bundles/{year}.{hash}.json[.gz|.br]
+"""
+import glob
+import gzip
+import hashlib
+import json
+import os
+from typing import Any, Dict, Iterable, List, Optional
+
+from stratx.data.fileutils import write_json_atomic
+
+try:
+    import brotli
+except ImportError:  # optional: pip install stratx[compression]
+    brotli = None
+
+BUNDLE_VERSION = 1
+BUNDLE_DIR = "bundles"
+INDEX_FILE = "index.json"
+
+
+def compact_json(obj: Any) -> bytes:
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def source_files(data_dir: str, year: int) -> List[str]:
+    """The per-file JSON a season bundle is built from."""
+    files = []
+    season = os.path.join(data_dir, "seasons", f"{year}.json")
+    if os.path.exists(season):
+        files.append(season)
+    files += glob.glob(os.path.join(data_dir, "races", str(year), "*.json"))
+    files += glob.glob(os.path.join(data_dir, str(year), "race_*.json"))
+    return files
+
+
+def available_years(data_dir: str) -> List[int]:
+    years = set()
+    for path in glob.glob(os.path.join(data_dir, "seasons", "*.json")):
+        years.add(os.path.splitext(os.path.basename(path))[0])
+    for pattern in ("races/*", "*"):
+        for path in glob.glob(os.path.join(data_dir, pattern)):
+            if os.path.isdir(path):
+                years.add(os.path.basename(path))
+    return sorted(int(y) for y in years if y.isdigit())
+
+
+def season_bundle(data_dir: str, year: int) -> Optional[Dict[str, Any]]:
+    """{"year", "season": season summary or None, "races": {round: race detail}}; None if no data."""
+    season = None
+    races: Dict[str, Any] = {}
+    for path in source_files(data_dir, year):
+        with open(path) as f:
+            data = json.load(f)
+        name = os.path.splitext(os.path.basename(path))[0]
+        if os.path.basename(os.path.dirname(path)) == "seasons":
+            season = data
+        else:
+            races[name.removeprefix("race_")] = data
+    if season is None and not races:
+        return None
+    return {"year": year, "season": season, "races": dict(sorted(races.items(), key=lambda kv: int(kv[0])))}
+
+
+def write_bundles(data_dir: str, years: Optional[Iterable[int]] = None) -> Dict[str, Any]:
+    """
+    (Re)write the bundles for `years` (default: every season with data) and
+    update the index. Returns a size/request-count report.
+    """
+    out_dir = os.path.join(data_dir, BUNDLE_DIR)
+    os.makedirs(out_dir, exist_ok=True)
+    index_path = os.path.join(out_dir, INDEX_FILE)
+    index = {"version": BUNDLE_VERSION, "bundles": {}}
+    if os.path.exists(index_path):
+        with open(index_path) as f:
+            existing = json.load(f)
+        if existing.get("version") == BUNDLE_VERSION:
+            index = existing
+
+    report = {"seasons": 0, "source_files": 0, "source_bytes": 0, "bytes": 0, "gzip_bytes": 0, "br_bytes": 0}
+    for year in (available_years(data_dir) if years is None else years):
+        bundle = season_bundle(data_dir, year)
+        if bundle is None:
+            continue
+        body = compact_json(bundle)
+        digest = hashlib.sha256(body).hexdigest()
+        name = f"{year}.{digest[:12]}.json"
+        variants = {name: body, f"{name}.gz": gzip.compress(body, 9, mtime=0)}
+        if brotli is not None:
+            variants[f"{name}.br"] = brotli.compress(body)
+
+        # Drop superseded bundles of this season, then write the new one
+        for old in glob.glob(os.path.join(out_dir, f"{year}.*.json*")):
+            if os.path.basename(old) not in variants:
+                os.remove(old)
+        for file_name, data in variants.items():
+            path = os.path.join(out_dir, file_name)
+            if not os.path.exists(path):
+                tmp = f"{path}.tmp"
+                with open(tmp, "wb") as f:
+                    f.write(data)
+                os.replace(tmp, path)
+
+        entry = {"file": name, "sha256": digest, "bytes": len(body), "gzip_bytes": len(variants[f"{name}.gz"])}
+        if f"{name}.br" in variants:
+            entry["br_bytes"] = len(variants[f"{name}.br"])
+        index["bundles"][str(year)] = entry
+
+        sources = source_files(data_dir, year)
+        report["seasons"] += 1
+        report["source_files"] += len(sources)
+        report["source_bytes"] += sum(os.path.getsize(p) for p in sources)
+        report["bytes"] += entry["bytes"]
+        report["gzip_bytes"] += entry["gzip_bytes"]
+        report["br_bytes"] += entry.get("br_bytes", 0)
+
+    index["bundles"] = dict(sorted(index["bundles"].items()))
+    write_json_atomic(index_path, index, indent=None)
+    report["index_bytes"] = os.path.getsize(index_path)
+    return report
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    kb = lambda n: f"{n / 1024:,.0f} KB"
+    lines = [
+        f"Seasons bundled: {report['seasons']}",
+        f"  per-file JSON: {report['source_files']} requests, {kb(report['source_bytes'])}",
+        f"  bundles:       {report['seasons'] + 1} requests (incl. index), {kb(report['bytes'] + report['index_bytes'])}"
+        f" minified, {kb(report['gzip_bytes'])} gzip"
+        + (f", {kb(report['br_bytes'])} brotli" if report['br_bytes'] else ""),
+    ]
+    return "\n".join(lines)
@@ -0,0 +1,91 @@
+"""
+Vectorized decimation of time series for charts.
+
+Both methods return indices into the input, always including the first and
+last sample, so the chosen points are real samples (no smoothing):
+
+  - lttb: Largest-Triangle-Three-Buckets. Splits the interior into n - 2
+    buckets and keeps, per bucket, the point forming the largest triangle
+    with the point kept in the previous bucket and the mean of the next one.
+    That anchor dependency makes the textbook algorithm a sequential loop;
+    here every bucket is solved at once against an anchor estimate (first
+    the previous bucket's mean, then the points picked in the previous
+    pass) until the picks stop changing. A fixed point is exactly the
+    sequential result; it takes a handful of whole-array passes.
+  - minmax: the minimum and maximum of n / 2 equal-count buckets. Cheaper,
+    and guarantees every spike survives (best for step channels such as
+    brake or DRS).
+"""
+import numpy as np
+
+METHODS = ("lttb", "minmax")
+
+
+def _bucket_matrix(starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """[buckets, max bucket size] sample indices; short buckets repeat their last index."""
+    width = int((ends - starts).max())
+    idx = starts[:, None] + np.arange(width)
+    return np.minimum(idx, (ends - 1)[:, None])
+
+
+def lttb(x: np.ndarray, y: np.ndarray, n: int, max_passes: int = 64) -> np.ndarray:
+    """Indices of n points of (x, y) chosen by LTTB; all indices if n >= len(x)."""
+    size = len(x)
+    if n >= size or n < 3:
+        return np.arange(size)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    # n - 2 interior buckets over samples 1 .. size - 2
+    edges = np.linspace(1, size - 1, n - 1).astype(np.int64)
+    starts, ends = edges[:-1], edges[1:]
+    counts = ends - starts
+    idx = _bucket_matrix(starts, ends)
+    bx, by = x[idx], y[idx]
+
+    mean_x = np.add.reduceat(x[1:size - 1], starts - 1) / counts
+    mean_y = np.add.reduceat(y[1:size - 1], starts - 1) / counts
+    # Third vertex: the next bucket's mean (the last point for the last bucket)
+    cx = np.append(mean_x[1:], x[-1])[:, None]
+    cy = np.append(mean_y[1:], y[-1])[:, None]
+    # First vertex: estimated from the previous bucket's mean, then refined
+    ax = np.concatenate(([x[0]], mean_x[:-1]))[:, None]
+    ay = np.concatenate(([y[0]], mean_y[:-1]))[:, None]
+
+    rows = np.arange(len(starts))
+    chosen = None
+    for _ in range(max_passes):
+        area = np.abs((ax - cx) * (by - ay) - (ax - bx) * (cy - ay))
+        picked = idx[rows, np.argmax(np.nan_to_num(area, nan=-1.0), axis=1)]
+        if chosen is not None and np.array_equal(picked, chosen):
+            break
+        chosen = picked
+        ax = np.concatenate(([x[0]], x[chosen[:-1]]))[:, None]
+        ay = np.concatenate(([y[0]], y[chosen[:-1]]))[:, None]
+    return np.concatenate(([0], chosen, [size - 1]))
+
+
+def minmax(y: np.ndarray, n: int) -> np.ndarray:
+    """Indices of the min and max of n // 2 equal-count buckets (sorted, unique)."""
+    size = len(y)
+    if n >= size or n < 4:
+        return np.arange(size)
+    y = np.asarray(y, dtype=np.float64)
+    buckets = n // 2
+    edges = np.linspace(0, size, buckets + 1).astype(np.int64)
+    idx = _bucket_matrix(edges[:-1], edges[1:])
+    values = y[idx]
+    finite = ~np.isnan(values)
+    rows = np.arange(buckets)
+    lo = idx[rows, np.argmin(np.where(finite, values, np.inf), axis=1)]
+    hi = idx[rows, np.argmax(np.where(finite, values, -np.inf), axis=1)]
+    return np.unique(np.concatenate(([0], lo, hi, [size - 1])))
+
+
+def decimate(x: np.ndarray, y: np.ndarray, n: int, method: str = "lttb") -> np.ndarray:
+    """Indices of about n representative points of (x, y)."""
+    if method == "lttb":
+        return lttb(x, y, n)
+    if method == "minmax":
+        return minmax(y, n)
+    raise ValueError(f"Unknown decimation method {method!r}; expected one of {METHODS}")
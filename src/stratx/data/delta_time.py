@@ -0,0 +1,134 @@
+"""
+Distance-aligned delta time between drivers.
+
+Comparing drivers sample by sample in time is meaningless (they are at
+different places on track); comparisons have to be made at the same
+distance. For each driver:
+
+  1. speed (km/h) from /car_data is integrated over time (trapezoids, one
+     cumsum) into distance travelled;
+  2. every lap is rescaled to the reference lap length, so small
+     integration and racing-line differences do not accumulate into a
+     drift between drivers, and laps are laid end to end: lap k covers
+     [k * L, (k + 1) * L) of a common distance axis;
+  3. elapsed time and speed are interpolated onto a shared distance grid
+     (np.interp over the whole range at once).
+
+The delta of a driver is its elapsed time minus the reference driver's at
+the same distance: positive means behind. All steps are whole-array NumPy
+operations; the only Python loop is over drivers.
+"""
+import numpy as np
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from stratx.data.timeutils import to_epoch_ns
+
+NS = 1e9
+
+
+class LapTrace:
+    """One driver's laps on the common distance axis: cumulative distance, elapsed time and speed per sample."""
+
+    def __init__(self, distance: np.ndarray, elapsed: np.ndarray, speed: np.ndarray, lap_lengths: np.ndarray):
+        self.distance = distance
+        self.elapsed = elapsed
+        self.speed = speed
+        self.lap_lengths = lap_lengths
+
+
+def integrate_distance(dates_ns: np.ndarray, speed_kmh: np.ndarray) -> np.ndarray:
+    """Distance in meters travelled since the first sample (trapezoidal rule)."""
+    if len(dates_ns) < 2:
+        return np.zeros(len(dates_ns))
+    dt = np.diff(dates_ns) / NS
+    v = np.nan_to_num(np.asarray(speed_kmh, dtype=np.float64), nan=0.0) / 3.6
+    return np.concatenate(([0.0], np.cumsum(0.5 * (v[1:] + v[:-1]) * dt)))
+
+
+def lap_trace(dates_ns: np.ndarray, speed_kmh: np.ndarray, lap_bounds_ns: np.ndarray,
+              lap_length: Optional[float] = None) -> LapTrace:
+    """
+    Samples of consecutive laps on a distance axis starting at 0.
+    lap_bounds_ns: [laps + 1] epoch-ns boundaries (start of each lap, then
+    the end of the last). Each lap is rescaled to lap_length meters (default:
+    the median integrated lap length of this driver).
+    """
+    dates_ns = np.asarray(dates_ns, dtype=np.int64)
+    bounds = np.asarray(lap_bounds_ns, dtype=np.int64)
+    inside = (dates_ns >= bounds[0]) & (dates_ns <= bounds[-1])
+    dates_ns, speed = dates_ns[inside], np.asarray(speed_kmh, dtype=np.float64)[inside]
+    if len(dates_ns) < 2:
+        return LapTrace(np.zeros(0), np.zeros(0), np.zeros(0), np.zeros(len(bounds) - 1))
+
+    distance = integrate_distance(dates_ns, speed)
+    # Raw distance at every lap boundary, then each sample's lap and position within it
+    at_bounds = np.interp(bounds, dates_ns, distance)
+    lengths = np.diff(at_bounds)
+    if lap_length is None:
+        lap_length = float(np.median(lengths[lengths > 0])) if (lengths > 0).any() else 1.0
+    lap = np.clip(np.searchsorted(bounds, dates_ns, side="right") - 1, 0, len(lengths) - 1)
+    fraction = (distance - at_bounds[lap]) / np.where(lengths > 0, lengths, 1.0)[lap]
+    common = (lap + np.clip(fraction, 0.0, 1.0)) * lap_length
+
+    elapsed = (dates_ns - bounds[0]) / NS
+    # Anchor the lap boundaries exactly (the first and last sample rarely fall on them)
+    common = np.concatenate(([0.0], common, [len(lengths) * lap_length]))
+    elapsed = np.concatenate(([0.0], elapsed, [(bounds[-1] - bounds[0]) / NS]))
+    speed = np.concatenate((speed[:1], speed, speed[-1:]))
+    # Keep the distance axis monotonic for interpolation (standstill samples share a distance)
+    common = np.maximum.accumulate(common)
+    return LapTrace(common, elapsed, speed, lengths)
+
+
+def compare(traces: Dict[Any, Tuple[np.ndarray, np.ndarray, np.ndarray]], reference: Any,
+            points: int = 2000) -> Dict[str, Any]:
+    """
+    traces: driver -> (car_data dates ns, speed km/h, lap boundaries ns), all
+    over the same laps. Returns the common distance grid and, per driver,
+    elapsed time, delta to `reference` and speed on that grid.
+    """
+    ref_dates, ref_speed, ref_bounds = traces[reference]
+    ref = lap_trace(ref_dates, ref_speed, ref_bounds)
+    laps = len(ref_bounds) - 1
+    lap_length = float(ref.distance[-1] / laps) if len(ref.distance) and laps else 0.0
+    grid = np.linspace(0.0, lap_length * laps, points) if lap_length > 0 else np.zeros(0)
+
+    drivers: List[Dict[str, Any]] = []
+    ref_time = np.interp(grid, ref.distance, ref.elapsed) if len(grid) else grid
+    for driver, (dates, speed, bounds) in traces.items():
+        trace = ref if driver == reference else lap_trace(dates, speed, bounds, lap_length or None)
+        if len(trace.distance) < 2 or not len(grid):
+            drivers.append({"driver": driver, "available": False})
+            continue
+        time = np.interp(grid, trace.distance, trace.elapsed)
+        drivers.append({
+            "driver": driver,
+            "available": True,
+            "time": np.round(time, 3).tolist(),
+            "delta": np.round(time - ref_time, 3).tolist(),
+            "speed": np.round(np.interp(grid, trace.distance, trace.speed), 1).tolist(),
+            # Integrated length of each lap before rescaling (a sanity check on the data)
+            "lap_lengths": np.round(trace.lap_lengths, 1).tolist(),
+        })
+    return {"reference": reference, "lap_length": round(lap_length, 1), "distance": np.round(grid, 1).tolist(),
+            "drivers": drivers}
+
+
+def lap_bounds(laps: Sequence[Dict[str, Any]], lap_start: int, lap_end: int) -> Optional[np.ndarray]:
+    """
+    Boundaries of laps lap_start..lap_end from OpenF1 /laps rows (date_start,
+    lap_duration), or None if any lap in the range is missing.
+    """
+    by_number = {l['lap_number']: l for l in laps if l.get('lap_number') is not None and l.get('date_start')}
+    numbers = range(lap_start, lap_end + 1)
+    if any(n not in by_number for n in numbers):
+        return None
+    starts = to_epoch_ns([by_number[n]['date_start'] for n in numbers])
+    following = by_number.get(lap_end + 1)
+    if following is not None:
+        end = int(to_epoch_ns([following['date_start']])[0])
+    elif by_number[lap_end].get('lap_duration'):
+        end = int(starts[-1] + by_number[lap_end]['lap_duration'] * NS)
+    else:
+        return None
+    return np.append(starts, end).astype(np.int64)
@@ -0,0 +1,19 @@
+import json
+import os
+import tempfile
+from typing import Any, Optional
+
+
+def write_json_atomic(path: str, data: Any, indent: Optional[int] = 2):
+    """Write JSON via a temp file + rename, so readers never see a partial file."""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=".tmp-", suffix=".json", dir=directory)
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f, indent=indent)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
@@ -0,0 +1,126 @@
+"""
+Vectorized DataFrame -> JSON record serialization for results and standings.
+
+Each output field is described once as (key, source, kind, default) and built
+column by column: numeric coercion and NA handling happen on whole columns,
+and rows are assembled with a single zip at the end instead of iterrows().
+
+source is a column name (missing columns yield the default) or a callable
+taking the DataFrame and returning a Series. kind is one of:
+  int, float   numeric coercion (strings like "3" included); NA -> default
+  str          str() of each value (Timedeltas format like str(Timedelta)); NA -> default
+  raw          value as-is; NA -> default
+"""
+import numpy as np
+import pandas as pd
+from typing import Any, Callable, Dict, List, Sequence, Tuple, Union
+
+Source = Union[str, Callable[[pd.DataFrame], pd.Series]]
+Field = Tuple[str, Source, str, Any]
+
+
+def column_values(series: pd.Series, kind: str, default: Any = None) -> List[Any]:
+    """Convert one column to a list of JSON-ready Python values."""
+    if kind in ("int", "float"):
+        if series.dtype.kind in "biuf":
+            numeric = series.to_numpy(dtype=np.float64, na_value=np.nan)
+        else:
+            numeric = pd.to_numeric(series, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+        missing = np.isnan(numeric)
+        if kind == "int":
+            values = np.where(missing, 0, numeric).astype(np.int64).tolist()
+        else:
+            values = numeric.tolist()
+    elif kind == "str":
+        missing = pd.isna(series.to_numpy())
+        if series.dtype.kind == "m":
+            values = series.astype(str).tolist()  # pandas Timedelta formatting
+        else:
+            values = series.to_numpy(dtype=object).astype(str).tolist()
+    elif kind == "raw":
+        array = series.to_numpy(dtype=object)
+        missing = pd.isna(array)
+        values = array.tolist()
+    else:
+        raise ValueError(f"Unknown field kind '{kind}'")
+
+    if missing.any():
+        for i in np.flatnonzero(missing).tolist():
+            values[i] = default
+    return values
+
+
+def to_records(df: pd.DataFrame, fields: Sequence[Field]) -> List[Dict[str, Any]]:
+    """Serialize a DataFrame to a list of dicts described by `fields`."""
+    n = len(df)
+    keys = []
+    columns = []
+    for key, source, kind, default in fields:
+        keys.append(key)
+        if callable(source):
+            columns.append(column_values(source(df), kind, default))
+        elif source in df.columns:
+            columns.append(column_values(df[source], kind, default))
+        else:
+            columns.append([default] * n)
+    return [dict(zip(keys, values)) for values in zip(*columns)]
+
+
+def full_name(df: pd.DataFrame) -> pd.Series:
+    """'Given Family' from Ergast name columns."""
+    return df["givenName"].astype(str) + " " + df["familyName"].astype(str)
+
+
+def standings_team(df: pd.DataFrame) -> pd.Series:
+    """Team of a driver standings row (Ergast returns a list of constructors)."""
+    if "constructorName" in df.columns:
+        return df["constructorName"]
+    if "constructorNames" in df.columns:
+        return df["constructorNames"].map(
+            lambda val: val[0] if isinstance(val, list) and len(val) > 0 else str(val))
+    return pd.Series(["Unknown"] * len(df), index=df.index)
+
+
+# FastF1 Session.results -> race classification (API and static 2025 data)
+FASTF1_RESULT_FIELDS: List[Field] = [
+    ("position", "Position", "int", None),
+    ("driver", "Abbreviation", "raw", None),
+    ("driver_number", "DriverNumber", "int", None),
+    ("team", "TeamName", "raw", None),
+    ("time", "Time", "str", "DNF"),
+    ("points", "Points", "int", 0),
+    ("status", "Status", "raw", "Finished"),
+    ("grid_position", "GridPosition", "int", None),
+]
+
+# Ergast race results -> historical race detail
+ERGAST_RESULT_FIELDS: List[Field] = [
+    ("position", "position", "int", 0),
+    ("driver", full_name, "str", ""),
+    ("team", "constructorName", "raw", "Unknown"),
+    ("time", "status", "raw", "Finished"),  # Ergast results carry no usable time
+    ("points", "points", "float", 0.0),
+    ("status", "status", "raw", "Finished"),
+]
+
+# Ergast driver standings
+DRIVER_STANDINGS_FIELDS: List[Field] = [
+    ("position", "position", "int", 0),
+    ("driver", full_name, "str", ""),
+    ("team", standings_team, "raw", "Unknown"),
+    ("points", "points", "float", 0.0),
+    ("wins", "wins", "int", 0),
+]
+
+# Ergast constructor standings
+CONSTRUCTOR_STANDINGS_FIELDS: List[Field] = [
+    ("position", "position", "int", 0),
+    ("constructor", "constructorName", "raw", "Unknown"),
+    ("points", "points", "float", 0.0),
+    ("wins", "wins", "int", 0),
+]
+
+
+def race_results_records(results: pd.DataFrame) -> List[Dict[str, Any]]:
+    """FastF1 Session.results as the API's race classification."""
+    return to_records(results, FASTF1_RESULT_FIELDS)
@@ -0,0 +1,228 @@
+import asyncio
+import logging
+from collections import OrderedDict
+from datetime import timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from stratx.data.openf1_client import AsyncOpenF1Client
+from stratx.data.session_store import SCHEMAS, SessionStore
+from stratx.data.timeutils import parse_openf1_date, format_openf1_date
+
+StreamKey = Tuple[str, Optional[int]]
+
+class IncrementalFetcher:
+    """
+    Stateful "since last timestamp" poller for the high-volume OpenF1 endpoints.
+
+    For every (session_key, driver_number, endpoint) it remembers the newest
+    `date` (or `lap_number` for /laps) already seen and only asks OpenF1 for
+    rows past that cursor, appending them to a per-session in-memory buffer.
+    Per-poll bandwidth and JSON decode cost therefore stay roughly constant
+    instead of growing with the length of the session.
+
+    If a SessionStore is attached, /car_data and /position rows are kept there
+    as NumPy columns instead of in the list-of-dicts buffer.
+    """
+
+    # Endpoint -> cursor field
+    CURSOR_FIELDS: Dict[str, str] = {
+        "/car_data": "date",
+        "/position": "date",
+        "/intervals": "date",
+        "/laps": "lap_number",
+        "/race_control": "date",
+    }
+
+    def __init__(self, client: AsyncOpenF1Client, overlap_seconds: float = 2.0, max_sessions: int = 8,
+                 store: Optional[SessionStore] = None):
+        """
+        overlap_seconds re-requests a short window before the date cursor so rows
+        that reach OpenF1 late (common on the all-driver /intervals feed) are not
+        missed; the overlap is de-duplicated before appending.
+        """
+        self.logger = logging.getLogger(__name__)
+        self.client = client
+        self.store = store
+        self.overlap = timedelta(seconds=overlap_seconds)
+        self.max_sessions = max_sessions
+        # session_key -> (endpoint, driver_number) -> rows
+        self._buffers: "OrderedDict[int, Dict[StreamKey, List[Dict[str, Any]]]]" = OrderedDict()
+        self._cursors: Dict[Tuple[int, Optional[int], str], Any] = {}
+        self._locks: Dict[Tuple[int, Optional[int], str], asyncio.Lock] = {}
+
+    async def poll(self, endpoint: str, session_key: int,
+                   driver_number: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Fetch rows newer than the stored cursor and append them to the buffer.
+        Returns only the new (or, for /laps, updated) rows.
+        """
+        if endpoint not in self.CURSOR_FIELDS:
+            raise ValueError(f"Incremental polling is not supported for {endpoint}")
+
+        stream = (session_key, driver_number, endpoint)
+        lock = self._locks.setdefault(stream, asyncio.Lock())
+        async with lock:
+            params: Dict[str, Any] = {"session_key": session_key}
+            if driver_number:
+                params["driver_number"] = driver_number
+            params.update(self._cursor_filter(endpoint, self._cursors.get(stream)))
+
+            rows = await self.client.fetch(endpoint, params)
+            if not rows:
+                return []
+
+            if self._is_columnar(endpoint):
+                # The store de-duplicates the overlap window itself. Converting a large
+                # payload to columns takes a while, so it runs off the event loop.
+                self._touch(session_key)
+                await asyncio.get_running_loop().run_in_executor(
+                    None, self.store.ingest, endpoint, session_key, rows)
+                cursor = self._cursors.get(stream) or ""
+                new_rows = [r for r in rows if (r.get("date") or "") > cursor]
+                if new_rows:
+                    self._cursors[stream] = max(r["date"] for r in new_rows)
+                return new_rows
+
+            buffer = self._buffer(session_key, endpoint, driver_number)
+            if endpoint == "/laps":
+                new_rows = self._merge_laps(buffer, rows)
+                self._cursors[stream] = self._lap_cursor(buffer)
+            else:
+                new_rows = self._append_dated(buffer, rows, self._cursors.get(stream))
+                if buffer:
+                    self._cursors[stream] = max(self._cursors.get(stream) or "", buffer[-1]["date"])
+            return new_rows
+
+    def cursor(self, endpoint: str, session_key: int, driver_number: Optional[int] = None) -> Any:
+        """The stream's cursor, or None if it has not been polled (or seeded) yet."""
+        return self._cursors.get((session_key, driver_number, endpoint))
+
+    def seed_cursor(self, endpoint: str, session_key: int, cursor: Any,
+                    driver_number: Optional[int] = None) -> bool:
+        """
+        Start a stream at `cursor` (a date, or a lap number for /laps) instead of
+        the beginning of the session. No-op, returning False, once it has a cursor.
+        """
+        stream = (session_key, driver_number, endpoint)
+        if self._cursors.get(stream) is not None:
+            return False
+        self._cursors[stream] = cursor
+        return True
+
+    def rows(self, endpoint: str, session_key: int, driver_number: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Everything buffered so far for a stream (oldest first)."""
+        if self._is_columnar(endpoint):
+            # Materialized from the columns; prefer store.window on hot paths
+            return self.store.records(endpoint, session_key, driver_number)
+        return self._buffers.get(session_key, {}).get((endpoint, driver_number), [])
+
+    async def get_car_data(self, session_key: int, driver_number: Optional[int] = None) -> List[Dict[str, Any]]:
+        await self.poll("/car_data", session_key, driver_number)
+        return self.rows("/car_data", session_key, driver_number)
+
+    async def get_position(self, session_key: int, driver_number: Optional[int] = None) -> List[Dict[str, Any]]:
+        await self.poll("/position", session_key, driver_number)
+        return self.rows("/position", session_key, driver_number)
+
+    async def get_laps(self, session_key: int, driver_number: Optional[int] = None) -> List[Dict[str, Any]]:
+        await self.poll("/laps", session_key, driver_number)
+        return self.rows("/laps", session_key, driver_number)
+
+    async def get_intervals(self, session_key: int) -> List[Dict[str, Any]]:
+        await self.poll("/intervals", session_key)
+        return self.rows("/intervals", session_key)
+
+    def drop_session(self, session_key: int):
+        """Forget all buffers and cursors of a session."""
+        self._buffers.pop(session_key, None)
+        if self.store is not None:
+            self.store.drop_session(session_key)
+        for stream in [s for s in self._cursors if s[0] == session_key]:
+            self._cursors.pop(stream, None)
+            self._locks.pop(stream, None)
+
+    def _is_columnar(self, endpoint: str) -> bool:
+        return self.store is not None and endpoint in SCHEMAS
+
+    def _touch(self, session_key: int) -> Dict[StreamKey, List[Dict[str, Any]]]:
+        """Mark a session as recently used, evicting the oldest past max_sessions."""
+        streams = self._buffers.get(session_key)
+        if streams is None:
+            streams = self._buffers[session_key] = {}
+            while len(self._buffers) > self.max_sessions:
+                oldest = next(iter(self._buffers))
+                self.logger.info(f"Dropping incremental buffers for session {oldest}")
+                self.drop_session(oldest)
+        self._buffers.move_to_end(session_key)
+        return streams
+
+    def _buffer(self, session_key: int, endpoint: str, driver_number: Optional[int]) -> List[Dict[str, Any]]:
+        return self._touch(session_key).setdefault((endpoint, driver_number), [])
+
+    def _cursor_filter(self, endpoint: str, cursor: Any) -> Dict[str, Any]:
+        if cursor is None:
+            return {}
+        if endpoint == "/laps":
+            # Re-request the open lap(s): lap_duration is filled in once the lap completes
+            return {"lap_number>=": cursor}
+        since = parse_openf1_date(cursor)
+        if since is None:
+            return {}
+        return {"date>": format_openf1_date(since - self.overlap)}
+
+    def _append_dated(self, buffer: List[Dict[str, Any]], rows: List[Dict[str, Any]],
+                      cursor: Optional[str]) -> List[Dict[str, Any]]:
+        rows = sorted(rows, key=lambda r: r.get("date") or "")
+        if cursor is not None and buffer:
+            # Drop rows from the overlap window that are already buffered
+            since = parse_openf1_date(cursor) - self.overlap
+            seen = set()
+            for row in reversed(buffer):
+                row_date = parse_openf1_date(row.get("date"))
+                if row_date is None or row_date <= since:
+                    break
+                seen.add((row.get("driver_number"), row.get("date")))
+            rows = [r for r in rows if (r.get("driver_number"), r.get("date")) not in seen]
+
+        new_rows = [r for r in rows if r.get("date")]
+        if new_rows and buffer and new_rows[0]["date"] < buffer[-1]["date"]:
+            # Late rows from the overlap window: re-sort only the tail they belong to
+            start = len(buffer)
+            while start > 0 and buffer[start - 1]["date"] > new_rows[0]["date"]:
+                start -= 1
+            buffer[start:] = sorted(buffer[start:] + new_rows, key=lambda r: r["date"])
+        else:
+            buffer.extend(new_rows)
+        return new_rows
+
+    def _merge_laps(self, buffer: List[Dict[str, Any]], rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        index = {(lap.get("driver_number"), lap.get("lap_number")): i for i, lap in enumerate(buffer)}
+        changed = []
+        for row in rows:
+            key = (row.get("driver_number"), row.get("lap_number"))
+            i = index.get(key)
+            if i is None:
+                index[key] = len(buffer)
+                buffer.append(row)
+                changed.append(row)
+            elif buffer[i] != row:
+                buffer[i] = row
+                changed.append(row)
+        if changed:
+            buffer.sort(key=lambda lap: (lap.get("lap_number") or 0, lap.get("driver_number") or 0))
+        return changed
+
+    @staticmethod
+    def _lap_cursor(buffer: List[Dict[str, Any]]) -> Optional[int]:
+        """
+        Lowest of each driver's latest lap, so every driver's open lap is refreshed
+        (lapped cars trail the leader on an all-driver stream).
+        """
+        latest: Dict[Any, int] = {}
+        for lap in buffer:
+            lap_number = lap.get("lap_number")
+            if lap_number is None:
+                continue
+            driver = lap.get("driver_number")
+            latest[driver] = max(latest.get(driver, lap_number), lap_number)
+        return min(latest.values()) if latest else None
@@ -1,29 +1,103 @@
+import asyncio
+import threading
 import requests
-import pandas as pd
+import httpx
 import logging
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Sequence, Tuple
+from urllib.parse import quote
+
+from stratx.data.response_cache import FILTER_OPERATORS, ResponseCache, CacheKey
+from stratx.metrics import upstream_call
+
+# Async responses larger than this are JSON-decoded in a worker thread
+DECODE_OFF_LOOP_BYTES = 256 * 1024
+
+def build_query(params: Optional[Dict[str, Any]]) -> str:
+    """
+    Encode request params as an OpenF1 query string.
+    Keys ending in a comparison operator become filters (e.g. "date>2023-09-16T13:03:35")
+    instead of "key=value" pairs, matching OpenF1's filter syntax.
+    """
+    parts = []
+    for key, value in (params or {}).items():
+        key = str(key)
+        value = quote(str(value), safe=":")
+        operator = next((op for op in FILTER_OPERATORS if key.endswith(op)), None)
+        if operator:
+            parts.append(f"{quote(key[:-len(operator)])}{operator}{value}")
+        else:
+            parts.append(f"{quote(key)}={value}")
+    return "&".join(parts)
+
+def _with_query(endpoint: str, params: Optional[Dict[str, Any]]) -> str:
+    query = build_query(params)
+    return f"{endpoint}?{query}" if query else endpoint
 
 class OpenF1Client:
     """
     Client for interacting with the OpenF1 API to fetch live and historical Formula 1 data.
+    Responses are served from a shared ResponseCache; concurrent callers asking
+    for the same (endpoint, params) share a single upstream request.
     """
     BASE_URL = "https://api.openf1.org/v1"
 
-    def __init__(self):
+    def __init__(self, base_url: Optional[str] = None, timeout: float = 10.0,
+                 cache: Optional[ResponseCache] = None):
         self.logger = logging.getLogger(__name__)
+        self.base_url = base_url or self.BASE_URL
+        self.timeout = timeout
+        self.cache = cache if cache is not None else ResponseCache()
+        # A single Session keeps TCP/TLS connections alive between calls
+        self.session = requests.Session()
+        self._inflight: Dict[CacheKey, threading.Lock] = {}
+        self._inflight_lock = threading.Lock()
 
     def _fetch(self, endpoint: str, params: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
         """
         Internal method to handle API requests.
         """
+        key = self.cache.make_key(endpoint, params)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        session_key = self.cache.session_key_of(params)
+        if endpoint != "/sessions" and self.cache.needs_session_check(session_key):
+            # Learn whether the session is over so its data can be pinned
+            self.get_session(session_key)
+
+        with self._inflight_lock:
+            lock = self._inflight.setdefault(key, threading.Lock())
+        with lock:
+            # Another thread may have fetched it while we waited
+            cached = self.cache.get(key, record=False)
+            if cached is not None:
+                self.cache.record_coalesced()
+                return cached
+            try:
+                return self._request(key, endpoint, params)
+            finally:
+                with self._inflight_lock:
+                    self._inflight.pop(key, None)
+
+    def _request(self, key: CacheKey, endpoint: str, params: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
         try:
-            url = f"{self.BASE_URL}{endpoint}"
-            response = requests.get(url, params=params)
-            response.raise_for_status()
-            return response.json()
+            url = f"{self.base_url}{_with_query(endpoint, params)}"
+            with upstream_call("openf1", endpoint):
+                response = self.session.get(url, timeout=self.timeout)
+                response.raise_for_status()
+            data = response.json()
         except Exception as e:
             self.logger.error(f"Error fetching {endpoint}: {e}")
             return []
+        if endpoint == "/sessions":
+            self.cache.observe_sessions(data)
+        self.cache.set(key, data, self.cache.session_key_of(params), size=len(response.content))
+        return data
+
+    def close(self):
+        """Release pooled connections."""
+        self.session.close()
 
     def get_session(self, session_key: int) -> List[Dict[str, Any]]:
         """Get detailed information about a specific session."""
@@ -31,7 +105,7 @@ class OpenF1Client:
 
     def get_car_data(self, session_key: int, driver_number: Optional[int] = None) -> List[Dict[str, Any]]:
         """
-        Get car telemetry data (speed, rpm, gear, etc). 
+        Get car telemetry data (speed, rpm, gear, etc).
         Use mostly for historical/replay since live data volume is high.
         """
         params = {"session_key": session_key}
@@ -52,19 +126,26 @@ class OpenF1Client:
         if driver_number:
             params["driver_number"] = driver_number
         return self._fetch("/position", params)
-    
+
     def get_intervals(self, session_key: int) -> List[Dict[str, Any]]:
         """Get live intervals (gaps) between drivers."""
         return self._fetch("/intervals", {"session_key": session_key})
-    
+
     def get_pit_stops(self, session_key: int) -> List[Dict[str, Any]]:
         """Get pit stop information."""
         return self._fetch("/pit", {"session_key": session_key})
 
+    def get_stints(self, session_key: int, driver_number: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Get stints (compound, start/end lap, tyre age at start)."""
+        params = {"session_key": session_key}
+        if driver_number:
+            params["driver_number"] = driver_number
+        return self._fetch("/stints", params)
+
     def get_weather(self, session_key: int) -> List[Dict[str, Any]]:
         """Get weather data for the session."""
         return self._fetch("/weather", {"session_key": session_key})
-    
+
     def get_race_control(self, session_key: int) -> List[Dict[str, Any]]:
         """Get race control messages (Flags, Safety Car, etc.)."""
         return self._fetch("/race_control", {"session_key": session_key})
@@ -77,14 +158,197 @@ class OpenF1Client:
         meetings = self._fetch("/meetings")
         if not meetings:
             return None
-        
-        # Sort by date descending
-        meetings.sort(key=lambda x: x['date_start'], reverse=True)
+
+        # Sort by date descending (sorted copy: the payload is shared via the cache)
+        meetings = sorted(meetings, key=lambda x: x['date_start'], reverse=True)
         latest_meeting_key = meetings[0]['meeting_key']
-        
+
         sessions = self._fetch("/sessions", {"meeting_key": latest_meeting_key})
         if not sessions:
             return None
-            
-        sessions.sort(key=lambda x: x['date_start'], reverse=True)
+
+        sessions = sorted(sessions, key=lambda x: x['date_start'], reverse=True)
+        return sessions[0]['session_key']
+
+
+class AsyncOpenF1Client:
+    """
+    Asynchronous OpenF1 client for use inside the FastAPI event loop.
+    Requests share a pooled httpx.AsyncClient (keep-alive connections) and
+    independent requests can be fanned out concurrently with fetch_many,
+    bounded by max_concurrency in-flight requests. Caching and request
+    coalescing behave exactly as in OpenF1Client.
+    """
+    BASE_URL = OpenF1Client.BASE_URL
+
+    def __init__(self, base_url: Optional[str] = None, max_concurrency: int = 8,
+                 max_connections: int = 20, timeout: float = 10.0,
+                 cache: Optional[ResponseCache] = None):
+        self.logger = logging.getLogger(__name__)
+        self.base_url = base_url or self.BASE_URL
+        self.max_concurrency = max_concurrency
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.cache = cache if cache is not None else ResponseCache()
+        # Created lazily so they bind to the running event loop
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._inflight: Dict[CacheKey, "asyncio.Future[List[Dict[str, Any]]]"] = {}
+
+    def _get_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            # First use, or the previous event loop is gone (e.g. test clients, reloads)
+            self._loop = loop
+            self._inflight = {}
+            limits = httpx.Limits(max_connections=self.max_connections,
+                                  max_keepalive_connections=self.max_connections)
+            self._client = httpx.AsyncClient(base_url=self.base_url, limits=limits, timeout=self.timeout)
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._client
+
+    async def aclose(self):
+        """Close the underlying connection pool."""
+        if self._client is not None:
+            if self._loop is asyncio.get_running_loop():
+                await self._client.aclose()
+            # else its loop is gone, and its connections with it
+            self._client = None
+            self._semaphore = None
+            self._loop = None
+
+    async def _fetch(self, endpoint: str, params: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """
+        Internal method to handle API requests.
+        Mirrors OpenF1Client._fetch: errors are logged and an empty list is returned.
+        """
+        key = self.cache.make_key(endpoint, params)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        self._get_client()
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self.cache.record_coalesced()
+        else:
+            pending = asyncio.ensure_future(self._request(key, endpoint, params))
+            self._inflight[key] = pending
+            pending.add_done_callback(lambda _: self._inflight.pop(key, None))
+
+        session_key = self.cache.session_key_of(params)
+        if endpoint != "/sessions" and self.cache.needs_session_check(session_key):
+            # Learn whether the session is over (in parallel) so its data can be pinned
+            await self.get_session(session_key)
+
+        # Shielded so one cancelled waiter doesn't cancel the fetch for the others
+        return await asyncio.shield(pending)
+
+    async def _request(self, key: CacheKey, endpoint: str, params: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        client = self._get_client()
+        try:
+            async with self._semaphore:
+                # Timed inside the semaphore: upstream latency, not local queueing
+                with upstream_call("openf1", endpoint):
+                    response = await client.get(_with_query(endpoint, params))
+                    response.raise_for_status()
+            if len(response.content) > DECODE_OFF_LOOP_BYTES:
+                # e.g. a whole session of /car_data: don't stall the event loop decoding it
+                data = await asyncio.get_running_loop().run_in_executor(None, response.json)
+            else:
+                data = response.json()
+        except Exception as e:
+            self.logger.error(f"Error fetching {endpoint}: {e}")
+            return []
+        if endpoint == "/sessions":
+            self.cache.observe_sessions(data)
+        self.cache.set(key, data, self.cache.session_key_of(params), size=len(response.content))
+        return data
+
+    async def fetch(self, endpoint: str, params: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Fetch any endpoint with arbitrary params, including comparison filters."""
+        return await self._fetch(endpoint, params)
+
+    async def fetch_many(self, calls: Sequence[Tuple[str, Optional[Dict[str, Any]]]]) -> List[List[Dict[str, Any]]]:
+        """
+        Fetch several (endpoint, params) pairs concurrently.
+        Results are returned in the same order as the calls.
+        """
+        return await asyncio.gather(*(self._fetch(endpoint, params) for endpoint, params in calls))
+
+    async def get_session(self, session_key: int) -> List[Dict[str, Any]]:
+        """Get detailed information about a specific session."""
+        return await self._fetch("/sessions", {"session_key": session_key})
+
+    async def get_car_data(self, session_key: int, driver_number: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Get car telemetry data (speed, rpm, gear, etc)."""
+        params = {"session_key": session_key}
+        if driver_number:
+            params["driver_number"] = driver_number
+        return await self._fetch("/car_data", params)
+
+    async def get_laps(self, session_key: int, driver_number: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Get lap timing data."""
+        params = {"session_key": session_key}
+        if driver_number:
+            params["driver_number"] = driver_number
+        return await self._fetch("/laps", params)
+
+    async def get_position(self, session_key: int, driver_number: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Get car position on track (X, Y, Z, Date)."""
+        params = {"session_key": session_key}
+        if driver_number:
+            params["driver_number"] = driver_number
+        return await self._fetch("/position", params)
+
+    async def get_intervals(self, session_key: int) -> List[Dict[str, Any]]:
+        """Get live intervals (gaps) between drivers."""
+        return await self._fetch("/intervals", {"session_key": session_key})
+
+    async def get_pit_stops(self, session_key: int) -> List[Dict[str, Any]]:
+        """Get pit stop information."""
+        return await self._fetch("/pit", {"session_key": session_key})
+
+    async def get_stints(self, session_key: int, driver_number: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Get stints (compound, start/end lap, tyre age at start)."""
+        params = {"session_key": session_key}
+        if driver_number:
+            params["driver_number"] = driver_number
+        return await self._fetch("/stints", params)
+
+    async def get_weather(self, session_key: int) -> List[Dict[str, Any]]:
+        """Get weather data for the session."""
+        return await self._fetch("/weather", {"session_key": session_key})
+
+    async def get_race_control(self, session_key: int) -> List[Dict[str, Any]]:
+        """Get race control messages (Flags, Safety Car, etc.)."""
+        return await self._fetch("/race_control", {"session_key": session_key})
+
+    async def get_active_session_key(self) -> Optional[int]:
+        """
+        Attempt to find the currently active session.
+        If no session is live, returns the most recent one.
+
+        The meeting list and the sessions of the latest meeting are requested
+        concurrently; a second round trip is only made if OpenF1's notion of
+        the latest meeting disagrees with the meeting list.
+        """
+        meetings, sessions = await self.fetch_many([
+            ("/meetings", None),
+            ("/sessions", {"meeting_key": "latest"}),
+        ])
+        if not meetings:
+            return None
+
+        # Sort by date descending (sorted copy: the payload is shared via the cache)
+        meetings = sorted(meetings, key=lambda x: x['date_start'], reverse=True)
+        latest_meeting_key = meetings[0]['meeting_key']
+
+        if not sessions or sessions[0].get('meeting_key') != latest_meeting_key:
+            sessions = await self._fetch("/sessions", {"meeting_key": latest_meeting_key})
+        if not sessions:
+            return None
+
+        sessions = sorted(sessions, key=lambda x: x['date_start'], reverse=True)
         return sessions[0]['session_key']
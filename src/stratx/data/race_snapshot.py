@@ -0,0 +1,199 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+import numpy as np
+from typing import Any, Dict, List, Optional, Tuple
+
+# Bumped whenever the snapshot layout changes; older snapshots are ignored
+SNAPSHOT_VERSION = 2
+# Snapshots older than this are rebuilt through FastF1 (late classification changes, penalties)
+DEFAULT_MAX_AGE = 7 * 24 * 3600.0
+
+RaceData = Tuple[Dict[str, Any], Dict[str, Dict[str, Any]]]
+
+# results payload field -> dtype (strings are sized per file). Any of them may be
+# None: bit i of the extra "nulls" field marks field i as None in that row.
+RESULT_FIELDS = [
+    ("position", np.int16),
+    ("driver", str),
+    ("driver_number", np.int16),
+    ("team", str),
+    ("time", str),
+    ("points", np.int32),
+    ("status", str),
+    ("grid_position", np.int16),
+]
+
+LAP_DTYPE = np.dtype([("lap_number", np.int16), ("lap_time", np.float64)])
+
+# Per-driver performance fields kept in meta.json (the lap arrays live in laps.npy)
+SUMMARY_FIELDS = ["driver_number", "fastest_lap", "average_lap", "total_laps", "stints", "finish_position"]
+
+
+def source_fingerprint(source_dir: Optional[str]) -> Optional[str]:
+    """
+    Fingerprint of the FastF1 cache files a round was built from (names, sizes,
+    mtimes). None if the directory is unknown or gone.
+    """
+    if not source_dir or not os.path.isdir(source_dir):
+        return None
+    digest = hashlib.sha256()
+    for name in sorted(os.listdir(source_dir)):
+        stat = os.stat(os.path.join(source_dir, name))
+        digest.update(f"{name}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+    return digest.hexdigest()
+
+
+class RaceSnapshotStore:
+    """
+    Versioned on-disk snapshot of processed race data, one directory per round:
+
+      <root>/v<SNAPSHOT_VERSION>/<season>/<round>/
+        results.npy   structured array of the classification
+        laps.npy      lap_number / lap_time (s) for every driver, grouped by driver
+        meta.json     event info, per-driver summaries and laps.npy offsets
+
+    load() memory-maps the .npy files, so a restart costs a few file opens per
+    round and several server processes share the same pages. A round is stale
+    (and load() returns None) when:
+      - it was written by a different `payload_version` (the code that builds
+        the race payload changed; callers bump it),
+      - it is older than `max_age` seconds (as stored in the snapshot, or the
+        store's own, whichever is lower), or
+      - the FastF1 cache files it was built from have changed since. A wiped
+        FastF1 cache alone does not invalidate it: the age limit still does.
+    """
+
+    def __init__(self, root: str, payload_version: int = 1, max_age: float = DEFAULT_MAX_AGE,
+                 clock=time.time):
+        self.root = root
+        self.payload_version = payload_version
+        self.max_age = max_age
+        self._clock = clock
+
+    def path(self, season: int, round_number: int) -> str:
+        return os.path.join(self.root, f"v{SNAPSHOT_VERSION}", str(season), f"{round_number:02d}")
+
+    def save(self, season: int, round_number: int, race: Dict[str, Any],
+             performance: Dict[str, Dict[str, Any]], source_dir: Optional[str] = None):
+        """Write a round atomically (readers see the old snapshot or the new one)."""
+        target = self.path(season, round_number)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        tmp = tempfile.mkdtemp(prefix=f".{round_number:02d}-", dir=os.path.dirname(target))
+        try:
+            np.save(os.path.join(tmp, "results.npy"), _results_array(race["results"]))
+
+            drivers: Dict[str, Any] = {}
+            chunks: List[np.ndarray] = []
+            offset = 0
+            for driver, data in performance.items():
+                laps = np.empty(len(data["lap_numbers"]), dtype=LAP_DTYPE)
+                laps["lap_number"] = data["lap_numbers"]
+                laps["lap_time"] = data["lap_times"]
+                chunks.append(laps)
+                drivers[driver] = {field: data[field] for field in SUMMARY_FIELDS}
+                drivers[driver]["laps"] = [offset, offset + len(laps)]
+                offset += len(laps)
+            np.save(os.path.join(tmp, "laps.npy"), np.concatenate(chunks) if chunks else np.empty(0, LAP_DTYPE))
+
+            meta = {
+                "version": SNAPSHOT_VERSION,
+                "payload_version": self.payload_version,
+                "created_at": self._clock(),
+                "max_age": self.max_age,
+                "season": season,
+                "round": round_number,
+                # results lives in results.npy; the placeholder keeps the key order (and so the bytes)
+                "race": {k: None if k == "results" else v for k, v in race.items()},
+                "drivers": drivers,
+                "source_dir": source_dir,
+                "source_fingerprint": source_fingerprint(source_dir),
+            }
+            with open(os.path.join(tmp, "meta.json"), "w") as f:
+                json.dump(meta, f)
+
+            if os.path.exists(target):
+                old = tmp + ".old"
+                os.replace(target, old)
+                os.replace(tmp, target)
+                shutil.rmtree(old, ignore_errors=True)
+            else:
+                os.replace(tmp, target)
+        except BaseException:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+
+    def load(self, season: int, round_number: int, mmap_mode: Optional[str] = "r") -> Optional[RaceData]:
+        """(race payload, per-driver performance) for a fresh snapshot, else None."""
+        path = self.path(season, round_number)
+        try:
+            with open(os.path.join(path, "meta.json")) as f:
+                meta = json.load(f)
+            if meta.get("version") != SNAPSHOT_VERSION or not self._fresh(meta):
+                return None
+            results = np.load(os.path.join(path, "results.npy"), mmap_mode=mmap_mode)
+            laps = np.load(os.path.join(path, "laps.npy"), mmap_mode=mmap_mode)
+        except (OSError, ValueError):
+            return None
+
+        race = dict(meta["race"])
+        race["results"] = _results_rows(results)
+        performance = {}
+        for driver, summary in meta["drivers"].items():
+            start, stop = summary["laps"]
+            performance[driver] = {field: summary[field] for field in SUMMARY_FIELDS}
+            performance[driver]["lap_numbers"] = laps["lap_number"][start:stop]
+            performance[driver]["lap_times"] = laps["lap_time"][start:stop]
+        return race, performance
+
+    def invalidate(self, season: int, round_number: int):
+        shutil.rmtree(self.path(season, round_number), ignore_errors=True)
+
+    def _fresh(self, meta: Dict[str, Any]) -> bool:
+        if meta.get("payload_version") != self.payload_version:
+            return False
+        created_at = meta.get("created_at")
+        max_age = min(float(meta.get("max_age", self.max_age)), self.max_age)
+        if not isinstance(created_at, (int, float)) or not 0 <= self._clock() - created_at <= max_age:
+            return False
+        source_dir = meta.get("source_dir")
+        if not source_dir or not os.path.isdir(source_dir):
+            # Nothing to compare against (e.g. FastF1 cache wiped): fresh until max_age
+            return True
+        return source_fingerprint(source_dir) == meta.get("source_fingerprint")
+
+
+def _results_array(rows: List[Dict[str, Any]]) -> np.ndarray:
+    dtype = []
+    for name, kind in RESULT_FIELDS:
+        if kind is str:
+            width = max([len(str(row.get(name) or "")) for row in rows] + [1])
+            dtype.append((name, f"U{width}"))
+        else:
+            dtype.append((name, kind))
+    dtype.append(("nulls", np.uint16))
+    array = np.zeros(len(rows), dtype=dtype)
+    for bit, (name, kind) in enumerate(RESULT_FIELDS):
+        values = [row.get(name) for row in rows]
+        missing = np.array([v is None for v in values], dtype=bool)
+        array["nulls"] |= missing.astype(np.uint16) << bit
+        if kind is str:
+            array[name] = [str(v) if v is not None else "" for v in values]
+        else:
+            array[name] = [0 if v is None else v for v in values]
+    return array
+
+
+def _results_rows(array: np.ndarray) -> List[Dict[str, Any]]:
+    names = [name for name, _ in RESULT_FIELDS]
+    nulls = np.asarray(array["nulls"])
+    columns = []
+    for bit, name in enumerate(names):
+        values = array[name].tolist()
+        for i in np.flatnonzero(nulls & (1 << bit)).tolist():
+            values[i] = None
+        columns.append(values)
+    return [dict(zip(names, values)) for values in zip(*columns)]
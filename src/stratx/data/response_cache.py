@@ -0,0 +1,209 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from stratx.data.timeutils import parse_openf1_date
+
+CacheKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+# Comparison filters are passed as params keyed like {"date>": "..."}
+FILTER_OPERATORS = (">=", "<=", ">", "<")
+
+class ResponseCache:
+    """
+    Thread-safe LRU cache for OpenF1 responses with a TTL per endpoint.
+
+    Entries are keyed by (endpoint, sorted params). Static endpoints such as
+    /sessions and /meetings live for minutes, high-frequency live endpoints
+    for a couple of seconds, and anything belonging to a session that has
+    already finished never expires (it is only dropped by LRU eviction).
+
+    The cache is bounded by entry count and by payload bytes (the size of the
+    upstream response body), since a finished session's /car_data can be tens
+    of MB. Queries with a comparison filter (e.g. the incremental "date>"
+    cursor) change on every poll and are rarely asked for twice, so they get
+    cursor_ttl and are never pinned.
+
+    Cached payloads are shared between callers and must be treated as read-only.
+    """
+
+    DEFAULT_TTLS: Dict[str, float] = {
+        "/meetings": 600.0,
+        "/sessions": 600.0,
+        "/laps": 2.0,
+        "/intervals": 2.0,
+        "/car_data": 2.0,
+        "/position": 2.0,
+        "/race_control": 5.0,
+        "/pit": 5.0,
+        "/stints": 5.0,
+        "/weather": 30.0,
+    }
+
+    # OpenF1 keeps correcting data for a short while after the chequered flag
+    FINISHED_GRACE = timedelta(minutes=30)
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 256 * 1024 * 1024,
+                 ttls: Optional[Dict[str, float]] = None, default_ttl: float = 5.0,
+                 cursor_ttl: float = 2.0, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttls = dict(self.DEFAULT_TTLS)
+        if ttls:
+            self.ttls.update(ttls)
+        self.default_ttl = default_ttl
+        self.cursor_ttl = cursor_ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        # key -> (payload, expires_at, session_key, size)
+        self._entries: "OrderedDict[CacheKey, Tuple[Any, float, Optional[int], int]]" = OrderedDict()
+        self._bytes = 0
+        self._finished_sessions = set()
+        self._session_checked_at: Dict[int, float] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.coalesced = 0
+
+    @staticmethod
+    def make_key(endpoint: str, params: Optional[Dict[str, Any]] = None) -> CacheKey:
+        """Build a hashable key that does not depend on param ordering."""
+        items = tuple(sorted((str(k), str(v)) for k, v in (params or {}).items()))
+        return (endpoint, items)
+
+    @staticmethod
+    def is_cursor(key: CacheKey) -> bool:
+        """Whether a key carries a comparison filter (e.g. {"date>": ...})."""
+        return any(name.endswith(FILTER_OPERATORS) for name, _ in key[1])
+
+    @staticmethod
+    def session_key_of(params: Optional[Dict[str, Any]]) -> Optional[int]:
+        """Numeric session_key of a request, if it targets one specific session."""
+        try:
+            return int((params or {}).get("session_key"))
+        except (TypeError, ValueError):
+            return None
+
+    def get(self, key: CacheKey, record: bool = True) -> Optional[Any]:
+        """
+        Return the cached payload or None on a miss (absent or expired).
+        record=False skips the hit/miss counters for internal re-checks.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                if record:
+                    self.misses += 1
+                return None
+            payload, expires_at, session_key, size = entry
+            if self._clock() >= expires_at and session_key not in self._finished_sessions:
+                del self._entries[key]
+                self._bytes -= size
+                self.expirations += 1
+                if record:
+                    self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            if record:
+                self.hits += 1
+            return payload
+
+    def set(self, key: CacheKey, payload: Any, session_key: Optional[int] = None, size: int = 0):
+        """
+        Store a payload of `size` bytes, evicting the least recently used
+        entries past max_entries or max_bytes. A payload larger than max_bytes
+        on its own is not cached.
+        """
+        if self.is_cursor(key):
+            # Not pinned even once the session is over: the next poll asks for a new cursor
+            ttl, session_key = self.cursor_ttl, None
+        else:
+            ttl = self.ttls.get(key[0], self.default_ttl)
+        expires_at = self._clock() + ttl
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[3]
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (payload, expires_at, session_key, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted[3]
+                self.evictions += 1
+
+    def record_coalesced(self):
+        """Count a request that was served by another caller's in-flight fetch."""
+        with self._lock:
+            self.coalesced += 1
+
+    def mark_session_finished(self, session_key: int):
+        """Pin every entry of a finished session so it never expires."""
+        with self._lock:
+            self._finished_sessions.add(int(session_key))
+
+    def is_session_finished(self, session_key: Optional[int]) -> bool:
+        return session_key is not None and session_key in self._finished_sessions
+
+    def needs_session_check(self, session_key: Optional[int]) -> bool:
+        """
+        Whether the finished/live state of a session is unknown or stale.
+        Claims the check so concurrent callers don't all trigger it.
+        """
+        if session_key is None:
+            return False
+        now = self._clock()
+        with self._lock:
+            if session_key in self._finished_sessions:
+                return False
+            checked_at = self._session_checked_at.get(session_key)
+            if checked_at is not None and now - checked_at < self.ttls["/sessions"]:
+                return False
+            self._session_checked_at[session_key] = now
+            return True
+
+    def observe_sessions(self, sessions: List[Dict[str, Any]]):
+        """Learn which sessions have finished from a /sessions payload."""
+        now = datetime.now(timezone.utc)
+        for session in sessions or []:
+            session_key = session.get("session_key")
+            date_end = parse_openf1_date(session.get("date_end"))
+            if session_key is None or date_end is None:
+                continue
+            if date_end + self.FINISHED_GRACE < now:
+                self.mark_session_finished(session_key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def nbytes(self) -> int:
+        """Payload bytes currently held."""
+        return self._bytes
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss/eviction counters plus current occupancy."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "coalesced": self.coalesced,
+                "finished_sessions": len(self._finished_sessions),
+            }
+
@@ -0,0 +1,246 @@
+import threading
+import numpy as np
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from stratx.data.timeutils import NAT_NS, to_epoch_ns, epoch_ns_to_iso
+
+# Column layouts per OpenF1 endpoint. `date` is int64 nanoseconds since the epoch.
+# Missing floats are NaN, missing small ints are -1.
+CAR_DATA_SCHEMA: Dict[str, np.dtype] = {
+    "date": np.dtype(np.int64),
+    "speed": np.dtype(np.float32),
+    "rpm": np.dtype(np.float32),
+    "n_gear": np.dtype(np.int8),
+    "throttle": np.dtype(np.float32),
+    "brake": np.dtype(np.float32),
+    "drs": np.dtype(np.int8),
+}
+
+POSITION_SCHEMA: Dict[str, np.dtype] = {
+    "date": np.dtype(np.int64),
+    "x": np.dtype(np.float32),
+    "y": np.dtype(np.float32),
+    "z": np.dtype(np.float32),
+}
+
+SCHEMAS: Dict[str, Dict[str, np.dtype]] = {
+    "/car_data": CAR_DATA_SCHEMA,
+    "/position": POSITION_SCHEMA,
+}
+
+
+class ColumnBuffer:
+    """
+    Growable set of equally long NumPy columns, kept sorted by `date`.
+    Appends amortize growth by doubling capacity; reads return views.
+    """
+
+    def __init__(self, schema: Dict[str, np.dtype], capacity: int = 4096):
+        self.schema = schema
+        self._size = 0
+        self._columns = {name: np.empty(capacity, dtype=dtype) for name, dtype in schema.items()}
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def capacity(self) -> int:
+        return len(self._columns["date"])
+
+    @property
+    def nbytes(self) -> int:
+        return sum(col.nbytes for col in self._columns.values())
+
+    def column(self, name: str) -> np.ndarray:
+        """Zero-copy view of the filled part of a column."""
+        return self._columns[name][:self._size]
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        return {name: self.column(name) for name in self.schema}
+
+    def window(self, start_ns: Optional[int] = None, end_ns: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Zero-copy views of all columns for start_ns <= date < end_ns."""
+        dates = self.column("date")
+        lo = 0 if start_ns is None else int(np.searchsorted(dates, start_ns, side="left"))
+        hi = self._size if end_ns is None else int(np.searchsorted(dates, end_ns, side="left"))
+        return {name: col[lo:hi] for name, col in self._columns.items()}
+
+    def append(self, columns: Dict[str, np.ndarray]) -> int:
+        """
+        Append column arrays (one per schema field). Rows already present
+        (same date) are skipped and late rows are merged in date order.
+        Returns the number of rows added.
+        """
+        dates = np.asarray(columns["date"], dtype=np.int64)
+        if np.any(dates == NAT_NS):
+            keep = dates != NAT_NS
+            columns = {name: np.asarray(values)[keep] for name, values in columns.items()}
+            dates = dates[keep]
+        if len(dates) == 0:
+            return 0
+        order = np.argsort(dates, kind="stable")
+        if not np.all(order == np.arange(len(order))):
+            columns = {name: np.asarray(values)[order] for name, values in columns.items()}
+            dates = dates[order]
+
+        current = self.column("date")
+        if self._size:
+            # Drop duplicates of rows we already hold (overlapping polls)
+            tail = current[np.searchsorted(current, dates[0], side="left"):]
+            if len(tail):
+                keep = ~np.isin(dates, tail)
+                if not keep.all():
+                    columns = {name: np.asarray(values)[keep] for name, values in columns.items()}
+                    dates = dates[keep]
+        # Drop duplicates within the batch itself
+        if len(dates) > 1:
+            keep = np.concatenate(([True], dates[1:] != dates[:-1]))
+            if not keep.all():
+                columns = {name: np.asarray(values)[keep] for name, values in columns.items()}
+                dates = dates[keep]
+        n = len(dates)
+        if n == 0:
+            return 0
+
+        self._reserve(n)
+        if self._size == 0 or dates[0] >= current[-1]:
+            for name in self.schema:
+                self._columns[name][self._size:self._size + n] = columns[name]
+            self._size += n
+            return n
+
+        # Late rows: merge them into the tail they belong to
+        start = int(np.searchsorted(current, dates[0], side="left"))
+        order = np.argsort(np.concatenate((current[start:], dates)), kind="stable")
+        for name, dtype in self.schema.items():
+            merged = np.concatenate((self._columns[name][start:self._size], np.asarray(columns[name], dtype=dtype)))
+            self._columns[name][start:self._size + n] = merged[order]
+        self._size += n
+        return n
+
+    def _reserve(self, extra: int):
+        needed = self._size + extra
+        if needed <= self.capacity:
+            return
+        new_capacity = max(needed, self.capacity * 2)
+        for name, col in self._columns.items():
+            grown = np.empty(new_capacity, dtype=col.dtype)
+            grown[:self._size] = col[:self._size]
+            self._columns[name] = grown
+
+    def records(self, start_ns: Optional[int] = None, end_ns: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Materialize rows as OpenF1-style dicts (for compatibility; avoid on hot paths)."""
+        window = self.window(start_ns, end_ns)
+        names = list(window)
+        lists = [window[name].tolist() for name in names]
+        rows = []
+        for values in zip(*lists):
+            row = dict(zip(names, values))
+            row["date"] = epoch_ns_to_iso(row["date"])
+            rows.append(row)
+        return rows
+
+
+def columns_from_rows(rows: List[Dict[str, Any]], schema: Dict[str, np.dtype]) -> Dict[str, np.ndarray]:
+    """Convert a list of OpenF1 dicts into typed columns in one pass per field."""
+    n = len(rows)
+    columns: Dict[str, np.ndarray] = {"date": to_epoch_ns([r.get("date") for r in rows])}
+    for name, dtype in schema.items():
+        if name == "date":
+            continue
+        missing = np.nan if dtype.kind == "f" else -1
+        values = (r.get(name) for r in rows)
+        columns[name] = np.fromiter((missing if v is None else v for v in values), dtype=dtype, count=n)
+    return columns
+
+
+class SessionStore:
+    """
+    Columnar in-memory store for OpenF1 telemetry.
+
+    Holds one ColumnBuffer per (session_key, endpoint, driver_number) instead of
+    lists of dicts: a car_data sample costs ~26 bytes rather than several hundred,
+    so a full race for all 20 cars fits in tens of MB, and consumers can scan
+    whole windows with vectorized NumPy code.
+
+    ingest() may run in worker threads (large payloads are converted off the
+    event loop), so writes and window/record reads are serialized by a lock.
+    Windows are views: copy them before handing them to another thread.
+    """
+
+    def __init__(self, initial_capacity: int = 4096):
+        self.initial_capacity = initial_capacity
+        self._buffers: Dict[Tuple[int, str, int], ColumnBuffer] = {}
+        self._lock = threading.Lock()
+
+    def ingest(self, endpoint: str, session_key: int, rows: List[Dict[str, Any]]) -> int:
+        """Append an OpenF1 payload, split by driver. Returns the number of new rows."""
+        schema = SCHEMAS.get(endpoint)
+        if schema is None:
+            raise ValueError(f"No columnar schema for {endpoint}")
+        if not rows:
+            return 0
+
+        by_driver: Dict[int, List[Dict[str, Any]]] = {}
+        for row in rows:
+            driver_number = row.get("driver_number")
+            if driver_number is not None:
+                by_driver.setdefault(int(driver_number), []).append(row)
+
+        added = 0
+        for driver_number, driver_rows in by_driver.items():
+            columns = columns_from_rows(driver_rows, schema)
+            key = (session_key, endpoint, driver_number)
+            with self._lock:
+                buffer = self._buffers.get(key)
+                if buffer is None:
+                    buffer = self._buffers[key] = ColumnBuffer(schema, self.initial_capacity)
+                added += buffer.append(columns)
+        return added
+
+    def buffer(self, endpoint: str, session_key: int, driver_number: int) -> Optional[ColumnBuffer]:
+        return self._buffers.get((session_key, endpoint, int(driver_number)))
+
+    def window(self, endpoint: str, session_key: int, driver_number: int,
+               start_ns: Optional[int] = None, end_ns: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Zero-copy column views for one driver between two epoch-ns timestamps."""
+        buffer = self.buffer(endpoint, session_key, driver_number)
+        if buffer is None:
+            schema = SCHEMAS[endpoint]
+            return {name: np.empty(0, dtype=dtype) for name, dtype in schema.items()}
+        with self._lock:
+            return buffer.window(start_ns, end_ns)
+
+    def drivers(self, endpoint: str, session_key: int) -> List[int]:
+        with self._lock:
+            keys = list(self._buffers)
+        return sorted(d for (s, e, d) in keys if s == session_key and e == endpoint)
+
+    def records(self, endpoint: str, session_key: int, driver_number: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Rows as OpenF1-style dicts, oldest first (all drivers if driver_number is None)."""
+        drivers: Iterable[int] = [driver_number] if driver_number else self.drivers(endpoint, session_key)
+        rows = []
+        for d in drivers:
+            buffer = self.buffer(endpoint, session_key, d)
+            if buffer is None:
+                continue
+            with self._lock:
+                records = buffer.records()
+            for row in records:
+                row["driver_number"] = d
+                row["session_key"] = session_key
+                rows.append(row)
+        if driver_number is None:
+            rows.sort(key=lambda r: r["date"])
+        return rows
+
+    def drop_session(self, session_key: int):
+        with self._lock:
+            for key in [k for k in self._buffers if k[0] == session_key]:
+                del self._buffers[key]
+
+    def nbytes(self, session_key: Optional[int] = None) -> int:
+        """Memory held by the column arrays (including spare capacity)."""
+        with self._lock:
+            buffers = list(self._buffers.items())
+        return sum(b.nbytes for (s, _, _), b in buffers if session_key is None or s == session_key)
@@ -0,0 +1,59 @@
+import numpy as np
+from datetime import datetime, timezone
+from typing import Any, Optional, Sequence
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+NAT_NS = np.iinfo(np.int64).min
+
+def parse_openf1_date(value: Any) -> Optional[datetime]:
+    """
+    Parse an OpenF1 ISO-8601 timestamp into an aware UTC datetime.
+    Returns None for missing or malformed values.
+    """
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+def format_openf1_date(value: datetime) -> str:
+    """Format a datetime the way OpenF1 expects it in date filters."""
+    return value.astimezone(timezone.utc).isoformat()
+
+def to_epoch_ns(values: Sequence[Any]) -> np.ndarray:
+    """
+    Vectorized conversion of OpenF1 timestamps to int64 nanoseconds since the epoch.
+    UTC strings (the only kind OpenF1 emits) are parsed by NumPy in one pass;
+    anything with another offset falls back to per-value parsing. Missing
+    values become NAT_NS.
+    """
+    stripped = []
+    fallback = False
+    for value in values:
+        if not value:
+            stripped.append("NaT")
+        elif value.endswith("+00:00"):
+            stripped.append(value[:-6])
+        elif value.endswith("Z"):
+            stripped.append(value[:-1])
+        else:
+            fallback = True
+            break
+    if not fallback:
+        return np.array(stripped, dtype="datetime64[ns]").view(np.int64)
+
+    out = np.full(len(values), NAT_NS, dtype=np.int64)
+    for i, value in enumerate(values):
+        parsed = parse_openf1_date(value)
+        if parsed is not None:
+            delta = parsed - EPOCH
+            out[i] = (delta.days * 86400 + delta.seconds) * 1_000_000_000 + delta.microseconds * 1000
+    return out
+
+def epoch_ns_to_iso(value: int) -> str:
+    """Inverse of to_epoch_ns for a single value."""
+    return np.datetime_as_string(np.datetime64(int(value), "ns").astype("datetime64[us]")) + "+00:00"
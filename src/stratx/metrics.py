@@ -0,0 +1,230 @@
+"""
+Process-wide metrics, exposed in the Prometheus text format (GET /metrics).
+
+A small dependency-free registry: labelled counters and histograms updated
+on the hot paths (a dict lookup and an add under a lock), plus collectors,
+callbacks evaluated at scrape time for values that already live elsewhere
+(cache sizes and hit counters), so nothing is double-booked.
+
+Label values must come from small, fixed sets (route templates, endpoint
+paths, model names): every distinct combination is a separate series.
+
+Metrics recorded in worker processes (race loads, feature extraction) are not
+visible here; race loads are timed from the parent instead.
+"""
+import threading
+from abc import ABC, abstractmethod
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+LabelValues = Tuple[str, ...]
+# (labels, value) samples of one metric family, as returned by a collector
+Samples = Iterable[Tuple[Dict[str, str], float]]
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LOAD_BUCKETS = (0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    value = float(value)
+    if value == float("inf"):
+        return "+Inf"
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+class _Metric(ABC):
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"{self.name} expects labels {self.label_names}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def _labels(self, key: LabelValues) -> Dict[str, str]:
+        return dict(zip(self.label_names, key))
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._render_samples())
+        return lines
+
+    @abstractmethod
+    def _render_samples(self) -> List[str]:
+        """Sample lines of the family, after its HELP and TYPE lines."""
+
+
+class Counter(_Metric):
+    """Monotonic count per label set."""
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        super().__init__(name, help, labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def _render_samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self._labels(k))} {_format_value(v)}" for k, v in items]
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram of observations (seconds, by convention) per label set."""
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (non-cumulative, + overflow), sum, count]
+        self._values: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, **labels: str):
+        key = self._key(labels)
+        # First bucket whose upper bound holds the value; len(buckets) = +Inf
+        index = next((i for i, bound in enumerate(self.buckets) if value <= bound), len(self.buckets))
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """Observe the wall time of the block (also when it raises)."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels: str) -> int:
+        entry = self._values.get(self._key(labels))
+        return entry[2] if entry else 0
+
+    def _render_samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, ([*v[0]], v[1], v[2])) for k, v in self._values.items())
+        lines = []
+        for key, (counts, total, count) in items:
+            labels = self._labels(key)
+            cumulative = 0
+            for bound, n in zip((*self.buckets, float("inf")), counts):
+                cumulative += n
+                lines.append(f"{self.name}_bucket{_format_labels({**labels, 'le': _format_value(bound)})} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {count}")
+        return lines
+
+
+class _Collected(_Metric):
+    """A metric family whose samples come from a callback at scrape time."""
+
+    def __init__(self, name: str, help: str, kind: str, collect: Callable[[], Samples]):
+        super().__init__(name, help)
+        self.kind = kind
+        self.collect = collect
+
+    def _render_samples(self) -> List[str]:
+        return [f"{self.name}{_format_labels(labels)} {_format_value(value)}" for labels, value in self.collect()]
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _add(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            # Re-registration (e.g. a module reloaded) keeps the live metric and its values
+            if existing is not None and type(existing) is type(metric):
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        return self._add(Counter(name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._add(Histogram(name, help, labels, buckets))
+
+    def gauge_callback(self, name: str, help: str, collect: Callable[[], Samples], kind: str = "gauge"):
+        """Register (or replace) a gauge/counter family read from `collect()` at scrape time."""
+        with self._lock:
+            self._metrics[name] = _Collected(name, help, kind, collect)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            try:
+                lines.extend(metric.render())
+            except Exception as e:
+                # One broken collector must not take the whole scrape down
+                lines.append(f"# {metric.name} unavailable: {_escape(e)}")
+        return "\n".join(lines) + "\n"
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+
+REGISTRY = Registry()
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "stratx_http_request_duration_seconds", "API request latency (to the start of the response body), by route",
+    ["method", "route", "status"])
+UPSTREAM_REQUEST_SECONDS = REGISTRY.histogram(
+    "stratx_upstream_request_duration_seconds", "Latency of calls to upstream data sources",
+    ["service", "endpoint"])
+UPSTREAM_REQUESTS = REGISTRY.counter(
+    "stratx_upstream_requests_total", "Calls to upstream data sources, by outcome (ok or error)",
+    ["service", "endpoint", "outcome"])
+INFERENCE_SECONDS = REGISTRY.histogram(
+    "stratx_inference_duration_seconds", "Model inference and simulation time", ["model"])
+INFERENCE_FALLBACKS = REGISTRY.counter(
+    "stratx_inference_fallbacks_total", "Model calls that failed and fell back to the heuristic", ["model"])
+ROUND_LOAD_SECONDS = REGISTRY.histogram(
+    "stratx_round_load_duration_seconds", "Time to load a race round (queueing included), by source and outcome",
+    ["source", "state"], buckets=LOAD_BUCKETS)
+
+
+@contextmanager
+def upstream_call(service: str, endpoint: str) -> Iterator[None]:
+    """Time an upstream call and count it as ok, or as error if the block raises."""
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        UPSTREAM_REQUEST_SECONDS.observe(time.perf_counter() - started, service=service, endpoint=endpoint)
+        UPSTREAM_REQUESTS.inc(service=service, endpoint=endpoint, outcome=outcome)
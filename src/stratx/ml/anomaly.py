@@ -0,0 +1,151 @@
+import numpy as np
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Comparison operators usable in rule conditions. NumPy ufuncs work for both
+# scalars and arrays, so the same rule drives the per-packet and batch paths.
+OPERATORS = {
+    ">": np.greater,
+    ">=": np.greater_equal,
+    "<": np.less,
+    "<=": np.less_equal,
+    "==": np.equal,
+    "!=": np.not_equal,
+}
+
+Condition = Tuple[str, str, float]
+
+class AnomalyRule:
+    """
+    Declarative anomaly rule: a conjunction of (channel, operator, threshold)
+    conditions that must hold for at least `min_samples` consecutive samples.
+    Channels missing from the input are treated as `default` (0, matching the
+    original single-packet checks).
+    """
+
+    def __init__(self, name: str, conditions: Sequence[Condition], min_samples: int = 1, default: float = 0.0):
+        for channel, op, _ in conditions:
+            if op not in OPERATORS:
+                raise ValueError(f"Unknown operator '{op}' in rule '{name}' for channel '{channel}'")
+        if min_samples < 1:
+            raise ValueError("min_samples must be >= 1")
+        self.name = name
+        self.conditions = list(conditions)
+        self.min_samples = min_samples
+        self.default = default
+
+    @property
+    def channels(self) -> List[str]:
+        return [channel for channel, _, _ in self.conditions]
+
+    def matches(self, packet: Dict[str, Any]) -> bool:
+        """Evaluate the rule on a single telemetry packet (instantaneous rules only)."""
+        if self.min_samples > 1:
+            return False
+        return all(
+            OPERATORS[op](packet.get(channel, self.default), threshold)
+            for channel, op, threshold in self.conditions
+        )
+
+    def __repr__(self) -> str:
+        return f"AnomalyRule({self.name!r}, {self.conditions!r}, min_samples={self.min_samples})"
+
+
+DEFAULT_ANOMALY_RULES: List[AnomalyRule] = [
+    AnomalyRule("High RPM / Low Speed Mismatch", [("rpm", ">", 13000), ("speed", "<", 50)]),
+    AnomalyRule("Stalled on Throttle", [("throttle", ">", 90), ("speed", "==", 0)]),
+    # ~2 s at the 3.7 Hz car_data rate: rules out single-sample glitches
+    AnomalyRule("Sustained RPM / Speed Mismatch", [("rpm", ">", 11000), ("speed", "<", 80)], min_samples=8),
+]
+
+
+class AnomalyDetector:
+    """
+    Runs a registry of AnomalyRules over whole telemetry windows in one
+    vectorized pass. A window is anything indexable by channel name that
+    yields 1-D arrays: a SessionStore window dict or a pandas DataFrame.
+    """
+
+    def __init__(self, rules: Optional[Sequence[AnomalyRule]] = None):
+        self.rules: List[AnomalyRule] = list(DEFAULT_ANOMALY_RULES if rules is None else rules)
+
+    def register(self, rule: AnomalyRule):
+        """Add a rule (replacing any existing rule with the same name)."""
+        self.rules = [r for r in self.rules if r.name != rule.name] + [rule]
+
+    def check_packet(self, packet: Dict[str, Any]) -> List[str]:
+        """Names of instantaneous rules triggered by a single packet."""
+        return [rule.name for rule in self.rules if rule.matches(packet)]
+
+    def masks(self, window: Any) -> Dict[str, np.ndarray]:
+        """Boolean mask per rule marking every sample that belongs to an anomaly."""
+        n = _window_length(window)
+        columns: Dict[str, np.ndarray] = {}
+        evaluated: Dict[Condition, np.ndarray] = {}
+        result = {}
+        for rule in self.rules:
+            mask = np.ones(n, dtype=bool)
+            for condition in rule.conditions:
+                hit = evaluated.get(condition)
+                if hit is None:
+                    channel, op, threshold = condition
+                    if channel not in columns:
+                        columns[channel] = _channel(window, channel, n, rule.default)
+                    hit = evaluated[condition] = OPERATORS[op](columns[channel], threshold)
+                mask &= hit
+            if rule.min_samples > 1:
+                mask = _sustained(mask, rule.min_samples)
+            result[rule.name] = mask
+        return result
+
+    def events(self, window: Any) -> List[Dict[str, Any]]:
+        """
+        Contiguous anomaly runs as events, ordered by start sample.
+        Includes start/end dates when the window has a `date` column.
+        """
+        dates = np.asarray(window["date"]) if _has_channel(window, "date") else None
+        events = []
+        for name, mask in self.masks(window).items():
+            starts, ends = _runs(mask)
+            for start, end in zip(starts.tolist(), ends.tolist()):
+                event = {"anomaly": name, "start_index": start, "end_index": end - 1, "samples": end - start}
+                if dates is not None:
+                    event["start_date"] = dates[start].item()
+                    event["end_date"] = dates[end - 1].item()
+                events.append(event)
+        events.sort(key=lambda e: (e["start_index"], e["anomaly"]))
+        return events
+
+
+def _has_channel(window: Any, channel: str) -> bool:
+    try:
+        return channel in window
+    except TypeError:
+        return False
+
+def _window_length(window: Any) -> int:
+    if hasattr(window, "__len__") and hasattr(window, "columns"):
+        return len(window)  # DataFrame
+    for values in window.values():
+        return len(values)
+    return 0
+
+def _channel(window: Any, channel: str, n: int, default: float) -> np.ndarray:
+    if _has_channel(window, channel):
+        return np.asarray(window[channel])
+    return np.full(n, default, dtype=np.float32)
+
+def _runs(mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Start (inclusive) and end (exclusive) indices of True runs."""
+    padded = np.concatenate(([False], mask, [False])).view(np.int8)
+    edges = np.flatnonzero(np.diff(padded))
+    return edges[0::2], edges[1::2]
+
+def _sustained(mask: np.ndarray, min_samples: int) -> np.ndarray:
+    """Keep only True runs that last at least min_samples samples."""
+    starts, ends = _runs(mask)
+    long_runs = (ends - starts) >= min_samples
+    # Runs never touch (a False separates them), so starts and ends are distinct
+    marks = np.zeros(len(mask) + 1, dtype=np.int8)
+    marks[starts[long_runs]] = 1
+    marks[ends[long_runs]] = -1
+    return np.cumsum(marks[:-1], dtype=np.int32) > 0
@@ -0,0 +1,212 @@
+"""
+Compiled fast path for the lap time model.
+
+The trained artifact is a sklearn Pipeline of ColumnTransformer(StandardScaler +
+OneHotEncoder) feeding a GradientBoostingRegressor. Scoring it through sklearn
+spends most of its time on input validation, DataFrame handling and sparse
+matrix plumbing. CompiledLapTimeModel flattens the fitted pipeline into a few
+NumPy arrays once, at load time, and evaluates all trees together with a
+fixed-depth vectorized walk. Results match sklearn to floating point noise.
+
+The walk is only faster for small batches. Its cost grows with rows x trees,
+while sklearn's per-call overhead is fixed, so on large batches (around 2000
+rows) the compiled walk is slower than the sklearn pipeline. Callers send
+batches above FAST_PATH_MAX_ROWS to sklearn (scripts/bench_lap_time_model.py
+prints the crossover).
+"""
+import numpy as np
+from typing import Any, Dict, List, Optional, Sequence
+
+# Marker sklearn uses for "no child" in tree_.children_left/right
+TREE_LEAF = -1
+
+# Above this many rows sklearn's Cython tree walk wins over the NumPy walk
+# (measured with scripts/bench_lap_time_model.py); callers should hand
+# larger batches to the original pipeline.
+FAST_PATH_MAX_ROWS = 128
+
+# Bumped whenever the saved layout of CompiledLapTimeModel changes
+FORMAT_VERSION = 1
+
+class CompiledLapTimeModel:
+    """
+    Flattened StandardScaler + OneHotEncoder + GradientBoostingRegressor.
+
+    Arrays:
+      mean, scale            folded StandardScaler constants for the numeric features
+      feature, threshold     per node split (all trees concatenated)
+      left, right            global child indices; leaves point at themselves
+      value                  per node leaf value pre-multiplied by the learning rate
+      roots                  index of each tree's root node
+    """
+
+    def __init__(self, numeric_features: Sequence[str], categorical_features: Sequence[str],
+                 categories: Sequence[Sequence[str]], arrays: Dict[str, np.ndarray], baseline: float, depth: int,
+                 source_digest: Optional[str] = None):
+        self.numeric_features = list(numeric_features)
+        self.categorical_features = list(categorical_features)
+        self.categories = [list(c) for c in categories]
+        self.arrays = arrays
+        self.baseline = float(baseline)
+        self.depth = int(depth)
+        # sha256 of the pickle this was compiled from, to detect stale files
+        self.source_digest = source_digest
+        self.n_features = len(self.numeric_features) + sum(len(c) for c in self.categories)
+
+        # category value -> one-hot column, per categorical feature
+        self.category_index: List[Dict[str, int]] = []
+        offset = len(self.numeric_features)
+        for values in self.categories:
+            self.category_index.append({value: offset + i for i, value in enumerate(values)})
+            offset += len(values)
+
+        for name, array in arrays.items():
+            setattr(self, name, array)
+
+    @classmethod
+    def from_pipeline(cls, pipeline: Any, source_digest: Optional[str] = None) -> "CompiledLapTimeModel":
+        """
+        Compile a fitted lap time Pipeline. Raises ValueError if the pipeline
+        does not have the expected StandardScaler/OneHotEncoder/GBR layout.
+        """
+        preprocessor = pipeline.named_steps.get('preprocessor')
+        regressor = pipeline.named_steps.get('regressor')
+        if preprocessor is None or regressor is None or not hasattr(regressor, 'estimators_'):
+            raise ValueError("Expected a Pipeline with 'preprocessor' and a fitted gradient boosting 'regressor'")
+        if getattr(preprocessor, 'remainder', 'drop') != 'drop':
+            raise ValueError("Unsupported ColumnTransformer remainder")
+
+        transformers = {name: (transformer, columns) for name, transformer, columns in preprocessor.transformers_}
+        if set(transformers) - {'num', 'cat', 'remainder'} or 'num' not in transformers or 'cat' not in transformers:
+            raise ValueError(f"Unsupported preprocessing steps: {sorted(transformers)}")
+        scaler, numeric_features = transformers['num']
+        encoder, categorical_features = transformers['cat']
+        if type(scaler).__name__ != 'StandardScaler' or type(encoder).__name__ != 'OneHotEncoder':
+            raise ValueError("Expected StandardScaler for 'num' and OneHotEncoder for 'cat'")
+        if encoder.drop is not None or encoder.handle_unknown != 'ignore':
+            raise ValueError("OneHotEncoder must use drop=None and handle_unknown='ignore'")
+        if regressor.estimators_.shape[1] != 1:
+            raise ValueError("Only single-output regressors are supported")
+
+        n_numeric = len(numeric_features)
+        mean = scaler.mean_ if scaler.with_mean else np.zeros(n_numeric)
+        scale = scaler.scale_ if scaler.with_std else np.ones(n_numeric)
+
+        trees = [est.tree_ for est in regressor.estimators_[:, 0]]
+        sizes = np.array([t.node_count for t in trees])
+        offsets = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+
+        features, thresholds, lefts, rights, values = [], [], [], [], []
+        for tree, offset in zip(trees, offsets):
+            left = tree.children_left.astype(np.int64)
+            right = tree.children_right.astype(np.int64)
+            own = np.arange(tree.node_count) + offset
+            is_leaf = left == TREE_LEAF
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(tree.threshold)
+            lefts.append(np.where(is_leaf, own, left + offset))
+            rights.append(np.where(is_leaf, own, right + offset))
+            values.append(regressor.learning_rate * tree.value[:, 0, 0])
+
+        arrays = {
+            'mean': np.asarray(mean, dtype=np.float64),
+            'scale': np.asarray(scale, dtype=np.float64),
+            'feature': np.concatenate(features).astype(np.intp),
+            'threshold': np.concatenate(thresholds).astype(np.float64),
+            'left': np.concatenate(lefts).astype(np.intp),
+            'right': np.concatenate(rights).astype(np.intp),
+            'value': np.concatenate(values).astype(np.float64),
+            'roots': offsets.astype(np.intp),
+        }
+        baseline = float(np.ravel(regressor.init_.constant_)[0]) if hasattr(regressor.init_, 'constant_') else None
+        if baseline is None:
+            raise ValueError("Only constant (DummyRegressor) init estimators are supported")
+        depth = max(t.max_depth for t in trees)
+        return cls(numeric_features, categorical_features, encoder.categories_, arrays, baseline, depth, source_digest)
+
+    def save(self, path: str):
+        """
+        Write the model with joblib, uncompressed, so load() can memory-map the
+        node arrays instead of reading and unpickling them.
+        """
+        import joblib
+        joblib.dump({
+            'format_version': FORMAT_VERSION,
+            'numeric_features': self.numeric_features,
+            'categorical_features': self.categorical_features,
+            'categories': self.categories,
+            'baseline': self.baseline,
+            'depth': self.depth,
+            'source_digest': self.source_digest,
+            'arrays': self.arrays,
+        }, path)
+
+    @classmethod
+    def load(cls, path: str, mmap_mode: Optional[str] = 'r') -> "CompiledLapTimeModel":
+        """Load a model written by save(). Raises ValueError for other formats."""
+        import joblib
+        data = joblib.load(path, mmap_mode=mmap_mode)
+        if not isinstance(data, dict) or data.get('format_version') != FORMAT_VERSION:
+            raise ValueError(f"{path} is not a compiled lap time model (format {FORMAT_VERSION})")
+        return cls(data['numeric_features'], data['categorical_features'], data['categories'],
+                   data['arrays'], data['baseline'], data['depth'], data.get('source_digest'))
+
+    def encode(self, rows: Sequence[Dict[str, Any]]) -> np.ndarray:
+        """
+        Build the dense model matrix (float32, like sklearn's tree input) from feature dicts.
+        Unknown categories leave their one-hot block empty, as handle_unknown='ignore' does.
+        """
+        n = len(rows)
+        X = np.zeros((n, self.n_features), dtype=np.float32)
+        n_numeric = len(self.numeric_features)
+        numeric = np.array([[row[f] for f in self.numeric_features] for row in rows], dtype=np.float64).reshape(n, n_numeric)
+        X[:, :n_numeric] = (numeric - self.mean) / self.scale
+        for feature, index in zip(self.categorical_features, self.category_index):
+            for i, row in enumerate(rows):
+                column = index.get(row[feature])
+                if column is not None:
+                    X[i, column] = 1.0
+        return X
+
+    def predict_matrix(self, X: np.ndarray) -> np.ndarray:
+        """Evaluate every tree for every row of an encoded matrix at once."""
+        node = np.broadcast_to(self.roots, (X.shape[0], len(self.roots)))
+        rows = np.arange(X.shape[0])[:, None]
+        for _ in range(self.depth):
+            go_left = X[rows, self.feature[node]] <= self.threshold[node]
+            node = np.where(go_left, self.left[node], self.right[node])
+        return self.baseline + self.value[node].sum(axis=1)
+
+    def predict_rows(self, rows: Sequence[Dict[str, Any]]) -> np.ndarray:
+        """Predict lap times for a list of feature dicts."""
+        return self.predict_matrix(self.encode(rows))
+
+    def predict_one(self, row: Dict[str, Any]) -> float:
+        """Single-row path: one walk over all trees with 1-D arrays."""
+        x = np.zeros(self.n_features, dtype=np.float32)
+        n_numeric = len(self.numeric_features)
+        x[:n_numeric] = (np.array([row[f] for f in self.numeric_features], dtype=np.float64) - self.mean) / self.scale
+        for feature, index in zip(self.categorical_features, self.category_index):
+            column = index.get(row[feature])
+            if column is not None:
+                x[column] = 1.0
+        node = self.roots
+        for _ in range(self.depth):
+            node = np.where(x[self.feature[node]] <= self.threshold[node], self.left[node], self.right[node])
+        return float(self.baseline + self.value[node].sum())
+
+    def predict(self, X: Any) -> np.ndarray:
+        """sklearn-compatible entry point accepting a DataFrame or a list of dicts."""
+        if hasattr(X, 'to_dict'):
+            X = X.to_dict('records')
+        return self.predict_rows(X)
+
+
+def file_digest(path: str) -> str:
+    """sha256 of a model file, recorded in compiled models as source_digest."""
+    import hashlib
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
@@ -0,0 +1,174 @@
+"""
+Per-round feature extraction for model training, cached in a Parquet store.
+
+Each (season, round) is extracted independently — in a process pool, since
+loading a FastF1 session is CPU-bound parsing — and written to
+<root>/v<FEATURE_VERSION>/<season>/<round>.parquet. A training run only
+extracts rounds missing from the store and concatenates the rest, so adding
+a race touches one round. Bump FEATURE_VERSION whenever extract_round's
+output changes; old versions are simply ignored.
+
+It also defines the lap time model's inputs and artifact names, shared by
+train.py and the serving side (race_predictor), so pandas is imported lazily:
+the API imports this module on cold start.
+"""
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import TYPE_CHECKING, Iterable, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Lap time model inputs, in the column order it is trained and served with
+CATEGORICAL_FEATURES = ['Driver', 'Team', 'Circuit', 'Compound']
+NUMERICAL_FEATURES = ['TyreLife', 'LapNumber', 'TrackTemp']
+LAP_TIME_FEATURES = CATEGORICAL_FEATURES + NUMERICAL_FEATURES
+
+LAP_TIME_MODEL_FILE = 'lap_time_model.pkl'
+# CompiledLapTimeModel.save() output, memory-mapped at load
+COMPILED_LAP_TIME_MODEL_FILE = 'lap_time_model.compiled.joblib'
+
+FEATURE_VERSION = 1
+FEATURE_COLUMNS = LAP_TIME_FEATURES + ['AirTemp', 'LapTime']
+
+FEATURE_DIR = '.cache/features'
+
+
+def _fastf1(cache_dir: Optional[str]):
+    import fastf1
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+        fastf1.Cache.enable_cache(cache_dir)
+    return fastf1
+
+
+def get_race_data(round_num: int, season: int, cache_dir: Optional[str] = None):
+    try:
+        session = _fastf1(cache_dir).get_session(season, round_num, 'R')
+        session.load(weather=True, telemetry=False, laps=True) # Telemetry false for speed
+        return session
+    except Exception as e:
+        logger.error(f"Failed to load session {season} R{round_num}: {e}")
+        return None
+
+
+def get_all_rounds(year, cache_dir: Optional[str] = None) -> List[int]:
+    try:
+        schedule = _fastf1(cache_dir).get_event_schedule(year)
+        # Filter for completed races (conventional)
+        # We assume if it has a session key or is in the past, we can try to load it.
+        # fastf1 usually handles this. Let's just take all conventional races.
+        round_numbers = schedule[schedule['EventFormat'] == 'conventional']['RoundNumber'].tolist()
+        return [int(r) for r in round_numbers]
+    except Exception as e:
+        logger.error(f"Error fetching schedule for {year}: {e}")
+        return []
+
+
+def extract_round(season: int, round_num: int, cache_dir: Optional[str] = None) -> Optional[pd.DataFrame]:
+    """Feature rows (one per quick lap) for one race; None if the race has no usable data."""
+    import pandas as pd
+
+    session = get_race_data(round_num, season, cache_dir)
+    if session is None:
+        return None
+
+    try:
+        laps = session.laps
+        if laps is None or laps.empty:
+            return None
+
+        # Filter mostly valid laps
+        laps = laps.pick_quicklaps().reset_index(drop=True)
+
+        # Features
+        circuit_id = session.event.EventName
+        track_temp = session.weather_data['TrackTemp'].mean() if not session.weather_data.empty else 30.0
+        air_temp = session.weather_data['AirTemp'].mean() if not session.weather_data.empty else 25.0
+
+        return pd.DataFrame({
+            'Driver': laps['Driver'],
+            'Team': laps['Team'],
+            'Circuit': circuit_id,
+            'Compound': laps['Compound'],
+            'TyreLife': laps['TyreLife'],
+            'LapNumber': laps['LapNumber'],
+            'TrackTemp': track_temp,
+            'AirTemp': air_temp,
+            'LapTime': laps['LapTime'].dt.total_seconds()
+        })
+    except Exception as e:
+        logger.warning(f"Skipping Round {round_num} due to data error: {e}")
+        return None
+
+
+class FeatureStore:
+    """Parquet files of extracted features, keyed by (season, round, FEATURE_VERSION)."""
+
+    def __init__(self, root: str = FEATURE_DIR, version: int = FEATURE_VERSION):
+        self.root = root
+        self.version = version
+
+    def path(self, season: int, round_num: int) -> str:
+        return os.path.join(self.root, f"v{self.version}", str(season), f"{round_num:02d}.parquet")
+
+    def has(self, season: int, round_num: int) -> bool:
+        return os.path.exists(self.path(season, round_num))
+
+    def load(self, season: int, round_num: int) -> pd.DataFrame:
+        import pandas as pd
+        return pd.read_parquet(self.path(season, round_num))
+
+    def save(self, season: int, round_num: int, df: pd.DataFrame):
+        path = self.path(season, round_num)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.tmp"
+        df.to_parquet(tmp, index=False)
+        os.replace(tmp, path)
+
+    def invalidate(self, season: int, round_num: int):
+        if self.has(season, round_num):
+            os.remove(self.path(season, round_num))
+
+
+def build_features(rounds: Iterable[Tuple[int, int]], store: FeatureStore, cache_dir: Optional[str] = None,
+                   workers: Optional[int] = None) -> pd.DataFrame:
+    """
+    Features for all (season, round) pairs: rounds missing from the store are
+    extracted in parallel and saved, then everything is concatenated in order.
+    """
+    import pandas as pd
+
+    rounds = list(rounds)
+    missing = [key for key in rounds if not store.has(*key)]
+    logger.info(f"Feature store: {len(rounds) - len(missing)} rounds cached, {len(missing)} to extract")
+
+    if missing:
+        workers = workers or int(os.environ.get("STRATX_FEATURE_WORKERS", 0)) or min(len(missing), os.cpu_count() or 1)
+        # spawn: fastf1/pandas state is not fork-safe
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+            futures = {pool.submit(extract_round, season, r, cache_dir): (season, r) for season, r in missing}
+            for future in as_completed(futures):
+                season, r = futures[future]
+                try:
+                    df = future.result()
+                except Exception as e:
+                    logger.warning(f"Feature extraction failed for {season} R{r}: {e}")
+                    continue
+                # Rounds without data (e.g. not yet raced) are retried next time
+                if df is None or df.empty:
+                    continue
+                store.save(season, r, df)
+                logger.info(f"  -> {season} R{r}: {len(df)} laps")
+
+    # Season/Round identify the race each row came from (e.g. for grouped CV)
+    frames = [store.load(season, r).assign(Season=season, Round=r) for season, r in rounds if store.has(season, r)]
+    if not frames:
+        return pd.DataFrame(columns=FEATURE_COLUMNS + ['Season', 'Round'])
+    return pd.concat(frames, ignore_index=True)
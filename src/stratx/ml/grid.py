@@ -0,0 +1,228 @@
+"""
+Whole-grid race simulation for position and overtake forecasts.
+
+Starting from every car's gap to the leader, pace, compound and tyre age,
+the remaining laps are stepped forward for all Monte Carlo samples at once
+(arrays are [samples x cars]):
+
+  - lap time = car pace (tyre effect of its current stint removed)
+    + compound offset + sampled degradation * tyre age (+ cliff) + noise
+  - dirty air: a car within DIRTY_AIR_WINDOW of the one ahead loses time
+  - a car that catches the one ahead passes with a probability that grows
+    with its pace advantage, otherwise it is held up behind it
+  - cars pit once their tyres pass a sampled share of their life
+  - safety cars bunch the field up
+
+The only Python loops are over laps and over grid positions (for the
+hold-up rule, which depends on the car ahead); each step is vectorized
+across samples.
+"""
+import numpy as np
+from typing import Any, Dict, List, Optional
+
+from stratx.ml.strategy import (
+    TYRE_MAX_LAPS, DRY_COMPOUNDS, COMPOUND_PACE, COMPOUND_DEG, CLIFF, PIT_LOSS, PIT_LOSS_SD,
+    SC_PROBABILITY, DEG_SD,
+)
+
+LAP_NOISE = 0.25           # s, lap to lap variation
+DIRTY_AIR = 0.4            # s lost right behind another car, fading to 0 at the window
+DIRTY_AIR_WINDOW = 1.0     # s
+MIN_GAP = 0.3              # s, how close a car held up runs behind the one ahead
+OVERTAKE_MARGIN = 0.4      # s/lap pace advantage for a 50% pass
+OVERTAKE_SCALE = 0.2       # s/lap, steepness of the pass probability
+SC_GAP = 0.8               # s between cars after a safety car restart
+
+
+_PACE = np.array([COMPOUND_PACE[c] for c in DRY_COMPOUNDS])
+_DEG = np.array([COMPOUND_DEG[c] for c in DRY_COMPOUNDS])
+_LIFE = np.array([TYRE_MAX_LAPS[c] for c in DRY_COMPOUNDS], dtype=np.float64)
+
+
+def _tyre_cost(compound: np.ndarray, age: np.ndarray, multiplier: np.ndarray) -> np.ndarray:
+    """Compound offset + degradation (+ cliff) for a lap on `age`-lap-old tyres."""
+    pace = np.take(_PACE, compound)
+    deg = np.take(_DEG, compound) * multiplier * age
+    cliff = CLIFF * np.maximum(0.0, age - np.take(_LIFE, compound)) ** 2
+    return pace + deg + cliff
+
+
+class GridSimulator:
+    """Vectorized Monte Carlo of the whole field over the remaining laps."""
+
+    def __init__(self, samples: int = 500, sc_probability: float = SC_PROBABILITY, pit_loss: float = PIT_LOSS,
+                 seed: Optional[int] = None):
+        self.samples = samples
+        self.sc_probability = sc_probability
+        self.pit_loss = pit_loss
+        self.seed = seed
+
+    def simulate(self, cars: List[Dict[str, Any]], current_lap: int, total_laps: int,
+                 horizon: int = 3) -> Dict[str, Any]:
+        """
+        cars: [{'driver_number', 'gap' (s behind the leader), 'pace' (s, next lap),
+        'compound', 'tyre_age'}]. Returns per car the finishing position
+        distribution, and for every pair the probability that one car is
+        ahead of the other after `horizon` laps.
+        """
+        n, d = self.samples, len(cars)
+        if d == 0:
+            return {"drivers": [], "current_lap": int(current_lap), "total_laps": int(total_laps), "samples": n,
+                    "position_probabilities": [], "expected_position": [], "ahead_probability": [], "horizon": horizon}
+        rng = np.random.default_rng(self.seed)
+        remaining = max(0, int(total_laps) - int(current_lap))
+        horizon = max(0, min(int(horizon), remaining))
+
+        gap = np.array([float(c.get('gap') or 0.0) for c in cars])
+        compound0 = np.array([DRY_COMPOUNDS.index(c['compound']) if c.get('compound') in DRY_COMPOUNDS
+                              else DRY_COMPOUNDS.index("MEDIUM") for c in cars])
+        age0 = np.array([float(c.get('tyre_age') or 0) for c in cars])
+        pace = np.array([float(c['pace']) for c in cars])
+        # Car speed with the tyre effect of the current stint taken out
+        intrinsic = pace - _tyre_cost(compound0, age0 + 1, np.ones(d))
+
+        T = np.broadcast_to(gap, (n, d)).copy()
+        compound = np.broadcast_to(compound0, (n, d)).copy()
+        age = np.broadcast_to(age0, (n, d)).copy()
+        multiplier = rng.lognormal(-DEG_SD ** 2 / 2, DEG_SD, size=(n, len(DRY_COMPOUNDS)))
+        # Each car stops once its tyres reach 75-100% of their life
+        stop_share = rng.uniform(0.75, 1.0, size=(n, d))
+        rows = np.arange(n)[:, None]
+
+        ranks_at_horizon = np.argsort(np.argsort(T, axis=1), axis=1)
+        for lap in range(remaining):
+            laps_left = remaining - lap
+            age += 1
+            lap_time = intrinsic + _tyre_cost(compound, age, multiplier[rows, compound]) \
+                + rng.normal(0.0, LAP_NOISE, size=(n, d))
+
+            # Pit stops (not in the last few laps): new tyres that can reach the flag
+            pitting = (age >= stop_share * np.take(_LIFE, compound)) & (laps_left > 3)
+            if pitting.any():
+                lap_time += np.where(pitting, rng.normal(self.pit_loss, PIT_LOSS_SD, size=(n, d)), 0.0)
+                fresh = np.where(laps_left > 25, 2, np.where(laps_left > 12, 1, 0))
+                compound = np.where(pitting, fresh, compound)
+                age = np.where(pitting, 0, age)
+
+            # Resolve the lap in running order (sorted by time before the lap)
+            order = np.argsort(T, axis=1)
+            T_sorted = np.take_along_axis(T, order, axis=1)
+            lt_sorted = np.take_along_axis(lap_time, order, axis=1)
+            gap_ahead = np.diff(T_sorted, axis=1)
+            lt_sorted[:, 1:] += DIRTY_AIR * np.clip(1.0 - gap_ahead / DIRTY_AIR_WINDOW, 0.0, 1.0)
+            new = T_sorted + lt_sorted
+
+            last, last_lt = new[:, 0].copy(), lt_sorted[:, 0].copy()
+            for p in range(1, d):
+                mine, my_lt = new[:, p], lt_sorted[:, p]
+                caught = mine < last + MIN_GAP
+                p_pass = 1.0 / (1.0 + np.exp(-((last_lt - my_lt) - OVERTAKE_MARGIN) / OVERTAKE_SCALE))
+                passed = caught & (rng.random(n) < p_pass)
+                held = caught & ~passed
+                mine = np.where(passed, np.minimum(mine, last - 0.1), np.where(held, last + MIN_GAP, mine))
+                new[:, p] = mine
+                ahead = mine > last
+                last = np.where(ahead, mine, last)
+                last_lt = np.where(ahead, my_lt, last_lt)
+
+            # Safety car: field bunched up behind the leader in running order
+            sc = rng.random(n) < self.sc_probability
+            if sc.any():
+                running = np.sort(new[sc], axis=1)
+                new_order = np.argsort(np.argsort(new[sc], axis=1), axis=1)
+                new[sc] = running[:, :1] + new_order * SC_GAP
+
+            np.put_along_axis(T, order, new, axis=1)
+            if lap + 1 == horizon:
+                ranks_at_horizon = np.argsort(np.argsort(T, axis=1), axis=1)
+
+        ranks = np.argsort(np.argsort(T, axis=1), axis=1)                      # [N, D], 0 = leader
+        counts = np.bincount((np.arange(d) * d + ranks).ravel(), minlength=d * d).reshape(d, d)
+        position_probabilities = counts / n
+        ahead = (ranks_at_horizon[:, :, None] < ranks_at_horizon[:, None, :]).mean(axis=0)
+
+        return {
+            "drivers": [c['driver_number'] for c in cars],
+            "current_lap": int(current_lap),
+            "total_laps": int(total_laps),
+            "samples": n,
+            # [car][position]: P(car finishes in position + 1)
+            "position_probabilities": np.round(position_probabilities, 3).tolist(),
+            "expected_position": np.round(ranks.mean(axis=0) + 1, 2).tolist(),
+            # [i][j]: P(car i is ahead of car j after `horizon` laps)
+            "ahead_probability": np.round(ahead, 3).tolist(),
+            "horizon": horizon,
+        }
+
+
+def _gap_seconds(value: Any, pace: float) -> Optional[float]:
+    """OpenF1 gap_to_leader: seconds, or '+N LAP(S)' for lapped cars."""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = str(value).strip().upper()
+    if "LAP" in text:
+        try:
+            return float(text.lstrip("+").split()[0]) * pace
+        except ValueError:
+            return None
+    try:
+        return float(text.lstrip("+"))
+    except ValueError:
+        return None
+
+
+def cars_from_openf1(laps: List[Dict[str, Any]], intervals: List[Dict[str, Any]], stints: List[Dict[str, Any]],
+                     pace_for) -> Dict[str, Any]:
+    """
+    Grid state for GridSimulator from OpenF1 /laps, /intervals and /stints
+    rows. pace_for(driver_number, driver_laps) gives a car's expected next
+    lap. Cars are returned in running order.
+    """
+    laps_by_driver: Dict[int, List[Dict[str, Any]]] = {}
+    for lap in laps:
+        if lap.get('driver_number') is not None:
+            laps_by_driver.setdefault(lap['driver_number'], []).append(lap)
+    latest_interval: Dict[int, Dict[str, Any]] = {}
+    for row in intervals:
+        number = row.get('driver_number')
+        if number is not None and (row.get('date') or "") >= (latest_interval.get(number, {}).get('date') or ""):
+            latest_interval[number] = row
+    latest_stint: Dict[int, Dict[str, Any]] = {}
+    for stint in stints:
+        number = stint.get('driver_number')
+        if number is not None and (stint.get('stint_number') or 0) >= (latest_stint.get(number, {}).get('stint_number') or 0):
+            latest_stint[number] = stint
+
+    drivers = sorted(set(laps_by_driver) | set(latest_interval) | set(latest_stint))
+    current_lap = max((l.get('lap_number') or 0 for l in laps), default=0)
+    paces = {d: pace_for(d, laps_by_driver.get(d, [])) for d in drivers}
+    known = [p for d, p in paces.items() if laps_by_driver.get(d)]
+    field_pace = float(np.median(known)) if known else 90.0
+
+    cars = []
+    for number in drivers:
+        pace = paces[number] if laps_by_driver.get(number) else field_pace
+        stint = latest_stint.get(number, {})
+        driver_lap = max((l.get('lap_number') or 0 for l in laps_by_driver.get(number, [])), default=current_lap)
+        lap_start = stint.get('lap_start') or 1
+        tyre_age = (stint.get('tyre_age_at_start') or 0) + max(0, driver_lap - lap_start + 1)
+        interval = latest_interval.get(number)
+        # The leader's own gap_to_leader is null; cars without any interval row are placed last
+        gap = None if interval is None else (_gap_seconds(interval.get('gap_to_leader'), pace) or 0.0)
+        cars.append({
+            "driver_number": number,
+            "gap": gap,
+            "pace": pace,
+            "compound": (stint.get('compound') or "MEDIUM").upper(),
+            "tyre_age": tyre_age,
+        })
+    # Unknown gaps go to the back
+    worst = max((c['gap'] for c in cars if c['gap'] is not None), default=0.0)
+    for c in cars:
+        if c['gap'] is None:
+            c['gap'] = worst + field_pace * 0.05
+            worst = c['gap']
+    cars.sort(key=lambda c: c['gap'])
+    return {"cars": cars, "current_lap": int(current_lap)}
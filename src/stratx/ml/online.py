@@ -0,0 +1,167 @@
+"""
+Online lap time correction during a live session.
+
+The trained lap time model is frozen and only sees static features; during a
+race the real pace drifts with fuel burn, tyre wear and track evolution. Per
+(session, driver), this module fits
+
+    lap_time ~ intercept + fuel * lap_number + deg * tyre_age
+
+by recursive least squares as laps complete (constant work per lap, a 3x3
+update), and tracks the residual of the trained model's predictions with a
+1-D RLS (a forgetting-factor running offset). Nothing is refit on the
+request path: predictions are a dot product.
+"""
+import threading
+import numpy as np
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional
+
+# Prior pace model: ~0.06 s/lap faster per lap of fuel burnt, ~0.05 s/lap of tyre deg.
+# The variances let the data move the slopes within a few laps.
+PRIOR_FUEL = -0.06
+PRIOR_DEG = 0.05
+PRIOR_VARIANCE = (25.0, 1e-2, 1e-2)
+
+
+class RecursiveLeastSquares:
+    """RLS with exponential forgetting: theta tracks the recent least-squares fit."""
+
+    def __init__(self, theta: Iterable[float], variance: Iterable[float], forgetting: float = 0.98):
+        self.theta = np.array(list(theta), dtype=np.float64)
+        self.P = np.diag(np.array(list(variance), dtype=np.float64))
+        self.forgetting = forgetting
+
+    def predict(self, phi: np.ndarray) -> float:
+        return float(self.theta @ phi)
+
+    def update(self, phi: np.ndarray, y: float) -> float:
+        """Fold in one observation; returns its prior residual."""
+        Pphi = self.P @ phi
+        gain = Pphi / (self.forgetting + phi @ Pphi)
+        residual = y - self.theta @ phi
+        self.theta = self.theta + gain * residual
+        self.P = (self.P - np.outer(gain, Pphi)) / self.forgetting
+        return float(residual)
+
+
+class DriverLapState:
+    """Online fit for one driver in one session."""
+
+    def __init__(self):
+        self.pace: Optional[RecursiveLeastSquares] = None
+        self.offset = RecursiveLeastSquares([0.0], [4.0], forgetting=0.9)
+        self.last_lap = 0
+        self.stint_start = 1
+        self.laps_used = 0
+        self.offset_updates = 0
+        # lap_number -> raw model prediction, waiting for the lap to complete
+        self.pending: Dict[int, float] = {}
+
+    def features(self, lap_number: int) -> np.ndarray:
+        return np.array([1.0, lap_number, lap_number - self.stint_start + 1], dtype=np.float64)
+
+
+class OnlineLapTimeModel:
+    """
+    Per (session, driver) online pace fits, fed with OpenF1 /laps rows.
+
+    Laps that do not represent race pace are skipped: the standing-start lap,
+    pit out laps, and (once a few laps are in) laps more than
+    `outlier_seconds` off the current fit (in-laps, safety car, traffic).
+    """
+
+    def __init__(self, forgetting: float = 0.98, outlier_seconds: float = 3.0, min_laps: int = 3,
+                 max_sessions: int = 8):
+        self.forgetting = forgetting
+        self.outlier_seconds = outlier_seconds
+        self.min_laps = min_laps
+        self.max_sessions = max_sessions
+        self._sessions: "OrderedDict[int, Dict[str, DriverLapState]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def observe(self, session_key: int, laps: Iterable[Dict[str, Any]]) -> int:
+        """Fold newly completed laps into the fits; returns how many were used. Duplicates are ignored."""
+        used = 0
+        ordered = sorted((lap for lap in laps if lap.get('lap_number') is not None), key=lambda l: l['lap_number'])
+        with self._lock:
+            for lap in ordered:
+                state = self._state(session_key, str(lap.get('driver_number')), create=True)
+                lap_number = int(lap['lap_number'])
+                if lap.get('is_pit_out_lap'):
+                    state.stint_start = max(state.stint_start, lap_number)
+                duration = lap.get('lap_duration')
+                if not duration or lap_number <= state.last_lap:
+                    continue
+                state.last_lap = lap_number
+                used += self._update(state, lap_number, float(duration), bool(lap.get('is_pit_out_lap')))
+        return used
+
+    def _update(self, state: DriverLapState, lap_number: int, duration: float, pit_out: bool) -> int:
+        model_prediction = state.pending.pop(lap_number, None)
+        for stale in [n for n in state.pending if n < lap_number]:
+            del state.pending[stale]
+        if lap_number == 1 or pit_out:
+            return 0
+
+        phi = state.features(lap_number)
+        if state.pace is None:
+            intercept = duration - PRIOR_FUEL * lap_number - PRIOR_DEG * phi[2]
+            state.pace = RecursiveLeastSquares([intercept, PRIOR_FUEL, PRIOR_DEG], PRIOR_VARIANCE, self.forgetting)
+        elif state.laps_used >= self.min_laps and abs(duration - state.pace.predict(phi)) > self.outlier_seconds:
+            return 0
+
+        state.pace.update(phi, duration)
+        state.laps_used += 1
+        if model_prediction is not None and abs(duration - model_prediction) < 2 * self.outlier_seconds:
+            state.offset.update(np.ones(1), duration - model_prediction)
+            state.offset_updates += 1
+        return 1
+
+    def predict(self, session_key: int, driver_id: str) -> Optional[float]:
+        """Next lap from the online fit, or None until enough laps were seen."""
+        with self._lock:
+            state = self._state(session_key, str(driver_id))
+            if state is None or state.pace is None or state.laps_used < self.min_laps:
+                return None
+            return state.pace.predict(state.features(state.last_lap + 1))
+
+    def correct(self, session_key: int, driver_id: str, model_prediction: float) -> float:
+        """
+        Trained model prediction for the next lap plus the learned residual
+        offset; remembers the raw prediction to learn from once the lap is done.
+        """
+        with self._lock:
+            state = self._state(session_key, str(driver_id), create=True)
+            state.pending[state.last_lap + 1] = model_prediction
+            if state.offset_updates == 0:
+                return model_prediction
+            return model_prediction + float(state.offset.theta[0])
+
+    def coefficients(self, session_key: int, driver_id: str) -> Optional[Dict[str, float]]:
+        """Current fit (intercept, fuel and deg slopes in s/lap, model offset), for diagnostics."""
+        with self._lock:
+            state = self._state(session_key, str(driver_id))
+            if state is None or state.pace is None:
+                return None
+            intercept, fuel, deg = state.pace.theta.tolist()
+            return {"intercept": intercept, "fuel_per_lap": fuel, "deg_per_lap": deg,
+                    "model_offset": float(state.offset.theta[0]), "laps_used": state.laps_used}
+
+    def drop_session(self, session_key: int):
+        with self._lock:
+            self._sessions.pop(session_key, None)
+
+    def _state(self, session_key: int, driver_id: str, create: bool = False) -> Optional[DriverLapState]:
+        drivers = self._sessions.get(session_key)
+        if drivers is None:
+            if not create:
+                return None
+            drivers = self._sessions[session_key] = {}
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        self._sessions.move_to_end(session_key)
+        state = drivers.get(driver_id)
+        if state is None and create:
+            state = drivers[driver_id] = DriverLapState()
+        return state
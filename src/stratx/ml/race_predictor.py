@@ -1,60 +1,228 @@
-import random
-import pandas as pd
 import numpy as np
-import joblib
 import os
+import threading
+from functools import lru_cache
 from typing import Dict, Any, List, Optional
 
+from stratx.ml.anomaly import AnomalyDetector
+from stratx.ml.fast_inference import CompiledLapTimeModel, FAST_PATH_MAX_ROWS, file_digest
+from stratx.ml.features import COMPILED_LAP_TIME_MODEL_FILE, LAP_TIME_FEATURES, LAP_TIME_MODEL_FILE
+from stratx.ml.online import OnlineLapTimeModel
+from stratx.ml.strategy import StrategySimulator, TYRE_MAX_LAPS
+from stratx.ml.grid import GridSimulator, cars_from_openf1
+from stratx.metrics import INFERENCE_SECONDS, INFERENCE_FALLBACKS
+
+MODEL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models')
+
 class RacePredictor:
     """
     ML-based Race Predictor.
     Loads trained models for Lap Time, Tyre Life, etc.
     Falls back to heuristics if models or features are missing.
+
+    The lap time model is served from its compiled form, memory-mapped from
+    disk, so construction does not import sklearn or unpickle the pipeline.
+    The sklearn pipeline is only loaded when it is actually needed (large
+    batches, or no usable compiled file).
+
+    During a live session, completed laps fed to observe_laps() update an
+    online per-driver pace fit (see stratx.ml.online) that corrects the
+    trained model and replaces the recent-average fallback.
     """
 
-    def __init__(self):
-        self.lap_time_model = None
+    def __init__(self, model_dir: str = MODEL_DIR, mmap_mode: Optional[str] = 'r'):
+        self.model_dir = model_dir
+        self.mmap_mode = mmap_mode
+        self.fast_lap_time_model: Optional[CompiledLapTimeModel] = None
+        self.anomaly_detector = AnomalyDetector()
+        self.online = OnlineLapTimeModel()
+        # Fixed seed: the same race state always gets the same answer (and comparisons
+        # across strategies use common random numbers)
+        self.strategy = StrategySimulator(seed=0)
+        self._simulate_strategy = lru_cache(maxsize=256)(self.strategy.simulate)
+        self._lap_time_model = None
+        self._lap_time_model_lock = threading.Lock()
         
         # Load Models
         try:
-            current_dir = os.path.dirname(os.path.abspath(__file__))
-            model_path = os.path.join(current_dir, 'models', 'lap_time_model.pkl')
-            if os.path.exists(model_path):
-                self.lap_time_model = joblib.load(model_path)
-            else:
-                print(f"Warning: Model not found at {model_path}")
+            self.fast_lap_time_model = self._load_compiled()
+            if self.fast_lap_time_model is None and self.lap_time_model is not None:
+                self.fast_lap_time_model = self._compile(self.lap_time_model)
         except Exception as e:
             print(f"Error loading models: {e}")
 
+    @property
+    def lap_time_model_path(self) -> str:
+        return os.path.join(self.model_dir, LAP_TIME_MODEL_FILE)
+
+    @property
+    def compiled_lap_time_model_path(self) -> str:
+        return os.path.join(self.model_dir, COMPILED_LAP_TIME_MODEL_FILE)
+
+    @property
+    def lap_time_model(self):
+        """The sklearn pipeline, unpickled on first access (None if missing)."""
+        if self._lap_time_model is None:
+            with self._lap_time_model_lock:
+                if self._lap_time_model is None and os.path.exists(self.lap_time_model_path):
+                    import joblib
+                    self._lap_time_model = joblib.load(self.lap_time_model_path)
+        return self._lap_time_model
+
+    @property
+    def has_lap_time_model(self) -> bool:
+        return self.fast_lap_time_model is not None or os.path.exists(self.lap_time_model_path)
+
+    def _load_compiled(self) -> Optional[CompiledLapTimeModel]:
+        """Compiled model if present and built from the current pickle."""
+        compiled_path = self.compiled_lap_time_model_path
+        if not os.path.exists(compiled_path):
+            if not os.path.exists(self.lap_time_model_path):
+                print(f"Warning: Model not found at {self.lap_time_model_path}")
+            return None
+        try:
+            compiled = CompiledLapTimeModel.load(compiled_path, mmap_mode=self.mmap_mode)
+        except Exception as e:
+            print(f"Could not load compiled lap time model ({e}), recompiling.")
+            return None
+        if os.path.exists(self.lap_time_model_path) and \
+                compiled.source_digest != file_digest(self.lap_time_model_path):
+            print(f"Compiled lap time model at {compiled_path} is stale, recompiling.")
+            return None
+        return compiled
+
+    def _compile(self, model: Any) -> Optional[CompiledLapTimeModel]:
+        """Flatten the lap time pipeline for fast scoring; None keeps the sklearn path."""
+        try:
+            compiled = CompiledLapTimeModel.from_pipeline(model, file_digest(self.lap_time_model_path))
+        except Exception as e:
+            print(f"Lap time model not compilable ({e}), using sklearn pipeline.")
+            return None
+        try:
+            compiled.save(self.compiled_lap_time_model_path)
+        except OSError as e:
+            # Read-only deployments (e.g. Vercel) just recompile on the next cold start
+            print(f"Could not save compiled lap time model: {e}")
+        return compiled
+
+    def observe_laps(self, session_key: int, laps: List[Dict[str, Any]]) -> int:
+        """Feed new or updated OpenF1 /laps rows to the online correction (cheap; call on every poll)."""
+        return self.online.observe(session_key, laps)
+
+    @INFERENCE_SECONDS.time(model="lap_time")
     def predict_next_lap_time(self, driver_id: str, current_laps: List[Dict[str, Any]], 
-                              context: Optional[Dict[str, Any]] = None) -> float:
+                              context: Optional[Dict[str, Any]] = None,
+                              session_key: Optional[int] = None) -> float:
         """
         Predict the time for the upcoming lap.
         Uses ML Model if 'context' with features is provided.
         Falls back to Heuristic otherwise.
+        With a session_key, both are corrected by the session's online fit.
         """
         # ML Inference
-        if self.lap_time_model and context:
+        if context and self.has_lap_time_model:
             try:
-                # Expecting context to have: Team, Circuit, Compound, TyreLife, LapNumber, TrackTemp
-                # driver_id is passed as arg
-                
-                features = {
-                    'Driver': driver_id,
-                    'Team': context.get('Team', 'Unknown'),
-                    'Circuit': context.get('Circuit', 'Unknown'),
-                    'Compound': context.get('Compound', 'SOFT'),
-                    'TyreLife': float(context.get('TyreLife', 1.0)),
-                    'LapNumber': float(context.get('LapNumber', 1.0)),
-                    'TrackTemp': float(context.get('TrackTemp', 30.0))
-                }
-                
-                df = pd.DataFrame([features])
-                prediction = self.lap_time_model.predict(df)[0]
+                features = self._lap_time_features(driver_id, context)
+                if self.fast_lap_time_model is not None:
+                    prediction = self.fast_lap_time_model.predict_one(features)
+                else:
+                    import pandas as pd
+                    prediction = float(self.lap_time_model.predict(pd.DataFrame([features]))[0])
+                if session_key is not None:
+                    prediction = self.online.correct(session_key, driver_id, prediction)
                 return round(prediction, 3)
             except Exception as e:
+                INFERENCE_FALLBACKS.inc(model="lap_time")
                 print(f"ML Prediction failed: {e}, falling back to heuristic.")
         
+        return self._heuristic_lap_time(current_laps, session_key, driver_id)
+
+    @INFERENCE_SECONDS.time(model="lap_time_batch")
+    def predict_next_lap_times_batch(self, contexts: List[Dict[str, Any]]) -> List[float]:
+        """
+        Predict the upcoming lap for many drivers (or many hypothetical laps) at once.
+        Each item is {'driver_id', 'current_laps', 'context'[, 'session_key']}, the
+        same inputs as predict_next_lap_time. Every item with a context is scored in a single
+        vectorized model call; the rest, and any item the model fails on, use the heuristic.
+        """
+        predictions: List[Optional[float]] = [None] * len(contexts)
+
+        ml_rows = [i for i, item in enumerate(contexts) if item.get('context')]
+        if ml_rows and self.has_lap_time_model:
+            scored, rows = [], []
+            for i in ml_rows:
+                try:
+                    rows.append(self._lap_time_features(contexts[i].get('driver_id'), contexts[i]['context']))
+                    scored.append(i)
+                except Exception as e:
+                    self._batch_fallback(i, e)
+            values: List[Optional[float]] = []
+            if rows:
+                try:
+                    values = list(self._predict_lap_time_rows(rows))
+                except Exception as e:
+                    # Something in the batch trips the model: score row by row so only the bad rows fall back
+                    print(f"ML Batch Prediction failed: {e}, scoring rows one at a time.")
+                    for i, row in zip(scored, rows):
+                        try:
+                            values.append(self._predict_lap_time_rows([row])[0])
+                        except Exception as e:
+                            self._batch_fallback(i, e)
+                            values.append(None)
+            for i, value in zip(scored, values):
+                if value is None:
+                    continue
+                try:
+                    value = float(value)
+                    if contexts[i].get('session_key') is not None:
+                        value = self.online.correct(contexts[i]['session_key'], contexts[i].get('driver_id'), value)
+                    predictions[i] = round(value, 3)
+                except Exception as e:
+                    self._batch_fallback(i, e)
+
+        for i, item in enumerate(contexts):
+            if predictions[i] is None:
+                predictions[i] = self._heuristic_lap_time(item.get('current_laps'), item.get('session_key'),
+                                                          item.get('driver_id'))
+        return predictions
+
+    def _predict_lap_time_rows(self, rows: List[Dict[str, Any]]):
+        """Model output for feature rows: compiled walk for small batches, sklearn for large ones."""
+        if self.fast_lap_time_model is not None and \
+                (len(rows) <= FAST_PATH_MAX_ROWS or self.lap_time_model is None):
+            return self.fast_lap_time_model.predict_rows(rows)
+        import pandas as pd
+        df = pd.DataFrame({col: [row[col] for row in rows] for col in LAP_TIME_FEATURES})
+        return self.lap_time_model.predict(df)
+
+    @staticmethod
+    def _batch_fallback(index: int, error: Exception):
+        INFERENCE_FALLBACKS.inc(model="lap_time_batch")
+        print(f"ML Prediction failed for batch item {index}: {error}, falling back to heuristic.")
+
+    @staticmethod
+    def _lap_time_features(driver_id: str, context: Dict[str, Any]) -> Dict[str, Any]:
+        """Feature row for the lap time model (see LAP_TIME_FEATURES)."""
+        # Expecting context to have: Team, Circuit, Compound, TyreLife, LapNumber, TrackTemp
+        # driver_id is passed as arg
+        return {
+            'Driver': str(driver_id),
+            'Team': context.get('Team', 'Unknown'),
+            'Circuit': context.get('Circuit', 'Unknown'),
+            'Compound': context.get('Compound', 'SOFT'),
+            'TyreLife': float(context.get('TyreLife', 1.0)),
+            'LapNumber': float(context.get('LapNumber', 1.0)),
+            'TrackTemp': float(context.get('TrackTemp', 30.0))
+        }
+
+    def _heuristic_lap_time(self, current_laps: Optional[List[Dict[str, Any]]],
+                            session_key: Optional[int] = None, driver_id: Optional[str] = None) -> float:
+        # Online fit of this session's laps (fuel burn + tyre deg), once it has enough laps
+        if session_key is not None and driver_id is not None:
+            prediction = self.online.predict(session_key, driver_id)
+            if prediction is not None:
+                return round(prediction, 3)
+
         # Heuristic Fallback
         if not current_laps:
             return 90.0 # Default ~1:30.000
@@ -64,46 +232,50 @@ class RacePredictor:
             return 90.0
             
         avg_time = sum(recent_times) / len(recent_times)
-        prediction = avg_time + random.uniform(-0.2, 0.2)
-        return round(prediction, 3)
+        return round(avg_time, 3)
 
     def predict_tyre_life(self, driver_id: str, tyre_compound: str, laps_on_tyre: int) -> float:
         """
         Predict remaining tyre life percentage.
         Model: Non-linear decay curve based on compound.
         """
-        max_laps = {
-            "SOFT": 20,
-            "MEDIUM": 35,
-            "HARD": 50,
-            "INTERMEDIATE": 30,
-            "WET": 25
-        }
-        
-        limit = max_laps.get(tyre_compound.upper(), 30)
+        limit = TYRE_MAX_LAPS.get(tyre_compound.upper(), 30)
         
         # Decay formula: 100 - ( (laps^1.2) / (limit^1.2) * 100 )
         wear = (laps_on_tyre ** 1.5) / (limit ** 1.5) * 100
         remaining = 100 - wear
         return max(0.0, round(remaining, 1))
 
-    def predict_pit_window(self, driver_id: str, current_lap: int, total_laps: int) -> Dict[str, Any]:
+    @INFERENCE_SECONDS.time(model="strategy")
+    def predict_pit_window(self, driver_id: str, current_lap: int, total_laps: int,
+                           compound: str = "MEDIUM", tyre_age: Optional[int] = None) -> Dict[str, Any]:
         """
         Suggest optimal pit window.
-        Model: Statistical based on typical stint lengths.
+        Model: Monte Carlo over every 0-2 stop strategy from the current lap
+        (see stratx.ml.strategy); the window is the 10-90% range of the best
+        first stop lap across sampled races.
         """
-        ideal_lap = total_laps // 2
-        
-        confidence = "HIGH"
-        if abs(current_lap - ideal_lap) > 10:
-            confidence = "LOW"
-            
-        return {
-            "open_lap": ideal_lap - 2,
-            "optimal_lap": ideal_lap,
-            "close_lap": ideal_lap + 2,
-            "confidence": confidence
-        }
+        if total_laps < 2:
+            return {"open_lap": None, "optimal_lap": None, "close_lap": None, "confidence": "LOW"}
+        return self._simulate_strategy(int(current_lap), int(total_laps), (compound or "MEDIUM").upper(),
+                                       None if tyre_age is None else int(tyre_age))
+
+    @INFERENCE_SECONDS.time(model="grid")
+    def predict_grid(self, session_key: int, laps: List[Dict[str, Any]], intervals: List[Dict[str, Any]],
+                     stints: List[Dict[str, Any]], total_laps: int, horizon: int = 3,
+                     samples: int = 500) -> Dict[str, Any]:
+        """
+        Finishing position distribution for every car and the pairwise
+        probability of each car being ahead of each other one after `horizon`
+        laps, from one whole-grid simulation (see stratx.ml.grid).
+        Pace per car is the online fit if available, else the recent average.
+        """
+        state = cars_from_openf1(laps, intervals, stints,
+                                 lambda d, driver_laps: self._heuristic_lap_time(driver_laps, session_key, str(d)))
+        simulator = GridSimulator(samples=samples, seed=0)
+        result = simulator.simulate(state["cars"], state["current_lap"], total_laps, horizon)
+        result["cars"] = state["cars"]
+        return result
 
     def predict_overtake_probability(self, driver_gap: float, driver_compound: str, target_compound: str) -> float:
         """
@@ -135,12 +307,17 @@ class RacePredictor:
     def detect_anomalies(self, telemetry_packet: Dict[str, Any]) -> List[str]:
         """
         Detect mechanical issues or weird data.
+        Rules live in self.anomaly_detector (see stratx.ml.anomaly).
         """
-        anomalies = []
-        if telemetry_packet.get('rpm', 0) > 13000 and telemetry_packet.get('speed', 0) < 50:
-            anomalies.append("High RPM / Low Speed Mismatch")
-            
-        if telemetry_packet.get('throttle', 0) > 90 and telemetry_packet.get('speed', 0) == 0:
-            anomalies.append("Stalled on Throttle")
-            
-        return anomalies
+        return self.anomaly_detector.check_packet(telemetry_packet)
+
+    @INFERENCE_SECONDS.time(model="anomaly")
+    def detect_anomalies_batch(self, window: Any, as_events: bool = False):
+        """
+        Vectorized anomaly detection over a telemetry window
+        (SessionStore window dict or DataFrame with rpm/speed/throttle... columns).
+        Returns a boolean mask per rule, or a list of anomaly events.
+        """
+        if as_events:
+            return self.anomaly_detector.events(window)
+        return self.anomaly_detector.masks(window)
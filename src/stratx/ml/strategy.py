@@ -0,0 +1,256 @@
+"""
+Monte Carlo pit strategy simulation.
+
+Every candidate strategy from the current race state (0-2 further stops x
+stop laps x dry compound sequence) is scored against many stochastic race
+samples at once. A lap costs
+
+    compound pace offset + deg * multiplier[sample, compound] * tyre_age (+ a quadratic cliff past the tyre's life)
+
+and a stop costs a sampled pit loss, discounted when it falls under a
+safety car (sampled per lap). Fuel burn and SC lap times hit every strategy
+alike, so they cancel out of the comparison.
+
+The lap dimension is folded analytically instead of materializing a
+[strategies x samples x laps] array: per strategy the laps on each compound
+reduce to prefix sums ([strategies x compounds]), samples only enter through
+the deg multipliers (one matmul) and through the SC state at the stop laps
+(a gather from the [samples x laps] SC timeline). That keeps thousands of
+strategies x hundreds of samples within a few tens of milliseconds.
+
+Two-stop candidates grow with the square of the remaining laps (~19k from
+lap 0 of a 70-lap race). After sampling, candidates that lose every sample
+to another candidate with the same plan are dropped; that changes no output
+(see _undominated). If more than `max_strategies` remain, only the best by
+expected time are simulated. That cap is an approximation: across race
+states the chosen plan matched the full simulation, but the pit window
+edges (and so the alternatives) can move. It bounds a cold simulation at
+~60 ms here for any race length (~120 ms for 70 laps without the cap).
+"""
+import itertools
+import numpy as np
+from typing import Any, Dict, Optional
+
+# Max laps before a compound falls off the cliff (also used by RacePredictor.predict_tyre_life)
+TYRE_MAX_LAPS = {
+    "SOFT": 20,
+    "MEDIUM": 35,
+    "HARD": 50,
+    "INTERMEDIATE": 30,
+    "WET": 25
+}
+
+DRY_COMPOUNDS = ["SOFT", "MEDIUM", "HARD"]
+# Pace offset vs SOFT (s/lap) and linear degradation (s/lap per lap of tyre age)
+COMPOUND_PACE = {"SOFT": 0.0, "MEDIUM": 0.35, "HARD": 0.7}
+COMPOUND_DEG = {"SOFT": 0.09, "MEDIUM": 0.06, "HARD": 0.04}
+# Extra s/lap^2 once a tyre is past TYRE_MAX_LAPS
+CLIFF = 0.05
+
+PIT_LOSS = 22.0          # s, green flag stop
+PIT_LOSS_SD = 1.5
+SC_PIT_FACTOR = 0.5      # a stop under SC costs about half
+SC_PROBABILITY = 0.015   # per lap chance that a safety car starts
+SC_LAPS = 4
+DEG_SD = 0.2             # lognormal sd of the per-sample deg multiplier
+MAX_STRATEGIES = 6000    # candidates simulated at most (see module docstring)
+
+
+class StrategySimulator:
+    """Vectorized Monte Carlo over candidate pit strategies for one driver."""
+
+    def __init__(self, samples: int = 256, max_stops: int = 2, sc_probability: float = SC_PROBABILITY,
+                 pit_loss: float = PIT_LOSS, seed: Optional[int] = None, max_strategies: int = MAX_STRATEGIES):
+        self.samples = samples
+        self.max_stops = max_stops
+        self.max_strategies = max_strategies
+        self.sc_probability = sc_probability
+        self.pit_loss = pit_loss
+        self.seed = seed
+
+    def candidates(self, current_lap: int, total_laps: int, compound: str, tyre_age: int):
+        """
+        Enumerate strategies as arrays: stop laps [S, max_stops] (total_laps = no
+        stop) and stint compounds [S, max_stops + 1] (indices into DRY_COMPOUNDS).
+        Each stop is at the end of its lap. Without a previous stop, the
+        strategy must use two different dry compounds, unless no stop lap is
+        left (then staying out is the only candidate).
+        """
+        first = DRY_COMPOUNDS.index(compound)
+        laps = np.arange(current_lap + 1, total_laps)  # laps a stop can follow
+        must_change = tyre_age >= current_lap and len(laps) > 0
+        stop_sets, compound_sets = [], []
+        for n_stops in range(self.max_stops + 1):
+            if n_stops == 0:
+                stops = np.zeros((1, 0), dtype=np.int64)
+            else:
+                if len(laps) < n_stops:
+                    continue
+                stops = np.array(list(itertools.combinations(laps.tolist(), n_stops)), dtype=np.int64)
+            sequences = [seq for seq in itertools.product(range(len(DRY_COMPOUNDS)), repeat=n_stops)
+                         if not must_change or any(c != first for c in seq)]
+            if not sequences:
+                continue
+            seq = np.array(sequences, dtype=np.int64).reshape(len(sequences), n_stops)
+            # Cartesian product of stop laps x compound sequences
+            stops = np.repeat(stops, len(seq), axis=0)
+            seq = np.tile(seq, (len(stops) // len(seq), 1))
+            pad = self.max_stops - n_stops
+            stop_sets.append(np.hstack([stops, np.full((len(stops), pad), total_laps, dtype=np.int64)]))
+            compound_sets.append(np.hstack([np.full((len(seq), 1), first), seq,
+                                            np.full((len(seq), pad), first, dtype=np.int64)]))
+        return np.vstack(stop_sets), np.vstack(compound_sets)
+
+    def simulate(self, current_lap: int, total_laps: int, compound: str = "MEDIUM",
+                 tyre_age: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Remaining race time of every candidate in every sample ([samples x
+        strategies]); returns the
+        best plan, its pit window (per-sample optimal first stop) and spreads.
+        """
+        compound = compound.upper() if compound and compound.upper() in DRY_COMPOUNDS else "MEDIUM"
+        current_lap = max(0, min(int(current_lap), total_laps - 1))
+        tyre_age = current_lap if tyre_age is None else max(0, int(tyre_age))
+        rng = np.random.default_rng(self.seed)
+
+        stops, compounds = self.candidates(current_lap, total_laps, compound, tyre_age)
+        n_strategies, n_compounds = len(stops), len(DRY_COMPOUNDS)
+
+        # Stints: [S, stints] start lap (exclusive), length and starting tyre age
+        bounds = np.hstack([np.full((n_strategies, 1), current_lap), stops, np.full((n_strategies, 1), total_laps)])
+        bounds = np.maximum.accumulate(np.minimum(bounds, total_laps), axis=1)
+        lengths = np.diff(bounds, axis=1)
+        start_age = np.zeros_like(lengths)
+        start_age[:, 0] = tyre_age
+
+        # Per compound prefix sums over tyre age: pace and deg cost of laps 1..a
+        max_age = tyre_age + total_laps + 1
+        age = np.arange(max_age + 1, dtype=np.float64)
+        names = DRY_COMPOUNDS
+        pace = np.array([COMPOUND_PACE[c] for c in names])[:, None] * (age > 0)
+        limit = np.array([TYRE_MAX_LAPS[c] for c in names], dtype=np.float64)[:, None]
+        deg = np.array([COMPOUND_DEG[c] for c in names])[:, None] * age
+        cliff = CLIFF * np.maximum(0.0, age - limit) ** 2
+        pace_cum = np.cumsum(pace, axis=1)
+        deg_cum = np.cumsum(deg, axis=1)
+        cliff_cum = np.cumsum(cliff, axis=1)
+
+        end_age = start_age + lengths
+        stint_pace = pace_cum[compounds, end_age] - pace_cum[compounds, start_age] \
+            + cliff_cum[compounds, end_age] - cliff_cum[compounds, start_age]
+        stint_deg = deg_cum[compounds, end_age] - deg_cum[compounds, start_age]
+        fixed = stint_pace.sum(axis=1)                                          # [S]
+        one_hot = compounds[:, :, None] == np.arange(n_compounds)               # [S, stints, C]
+        deg_load = (stint_deg[:, :, None] * one_hot).sum(axis=1)                # [S, C]
+
+        # Samples: deg multipliers per compound, pit losses per stop, SC timeline per lap
+        multiplier = rng.lognormal(-DEG_SD ** 2 / 2, DEG_SD, size=(self.samples, n_compounds))
+        sc_start = rng.random((self.samples, total_laps + SC_LAPS + 1)) < self.sc_probability
+        started = np.cumsum(sc_start, axis=1)
+        sc = (started - np.pad(started, ((0, 0), (SC_LAPS, 0)))[:, :started.shape[1]]) > 0   # [N, laps]
+        loss = rng.normal(self.pit_loss, PIT_LOSS_SD, size=(self.samples, self.max_stops))
+
+        n_stops = (stops < total_laps).sum(axis=1)
+        keep = self._undominated(fixed, deg_load, n_stops, compounds, multiplier, loss)
+        if len(keep) > self.max_strategies:
+            # Still too many (long races from the early laps): the best by expected time.
+            # An approximation: the pit window and alternatives can differ from the full run.
+            expected = fixed + deg_load.sum(axis=1) + n_stops * self.pit_loss
+            keep = keep[np.sort(np.argpartition(expected[keep], self.max_strategies)[:self.max_strategies])]
+        stops, compounds, fixed, deg_load = stops[keep], compounds[keep], fixed[keep], deg_load[keep]
+
+        # [N, S]: samples major, so per-sample reductions run over contiguous rows.
+        # float32 halves the memory traffic; centiseconds are plenty for ranking strategies.
+        times = multiplier.astype(np.float32) @ deg_load.T.astype(np.float32)
+        times += fixed.astype(np.float32)
+        for j in range(self.max_stops):
+            # Cost of stopping after each lap, per sample; column total_laps = no stop
+            cost = (loss[:, j:j + 1] * np.where(sc[:, :total_laps + 1], SC_PIT_FACTOR, 1.0)).astype(np.float32)
+            cost[:, total_laps] = 0.0
+            times += cost[:, stops[:, j]]
+
+        result = self._summarize(times, stops, compounds, current_lap, total_laps)
+        result["strategies_considered"] = int(n_strategies)
+        return result
+
+    @staticmethod
+    def _undominated(fixed: np.ndarray, deg_load: np.ndarray, n_stops: np.ndarray, compounds: np.ndarray,
+                     multiplier: np.ndarray, loss: np.ndarray) -> np.ndarray:
+        """
+        Indices of the candidates worth simulating. A candidate is dropped when
+        its best case (lowest sampled deg, every stop cheapest and under SC) is
+        slower than the worst case of another candidate with the same plan (stop
+        count and compound sequence), so it cannot win a single sample, even
+        within its plan. Every output of _summarize except strategies_evaluated
+        is therefore the same as without pruning: per-sample and per-plan
+        winners, each plan's best expected time (the alternatives) and the
+        overall best.
+        """
+        best_case = fixed + deg_load @ multiplier.min(axis=0) + n_stops * loss.min() * SC_PIT_FACTOR
+        worst_case = fixed + deg_load @ multiplier.max(axis=0) + n_stops * loss.max()
+        n_compounds = len(DRY_COMPOUNDS)
+        plan_id = n_stops * n_compounds ** compounds.shape[1] + compounds @ n_compounds ** np.arange(compounds.shape[1])
+        _, plan = np.unique(plan_id, return_inverse=True)
+        plan_worst = np.full(plan.max() + 1, np.inf)
+        np.minimum.at(plan_worst, plan, worst_case)
+        return np.flatnonzero(best_case <= plan_worst[plan])
+
+    def _summarize(self, times: np.ndarray, stops: np.ndarray, compounds: np.ndarray,
+                   current_lap: int, total_laps: int) -> Dict[str, Any]:
+        mean = times.mean(axis=0)
+        best = int(np.argmin(mean))
+        n_stops = int((stops[best] < total_laps).sum())
+
+        # Same plan (stop count + compound sequence), any stop laps: per-sample best first stop
+        plan = (compounds == compounds[best]).all(axis=1) & ((stops < total_laps).sum(axis=1) == n_stops)
+        plan_idx = np.flatnonzero(plan)
+        winners = plan_idx[np.argmin(times[:, plan_idx], axis=1)]
+        if n_stops:
+            first_stop = stops[winners, 0]
+            open_lap, optimal_lap, close_lap = (int(round(v)) for v in np.percentile(first_stop, [10, 50, 90]))
+            optimal_lap = int(stops[best, 0])
+            open_lap, close_lap = min(open_lap, optimal_lap), max(close_lap, optimal_lap)
+        else:
+            open_lap = optimal_lap = close_lap = None
+
+        # How often does the best plan's type (stops + compounds) win outright?
+        overall = np.argmin(times, axis=1)
+        share = float(np.isin(overall, plan_idx).mean())
+        width = (close_lap - open_lap) if n_stops else 0
+        confidence = "HIGH" if share >= 0.6 and width <= 4 else "MEDIUM" if share >= 0.35 and width <= 10 else "LOW"
+
+        # Best alternative plans, by expected time
+        alternatives = []
+        seen = {tuple(compounds[best, :n_stops + 1].tolist())}
+        for i in np.argsort(mean):
+            k = int((stops[i] < total_laps).sum())
+            key = tuple(compounds[i, :k + 1].tolist())
+            if key in seen:
+                continue
+            seen.add(key)
+            alternatives.append({
+                "stops": stops[i, :k].tolist(),
+                "compounds": [DRY_COMPOUNDS[c] for c in compounds[i, :k + 1]],
+                "expected_delta": round(float(mean[i] - mean[best]), 2),
+            })
+            if len(alternatives) == 3:
+                break
+
+        lo, hi = np.percentile(times[:, best], [5, 95])
+        return {
+            "open_lap": open_lap,
+            "optimal_lap": optimal_lap,
+            "close_lap": close_lap,
+            "confidence": confidence,
+            "strategy": {
+                "stops": stops[best, :n_stops].tolist(),
+                "compounds": [DRY_COMPOUNDS[c] for c in compounds[best, :n_stops + 1]],
+            },
+            # Remaining race time relative to a no-deg, no-stop baseline, 90% interval
+            "expected_time": round(float(mean[best]), 2),
+            "time_interval": [round(float(lo), 2), round(float(hi), 2)],
+            "win_share": round(share, 3),
+            "alternatives": alternatives,
+            "strategies_evaluated": int(len(stops)),
+            "samples": int(times.shape[0]),
+        }
@@ -1,15 +1,23 @@
 
-import fastf1
-import pandas as pd
+import argparse
+import json
 import numpy as np
 import os
+import time
 import joblib
 import logging
-from sklearn.ensemble import GradientBoostingRegressor
-from sklearn.preprocessing import OneHotEncoder, StandardScaler
+from sklearn.ensemble import GradientBoostingRegressor, HistGradientBoostingRegressor
+from sklearn.preprocessing import OneHotEncoder, OrdinalEncoder, StandardScaler
 from sklearn.compose import ColumnTransformer
 from sklearn.pipeline import Pipeline
 from sklearn.metrics import mean_absolute_error
+from sklearn.model_selection import GroupKFold
+
+from stratx.ml.fast_inference import CompiledLapTimeModel, file_digest
+from stratx.ml.features import (
+    CATEGORICAL_FEATURES, COMPILED_LAP_TIME_MODEL_FILE, FEATURE_DIR, LAP_TIME_FEATURES, LAP_TIME_MODEL_FILE, NUMERICAL_FEATURES,
+    FeatureStore, build_features, get_all_rounds,
+)
 
 # Configure Logging
 logging.basicConfig(level=logging.INFO)
@@ -20,110 +28,143 @@ CACHE_DIR = '.cache'
 MODEL_DIR = 'src/stratx/ml/models'
 TRAIN_SEASONS = [2024, 2025] 
 
-if not os.path.exists(CACHE_DIR):
-    os.makedirs(CACHE_DIR)
-fastf1.Cache.enable_cache(CACHE_DIR)
-
-def get_race_data(round_num: int, season: int):
-    try:
-        session = fastf1.get_session(season, round_num, 'R')
-        session.load(weather=True, telemetry=False, laps=True) # Telemetry false for speed
-        return session
-    except Exception as e:
-        logger.error(f"Failed to load session {season} R{round_num}: {e}")
-        return None
-
-def get_all_rounds(year):
-    try:
-        schedule = fastf1.get_event_schedule(year)
-        # Filter for completed races (conventional)
-        # We assume if it has a session key or is in the past, we can try to load it.
-        # fastf1 usually handles this. Let's just take all conventional races.
-        round_numbers = schedule[schedule['EventFormat'] == 'conventional']['RoundNumber'].tolist()
-        return round_numbers
-    except Exception as e:
-        logger.error(f"Error fetching schedule for {year}: {e}")
-        return []
-
-def prepare_dataset(seasons):
-    all_laps = []
-    
+def prepare_dataset(seasons, workers=None):
+    """Training rows for all conventional races of `seasons`, via the feature store."""
+    rounds = []
     for season in seasons:
-        rounds = get_all_rounds(season)
-        logger.info(f"Processing Season {season} ({len(rounds)} rounds)...")
-        
-        for r in rounds:
-            logger.info(f"  -> Loading Round {r}...")
-            session = get_race_data(r, season)
-            if session is None:
-                continue
-                
-            try:
-                laps = session.laps
-                if laps is None or laps.empty:
-                    continue
-                    
-                # Filter mostly valid laps
-                laps = laps.pick_quicklaps().reset_index(drop=True)
-                
-                # Features
-                circuit_id = session.event.EventName 
-                track_temp = session.weather_data['TrackTemp'].mean() if not session.weather_data.empty else 30.0
-                air_temp = session.weather_data['AirTemp'].mean() if not session.weather_data.empty else 25.0
-                
-                # Prepare DataFrame
-                df = pd.DataFrame({
-                    'Driver': laps['Driver'],
-                    'Team': laps['Team'],
-                    'Circuit': circuit_id,
-                    'Compound': laps['Compound'],
-                    'TyreLife': laps['TyreLife'],
-                    'LapNumber': laps['LapNumber'],
-                    'TrackTemp': track_temp,
-                    'AirTemp': air_temp,
-                    'LapTime': laps['LapTime'].dt.total_seconds()
-                })
-                
-                all_laps.append(df)
-            except Exception as e:
-                 logger.warning(f"Skipping Round {r} due to data error: {e}")
-
-    if not all_laps:
-        return pd.DataFrame()
-        
-    return pd.concat(all_laps, ignore_index=True)
+        season_rounds = get_all_rounds(season, CACHE_DIR)
+        logger.info(f"Season {season}: {len(season_rounds)} rounds")
+        rounds += [(season, r) for r in season_rounds]
 
-def train_lap_time_model(df):
-    logger.info("Training Lap Time Model...")
-    
-    # Drop rows with NaNs in critical columns
-    df = df.dropna(subset=['LapTime', 'Compound', 'TyreLife'])
-    
-    # Convert types if necessary to ensure string format for categoricals
-    df['Driver'] = df['Driver'].astype(str)
-    df['Team'] = df['Team'].astype(str)
-    df['Circuit'] = df['Circuit'].astype(str)
-    df['Compound'] = df['Compound'].astype(str)
-    
-    X = df[['Driver', 'Team', 'Circuit', 'Compound', 'TyreLife', 'LapNumber', 'TrackTemp']]
-    y = df['LapTime']
-    
-    # Preprocessing
-    categorical_features = ['Driver', 'Team', 'Circuit', 'Compound']
-    numerical_features = ['TyreLife', 'LapNumber', 'TrackTemp']
-    
+    return build_features(rounds, FeatureStore(FEATURE_DIR), cache_dir=CACHE_DIR, workers=workers)
+
+REPORT_FILE = 'lap_time_model_report.json'
+
+def build_gbr_pipeline():
+    """One-hot features into a GradientBoostingRegressor (single-threaded; compilable for serving)."""
     preprocessor = ColumnTransformer(
         transformers=[
-            ('num', StandardScaler(), numerical_features),
-            ('cat', OneHotEncoder(handle_unknown='ignore'), categorical_features)
+            ('num', StandardScaler(), NUMERICAL_FEATURES),
+            ('cat', OneHotEncoder(handle_unknown='ignore'), CATEGORICAL_FEATURES)
         ])
     
     # Increased complexity for better fitting on larger dataset
-    model = Pipeline(steps=[
+    return Pipeline(steps=[
         ('preprocessor', preprocessor),
         ('regressor', GradientBoostingRegressor(n_estimators=200, max_depth=7, learning_rate=0.1))
     ])
+
+def build_hgb_pipeline():
+    """
+    Ordinal-coded categoricals into a HistGradientBoostingRegressor, which splits
+    on them natively and trains on all cores (OpenMP). Unknown categories
+    encode as NaN and follow the learned missing-value branch.
+    """
+    preprocessor = ColumnTransformer(
+        transformers=[
+            ('cat', OrdinalEncoder(handle_unknown='use_encoded_value', unknown_value=np.nan), CATEGORICAL_FEATURES),
+            ('num', 'passthrough', NUMERICAL_FEATURES)
+        ])
+    
+    return Pipeline(steps=[
+        ('preprocessor', preprocessor),
+        ('regressor', HistGradientBoostingRegressor(
+            categorical_features=list(range(len(CATEGORICAL_FEATURES))),
+            max_iter=300, learning_rate=0.1, max_leaf_nodes=63, early_stopping=False))
+    ])
+
+MODEL_BUILDERS = {'gbr': build_gbr_pipeline, 'hgb': build_hgb_pipeline}
+
+def _training_data(df):
+    # Drop rows with NaNs in critical columns
+    df = df.dropna(subset=['LapTime', 'Compound', 'TyreLife']).copy()
+    
+    # Convert types if necessary to ensure string format for categoricals
+    for col in CATEGORICAL_FEATURES:
+        df[col] = df[col].astype(str)
+    
+    return df[LAP_TIME_FEATURES], df['LapTime'], df
+
+def _race_groups(df):
+    """One group per race, so CV never scores laps of a race it trained on."""
+    if 'Season' in df.columns and 'Round' in df.columns:
+        return df['Season'].astype(str) + '-' + df['Round'].astype(str)
+    return df['Circuit']
+
+def _latency_ms(model, X, calls=200):
+    """Median single-row predict() latency and per-row cost of one full-batch call."""
+    rows = [X.iloc[[i % len(X)]] for i in range(calls)]
+    timings = []
+    for row in rows:
+        start = time.perf_counter()
+        model.predict(row)
+        timings.append(time.perf_counter() - start)
+    start = time.perf_counter()
+    model.predict(X)
+    batch = time.perf_counter() - start
+    return float(np.median(timings) * 1000), float(batch / len(X) * 1000)
+
+def evaluate_model(name, X, y, groups, n_splits=5):
+    """Grouped (per race) K-fold CV: held-out MAE, fit time and predict latency."""
+    n_races = groups.nunique()
+    if n_races < 2:
+        raise ValueError(f"Grouped CV needs at least 2 races, got {n_races}")
+    n_splits = min(n_splits, n_races)
+    maes, fit_times, single_ms, batch_ms = [], [], [], []
+    for train_idx, test_idx in GroupKFold(n_splits=n_splits).split(X, y, groups):
+        model = MODEL_BUILDERS[name]()
+        start = time.perf_counter()
+        model.fit(X.iloc[train_idx], y.iloc[train_idx])
+        fit_times.append(time.perf_counter() - start)
+        X_test = X.iloc[test_idx]
+        maes.append(mean_absolute_error(y.iloc[test_idx], model.predict(X_test)))
+        single, batch = _latency_ms(model, X_test)
+        single_ms.append(single)
+        batch_ms.append(batch)
+    
+    result = {
+        'model': name,
+        'folds': n_splits,
+        'mae': float(np.mean(maes)),
+        'mae_std': float(np.std(maes)),
+        'fit_seconds': float(np.mean(fit_times)),
+        'predict_one_ms': float(np.median(single_ms)),
+        'predict_batch_ms_per_row': float(np.median(batch_ms)),
+    }
+    # Serving latency: RacePredictor scores compilable models through CompiledLapTimeModel
+    try:
+        compiled = CompiledLapTimeModel.from_pipeline(model)
+        rows = X_test.to_dict('records')[:200]
+        start = time.perf_counter()
+        for row in rows:
+            compiled.predict_one(row)
+        result['serving_predict_one_ms'] = (time.perf_counter() - start) / len(rows) * 1000
+    except ValueError:
+        result['serving_predict_one_ms'] = result['predict_one_ms']
+    return result
+
+def compare_models(df, names=('gbr', 'hgb'), n_splits=5):
+    """Cross-validate each model type; returns (report, name of the lowest-MAE model)."""
+    X, y, clean = _training_data(df)
+    groups = _race_groups(clean)
+    results = []
+    for name in names:
+        logger.info(f"Cross-validating '{name}' ({groups.nunique()} races, grouped {min(n_splits, groups.nunique())}-fold)...")
+        results.append(evaluate_model(name, X, y, groups, n_splits))
     
+    logger.info(f"{'model':<6} {'MAE s':>8} {'fit s':>8} {'1-row ms':>9} {'serve ms':>9} {'batch us/row':>13}")
+    for r in results:
+        logger.info(f"{r['model']:<6} {r['mae']:>8.3f} {r['fit_seconds']:>8.2f} {r['predict_one_ms']:>9.2f} "
+                    f"{r['serving_predict_one_ms']:>9.3f} {r['predict_batch_ms_per_row'] * 1000:>13.2f}")
+    winner = min(results, key=lambda r: r['mae'])['model']
+    report = {'rows': len(X), 'races': int(groups.nunique()), 'results': results, 'winner': winner}
+    return report, winner
+
+def train_lap_time_model(df, model_type='gbr'):
+    logger.info(f"Training Lap Time Model ({model_type})...")
+    
+    X, y, _ = _training_data(df)
+    model = MODEL_BUILDERS[model_type]()
     model.fit(X, y)
     
     # Evaluate briefly (on Training set - simplistic)
@@ -134,10 +175,27 @@ def train_lap_time_model(df):
     if not os.path.exists(MODEL_DIR):
         os.makedirs(MODEL_DIR)
         
-    joblib.dump(model, os.path.join(MODEL_DIR, 'lap_time_model.pkl'))
+    model_path = os.path.join(MODEL_DIR, LAP_TIME_MODEL_FILE)
+    compiled_path = os.path.join(MODEL_DIR, COMPILED_LAP_TIME_MODEL_FILE)
+    joblib.dump(model, model_path)
+    # Memory-mappable copy used for serving (see RacePredictor)
+    try:
+        compiled = CompiledLapTimeModel.from_pipeline(model, file_digest(model_path))
+        compiled.save(compiled_path)
+    except ValueError as e:
+        # Not compilable (e.g. HistGradientBoosting): RacePredictor serves the pipeline
+        logger.info(f"No compiled copy for this model: {e}")
+        if os.path.exists(compiled_path):
+            os.remove(compiled_path)
     return model
 
 def main():
+    parser = argparse.ArgumentParser(description="Train the lap time model.")
+    parser.add_argument('--model', choices=['gbr', 'hgb', 'compare'], default='gbr',
+                        help="model type, or 'compare' to cross-validate both and keep the better one")
+    parser.add_argument('--folds', type=int, default=5, help="grouped CV folds for --model compare")
+    args = parser.parse_args()
+
     logger.info("Starting Extensive Data Collection (2024-2025)...")
     logger.info("This may take a while if data is not cached.")
     
@@ -148,7 +206,15 @@ def main():
         logger.error("No data collected. Exiting.")
         return
 
-    train_lap_time_model(df)
+    model_type = args.model
+    if model_type == 'compare':
+        report, model_type = compare_models(df, n_splits=args.folds)
+        os.makedirs(MODEL_DIR, exist_ok=True)
+        with open(os.path.join(MODEL_DIR, REPORT_FILE), 'w') as f:
+            json.dump(report, f, indent=2)
+        logger.info(f"Best held-out MAE: '{model_type}'")
+
+    train_lap_time_model(df, model_type)
     logger.info("Extensive Training Complete.")
 
 if __name__ == "__main__":
@@ -0,0 +1,82 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+import pytest
+
+# (status, headers, body) answered for a request path and its query params
+Reply = Tuple[int, Dict[str, str], bytes]
+
+
+def json_reply(data, status: int = 200, headers: Dict[str, str] = None) -> Reply:
+    return status, {"Content-Type": "application/json", **(headers or {})}, json.dumps(data).encode()
+
+
+class StubServer:
+    """
+    Local HTTP/1.1 server (keep-alive) answering every request with
+    `handler(path, params)`. Comparison filters ("date>...") show up as
+    params with an empty value. Records the requests and the client ports,
+    one per TCP connection.
+    """
+
+    def __init__(self, handler: Callable[[str, Dict[str, str]], Reply], delay: float = 0.0):
+        self.handler = handler
+        self.delay = delay
+        self.requests: List[Tuple[str, Dict[str, str]]] = []
+        self.connections = set()
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                url = urlsplit(self.path)
+                params = dict(parse_qsl(url.query, keep_blank_values=True))
+                with stub._lock:
+                    stub.requests.append((url.path, params))
+                    stub.connections.add(self.client_address[1])
+                if stub.delay:
+                    time.sleep(stub.delay)
+                status, headers, body = stub.handler(url.path, params)
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def calls(self, path: str) -> int:
+        return sum(1 for p, _ in self.requests if p == path)
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub_server():
+    """Factory: stub_server(handler, delay=0.0) -> StubServer, shut down after the test."""
+    servers = []
+
+    def start(handler, delay: float = 0.0) -> StubServer:
+        server = StubServer(handler, delay)
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.close()
@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from stratx.ml.anomaly import AnomalyDetector, AnomalyRule, _sustained
+
+
+def reference_sustained(mask, min_samples):
+    """Sample-by-sample version of _sustained."""
+    out = np.zeros(len(mask), dtype=bool)
+    i = 0
+    while i < len(mask):
+        if not mask[i]:
+            i += 1
+            continue
+        end = i
+        while end < len(mask) and mask[end]:
+            end += 1
+        out[i:end] = end - i >= min_samples
+        i = end
+    return out
+
+
+@pytest.mark.parametrize("mask, min_samples, expected", [
+    ("0111011110", 4, "0000011110"),
+    ("1111000111", 3, "1111000111"),  # runs touching both edges
+    ("1111111111", 10, "1111111111"),
+    ("1111111111", 11, "0000000000"),
+    ("1010101010", 2, "0000000000"),
+    ("", 3, ""),
+])
+def test_sustained_keeps_only_long_runs(mask, min_samples, expected):
+    as_bool = lambda s: np.array([c == "1" for c in s], dtype=bool)
+    np.testing.assert_array_equal(_sustained(as_bool(mask), min_samples), as_bool(expected))
+
+
+def test_sustained_matches_reference_on_random_masks():
+    rng = np.random.default_rng(0)
+    for _ in range(50):
+        mask = rng.random(200) < rng.uniform(0.3, 0.9)
+        min_samples = int(rng.integers(1, 12))
+        np.testing.assert_array_equal(_sustained(mask, min_samples), reference_sustained(mask, min_samples))
+
+
+def window(rpm, speed):
+    n = len(rpm)
+    return {"date": np.arange(n, dtype=np.int64) * 10, "rpm": np.asarray(rpm, dtype=np.float32),
+            "speed": np.asarray(speed, dtype=np.float32)}
+
+
+def test_sustained_rule_ignores_short_glitches():
+    rule = AnomalyRule("mismatch", [("rpm", ">", 11000), ("speed", "<", 80)], min_samples=3)
+    detector = AnomalyDetector([rule])
+    rpm = [12000, 12000, 9000, 12000, 12000, 12000, 12000, 9000]
+    speed = [50, 50, 50, 60, 70, 90, 60, 60]
+    # Samples 0-1 are a 2-sample glitch; 3-4 pass too but sample 5 is fast, so no 3-sample run
+    assert detector.events(window(rpm, speed)) == []
+
+    speed[5] = 70
+    assert detector.events(window(rpm, speed)) == [{
+        "anomaly": "mismatch", "start_index": 3, "end_index": 6, "samples": 4, "start_date": 30, "end_date": 60,
+    }]
+
+
+def test_shared_conditions_and_dataframe_windows():
+    instant = AnomalyRule("instant", [("rpm", ">", 11000), ("speed", "<", 80)])
+    sustained = AnomalyRule("sustained", [("rpm", ">", 11000), ("speed", "<", 80)], min_samples=2)
+    detector = AnomalyDetector([instant, sustained])
+    frame = pd.DataFrame(window([12000, 9000, 12000, 12000], [10, 10, 10, 10]))
+    masks = detector.masks(frame)
+    assert masks["instant"].tolist() == [True, False, True, True]
+    assert masks["sustained"].tolist() == [False, False, True, True]
+
+
+def test_packets_only_check_instantaneous_rules():
+    detector = AnomalyDetector()
+    packet = {"rpm": 13500, "speed": 20}
+    assert detector.check_packet(packet) == ["High RPM / Low Speed Mismatch"]
+    # Missing channels default to 0
+    assert detector.check_packet({"throttle": 95}) == ["Stalled on Throttle"]
+
+
+def test_invalid_rules_are_rejected():
+    with pytest.raises(ValueError):
+        AnomalyRule("bad", [("rpm", "=>", 1)])
+    with pytest.raises(ValueError):
+        AnomalyRule("bad", [("rpm", ">", 1)], min_samples=0)
@@ -0,0 +1,182 @@
+import asyncio
+import json
+import os
+import time
+
+import httpx
+import pytest
+from conftest import json_reply
+
+from stratx.data.backfill import BackfillManifest, ErgastBackfill, RateLimitedClient, TokenBucket
+
+YEAR = 2010
+ROUNDS = [1, 2, 3]
+
+
+def schedule():
+    return {"MRData": {"RaceTable": {"Races": [
+        {"round": str(r), "raceName": f"Grand Prix {r}", "date": f"{YEAR}-0{r}-14",
+         "Circuit": {"Location": {"locality": f"City {r}", "country": "Country"}}}
+        for r in ROUNDS
+    ]}}}
+
+
+def results(round_number):
+    drivers = [("Fernando", "Alonso", "Ferrari"), ("Sebastian", "Vettel", "Red Bull")]
+    if round_number % 2 == 0:
+        drivers.reverse()
+    return {"MRData": {"RaceTable": {"Races": [{"Results": [
+        {"position": str(i + 1), "points": str(25 - 7 * i), "status": "Finished",
+         "Driver": {"givenName": given, "familyName": family}, "Constructor": {"name": team}}
+        for i, (given, family, team) in enumerate(drivers)
+    ]}]}}}
+
+
+def driver_standings():
+    return {"MRData": {"StandingsTable": {"StandingsLists": [{"DriverStandings": [
+        {"position": "1", "points": "256", "wins": "5", "Driver": {"givenName": "Sebastian", "familyName": "Vettel"},
+         "Constructors": [{"name": "Red Bull"}]},
+    ]}]}}}
+
+
+def constructor_standings():
+    return {"MRData": {"StandingsTable": {"StandingsLists": [{"ConstructorStandings": [
+        {"position": "1", "points": "498", "wins": "9", "Constructor": {"name": "Red Bull"}},
+    ]}]}}}
+
+
+class FakeErgast:
+    """Ergast responses for one season; rounds in `failing` answer 500."""
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+
+    def __call__(self, path, params):
+        path = path.removeprefix("/ergast/f1/")
+        if path == f"{YEAR}.json":
+            return json_reply(schedule())
+        if path == f"{YEAR}/driverStandings.json":
+            return json_reply(driver_standings())
+        if path == f"{YEAR}/constructorStandings.json":
+            return json_reply(constructor_standings())
+        round_number = int(path.split("/")[1])
+        if round_number in self.failing:
+            return json_reply({}, status=500)
+        return json_reply(results(round_number))
+
+
+def test_token_bucket_paces_after_burst():
+    async def run():
+        bucket = TokenBucket(rate=20.0, capacity=2)
+        started = time.monotonic()
+        for _ in range(12):
+            await bucket.acquire()
+        return time.monotonic() - started
+
+    # 2 from the burst, then 10 at 20/s
+    assert 0.45 <= asyncio.run(run()) < 0.9
+
+
+def test_token_bucket_pause_holds_every_caller():
+    async def run():
+        bucket = TokenBucket(rate=100.0, capacity=5)
+        bucket.pause(0.3)
+        started = time.monotonic()
+        await asyncio.gather(*(bucket.acquire() for _ in range(3)))
+        return time.monotonic() - started
+
+    assert asyncio.run(run()) >= 0.3
+
+
+def test_token_bucket_rejects_bad_settings():
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0, capacity=1)
+
+
+def test_429_retry_after_pauses_everyone(stub_server):
+    throttled = {"left": 1}
+
+    def handler(path, params):
+        if throttled["left"]:
+            throttled["left"] -= 1
+            return json_reply({}, status=429, headers={"Retry-After": "0.4"})
+        return json_reply({"ok": path})
+
+    server = stub_server(handler)
+
+    async def run():
+        client = RateLimitedClient(base_url=server.url, rate=100.0, burst=10, backoff=0.01)
+        try:
+            started = time.monotonic()
+            first = asyncio.create_task(client.get_json("a.json"))
+            await asyncio.sleep(0.1)  # lands inside the pause
+            second = await client.get_json("b.json")
+            second_done = time.monotonic() - started
+            return await first, second, second_done, client.stats
+        finally:
+            await client.aclose()
+
+    first, second, second_done, stats = asyncio.run(run())
+    assert first == {"ok": "/a.json"} and second == {"ok": "/b.json"}
+    # The second request never saw the 429 but still waited out Retry-After
+    assert second_done >= 0.4
+    assert stats == {"requests": 3, "retries": 1, "throttled": 1}
+
+
+def test_5xx_backoff_then_give_up(stub_server):
+    server = stub_server(lambda path, params: json_reply({}, status=503))
+
+    async def run():
+        client = RateLimitedClient(base_url=server.url, rate=100.0, burst=10, max_retries=2, backoff=0.01)
+        try:
+            with pytest.raises(httpx.HTTPStatusError):
+                await client.get_json("x.json")
+            return client.stats
+        finally:
+            await client.aclose()
+
+    assert asyncio.run(run()) == {"requests": 3, "retries": 2, "throttled": 0}
+    assert server.calls("/x.json") == 3
+
+
+def backfill(tmp_path, url, years=(YEAR,)):
+    async def run():
+        client = RateLimitedClient(base_url=url, rate=200.0, burst=20, max_retries=0)
+        manifest = BackfillManifest(str(tmp_path / "manifest.json"))
+        try:
+            return await ErgastBackfill(client, str(tmp_path / "seasons"), str(tmp_path / "races"), manifest).run(years)
+        finally:
+            await client.aclose()
+    return asyncio.run(run())
+
+
+def test_resume_from_manifest_after_interruption(stub_server, tmp_path):
+    # First run: round 3 fails, so the season is not finished but rounds 1-2 are checkpointed
+    flaky = stub_server(FakeErgast(failing={3}))
+    report = backfill(tmp_path, flaky.url + "/ergast/f1")
+    assert YEAR in report["failed"] and report["written"] == []
+    assert not (tmp_path / "seasons" / f"{YEAR}.json").exists()
+    manifest = json.loads((tmp_path / "manifest.json").read_text())
+    assert manifest["seasons"] == [] and sorted(manifest["races"][str(YEAR)]) == ["1", "2"]
+    assert sorted(os.listdir(tmp_path / "races" / str(YEAR))) == ["1.json", "2.json"]
+
+    # Rerun: only the missing round is fetched again
+    healthy = stub_server(FakeErgast())
+    report = backfill(tmp_path, healthy.url + "/ergast/f1")
+    assert report["written"] == [YEAR] and report["failed"] == {}
+    assert [p for p, _ in healthy.requests if "/results" in p] == [f"/ergast/f1/{YEAR}/3/results.json"]
+    season = json.loads((tmp_path / "seasons" / f"{YEAR}.json").read_text())
+    assert [race["round"] for race in season["races"]] == ROUNDS
+    assert [race["winner"] for race in season["races"]] == \
+        ["Fernando Alonso", "Sebastian Vettel", "Fernando Alonso"]
+    assert season["driverChampion"] == {"name": "Sebastian Vettel", "team": "Red Bull", "points": 256.0}
+
+    # Finished seasons are skipped without any request
+    report = backfill(tmp_path, healthy.url + "/ergast/f1")
+    assert report["skipped"] == [YEAR] and report["requests"] == 0
+
+
+def test_manifest_ignores_other_versions(tmp_path):
+    path = tmp_path / "manifest.json"
+    path.write_text(json.dumps({"version": 0, "seasons": [2000], "races": {}}))
+    assert not BackfillManifest(str(path)).season_done(2000)
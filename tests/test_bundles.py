@@ -0,0 +1,114 @@
+import gzip
+import hashlib
+import json
+import os
+
+from stratx.data.bundles import BUNDLE_DIR, INDEX_FILE, write_bundles
+
+
+def write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2)
+
+
+def bundle_dir(data_dir):
+    return os.path.join(data_dir, BUNDLE_DIR)
+
+
+def index(data_dir):
+    with open(os.path.join(bundle_dir(data_dir), INDEX_FILE)) as f:
+        return json.load(f)
+
+
+def load_bundle(data_dir, year):
+    with open(os.path.join(bundle_dir(data_dir), index(data_dir)["bundles"][str(year)]["file"]), "rb") as f:
+        return f.read()
+
+
+def seed(data_dir):
+    write(os.path.join(data_dir, "seasons", "2024.json"), {"year": 2024, "races": 2})
+    write(os.path.join(data_dir, "races", "2024", "1.json"), {"round": 1})
+    write(os.path.join(data_dir, "races", "2024", "10.json"), {"round": 10})
+    write(os.path.join(data_dir, "races", "2024", "2.json"), {"round": 2})
+    write(os.path.join(data_dir, "2025", "race_3.json"), {"round": 3})
+
+
+def test_bundle_names_carry_the_content_hash(tmp_path):
+    data_dir = str(tmp_path)
+    seed(data_dir)
+    report = write_bundles(data_dir)
+    assert report["seasons"] == 2 and report["source_files"] == 5
+
+    for year, entry in index(data_dir)["bundles"].items():
+        body = load_bundle(data_dir, year)
+        digest = hashlib.sha256(body).hexdigest()
+        assert entry["file"] == f"{year}.{digest[:12]}.json"
+        assert entry["sha256"] == digest and entry["bytes"] == len(body)
+        with open(os.path.join(bundle_dir(data_dir), entry["file"] + ".gz"), "rb") as f:
+            assert gzip.decompress(f.read()) == body
+
+
+def test_round_keys_are_normalised_and_sorted(tmp_path):
+    data_dir = str(tmp_path)
+    seed(data_dir)
+    write_bundles(data_dir)
+    historical = json.loads(load_bundle(data_dir, 2024))
+    assert historical["season"] == {"year": 2024, "races": 2}
+    assert list(historical["races"]) == ["1", "2", "10"]
+    # Current-season files are race_{n}.json; the bundle keys them by round number too
+    current = json.loads(load_bundle(data_dir, 2025))
+    assert current["season"] is None
+    assert current["races"] == {"3": {"round": 3}}
+
+
+def test_unchanged_data_keeps_the_same_file(tmp_path):
+    data_dir = str(tmp_path)
+    seed(data_dir)
+    write_bundles(data_dir)
+    first = index(data_dir)
+    write_bundles(data_dir)
+    assert index(data_dir) == first
+
+
+def test_changed_season_replaces_its_superseded_bundle(tmp_path):
+    data_dir = str(tmp_path)
+    seed(data_dir)
+    write_bundles(data_dir)
+    old = index(data_dir)["bundles"]["2024"]["file"]
+
+    write(os.path.join(data_dir, "races", "2024", "2.json"), {"round": 2, "winner": "VER"})
+    write_bundles(data_dir, years=[2024])
+    new = index(data_dir)["bundles"]["2024"]["file"]
+
+    assert new != old
+    files = set(os.listdir(bundle_dir(data_dir)))
+    assert not any(f.startswith(old) for f in files)
+    assert {new, f"{new}.gz"} <= files
+    assert not any(f.endswith(".tmp") for f in files)
+
+
+def test_partial_rebuild_merges_into_the_index(tmp_path):
+    data_dir = str(tmp_path)
+    seed(data_dir)
+    write_bundles(data_dir)
+    before = index(data_dir)["bundles"]
+
+    write(os.path.join(data_dir, "2025", "race_4.json"), {"round": 4})
+    report = write_bundles(data_dir, years=[2025])
+    after = index(data_dir)["bundles"]
+
+    assert report["seasons"] == 1
+    assert after["2024"] == before["2024"]
+    assert after["2025"] != before["2025"]
+    assert json.loads(load_bundle(data_dir, 2025))["races"] == {"3": {"round": 3}, "4": {"round": 4}}
+    assert os.path.exists(os.path.join(bundle_dir(data_dir), after["2024"]["file"]))
+
+
+def test_index_from_another_version_is_rebuilt(tmp_path):
+    data_dir = str(tmp_path)
+    seed(data_dir)
+    write(os.path.join(bundle_dir(data_dir), INDEX_FILE), {"version": 0, "bundles": {"1999": {"file": "x"}}})
+    write_bundles(data_dir, years=[2025])
+    assert list(index(data_dir)["bundles"]) == ["2025"]
+
@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+
+from stratx.data.decimation import decimate, lttb, minmax
+
+
+def series(size=1000, seed=0):
+    rng = np.random.default_rng(seed)
+    x = np.arange(size, dtype=np.float64)
+    y = np.cumsum(rng.normal(size=size))
+    return x, y
+
+
+def sequential_lttb(x, y, n):
+    """Textbook LTTB, one bucket at a time, on the same bucket edges."""
+    size = len(x)
+    edges = np.linspace(1, size - 1, n - 1).astype(np.int64)
+    chosen, anchor = [0], 0
+    for b, (start, end) in enumerate(zip(edges[:-1], edges[1:])):
+        if b + 1 < len(edges) - 1:
+            nxt = slice(edges[b + 1], edges[b + 2])
+            cx, cy = x[nxt].mean(), y[nxt].mean()
+        else:
+            cx, cy = x[-1], y[-1]
+        ax, ay = x[anchor], y[anchor]
+        bx, by = x[start:end], y[start:end]
+        anchor = start + int(np.argmax(np.abs((ax - cx) * (by - ay) - (ax - bx) * (cy - ay))))
+        chosen.append(anchor)
+    return np.array(chosen + [size - 1])
+
+
+@pytest.mark.parametrize("n", [3, 10, 100, 500])
+def test_lttb_keeps_endpoints_and_returns_n_points(n):
+    x, y = series()
+    idx = lttb(x, y, n)
+    assert len(idx) == n
+    assert idx[0] == 0 and idx[-1] == len(x) - 1
+    assert np.all(np.diff(idx) > 0)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_lttb_matches_the_sequential_algorithm(seed):
+    x, y = series(size=777, seed=seed)
+    np.testing.assert_array_equal(lttb(x, y, 60), sequential_lttb(x, y, 60))
+
+
+def test_short_series_are_returned_whole():
+    x, y = series(size=50)
+    np.testing.assert_array_equal(lttb(x, y, 50), np.arange(50))
+    np.testing.assert_array_equal(minmax(y, 80), np.arange(50))
+
+
+@pytest.mark.parametrize("n", [4, 20, 101])
+def test_minmax_keeps_endpoints_and_bucket_extremes(n):
+    x, y = series()
+    idx = minmax(y, n)
+    assert idx[0] == 0 and idx[-1] == len(y) - 1
+    assert len(idx) <= 2 * (n // 2) + 2
+    edges = np.linspace(0, len(y), n // 2 + 1).astype(np.int64)
+    kept = set(idx.tolist())
+    for start, end in zip(edges[:-1], edges[1:]):
+        bucket = y[start:end]
+        assert start + int(np.argmin(bucket)) in kept
+        assert start + int(np.argmax(bucket)) in kept
+
+
+def test_minmax_keeps_a_single_sample_spike():
+    y = np.zeros(10_000)
+    y[4321] = 1.0
+    assert 4321 in minmax(y, 50)
+
+
+def test_minmax_ignores_nan():
+    x, y = series()
+    y[100:110] = np.nan
+    idx = minmax(y, 40)
+    assert not np.isnan(y[idx[1:-1]]).any()
+
+
+def test_unknown_method_raises():
+    x, y = series()
+    with pytest.raises(ValueError):
+        decimate(x, y, 10, method="mean")
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from stratx.data.delta_time import NS, compare, integrate_distance, lap_bounds, lap_trace
+
+T0 = 1_716_123_600 * 10**9  # 2024-05-19T13:00:00Z
+
+
+def car_data(lap_seconds, laps=3, hz=4, speed_kmh=180.0, start_ns=T0):
+    """Constant-speed samples over `laps` laps of `lap_seconds` each, plus the lap boundaries."""
+    duration = lap_seconds * laps
+    dates = start_ns + (np.arange(int(duration * hz) + 1) * NS / hz).astype(np.int64)
+    speed = np.full(len(dates), speed_kmh)
+    bounds = start_ns + (np.arange(laps + 1) * lap_seconds * NS).astype(np.int64)
+    return dates, speed, bounds
+
+
+def test_integrate_distance_at_constant_speed():
+    dates, speed, _ = car_data(10, laps=1, speed_kmh=36.0)
+    distance = integrate_distance(dates, speed)
+    assert distance[0] == 0.0
+    assert distance[-1] == pytest.approx(100.0)
+
+
+def test_lap_trace_rescales_laps_end_to_end():
+    dates, speed, bounds = car_data(100)
+    trace = lap_trace(dates, speed, bounds, lap_length=5000.0)
+    assert trace.distance[0] == 0.0 and trace.distance[-1] == pytest.approx(15000.0)
+    assert np.all(np.diff(trace.distance) >= 0)
+    np.testing.assert_allclose(trace.lap_lengths, 5000.0)
+
+
+def test_identical_laps_have_zero_delta():
+    ref = car_data(100)
+    # Same driving, a different session clock offset
+    other = car_data(100, start_ns=T0 + 37 * NS)
+    result = compare({1: ref, 44: other}, reference=1, points=500)
+    assert result["lap_length"] == pytest.approx(5000.0)
+    for driver in result["drivers"]:
+        assert driver["available"]
+        np.testing.assert_allclose(driver["delta"], 0.0, atol=1e-3)
+
+
+def test_slower_driver_has_growing_positive_delta():
+    ref = car_data(100)
+    slower = car_data(101, speed_kmh=180.0 * 100 / 101)
+    result = compare({1: ref, 44: slower}, reference=1, points=301)
+    delta = np.array(next(d for d in result["drivers"] if d["driver"] == 44)["delta"])
+    assert delta[0] == pytest.approx(0.0, abs=1e-3)
+    assert delta[-1] == pytest.approx(3.0, abs=0.01)
+    assert np.all(np.diff(delta) >= -1e-3)
+
+
+def test_driver_without_samples_is_unavailable():
+    dates, speed, bounds = car_data(100)
+    result = compare({1: (dates, speed, bounds), 44: (dates[:0], speed[:0], bounds)}, reference=1)
+    assert next(d for d in result["drivers"] if d["driver"] == 44) == {"driver": 44, "available": False}
+
+
+def test_lap_bounds_from_openf1_laps():
+    laps = [
+        {"lap_number": 1, "date_start": "2024-05-19T13:00:00+00:00", "lap_duration": 95.0},
+        {"lap_number": 2, "date_start": "2024-05-19T13:01:35+00:00", "lap_duration": 90.5},
+        {"lap_number": 3, "date_start": "2024-05-19T13:03:05.500000+00:00", "lap_duration": 90.0},
+    ]
+    np.testing.assert_array_equal(lap_bounds(laps, 1, 2), [T0, T0 + 95 * NS, T0 + int(185.5 * NS)])
+    # The last lap ends at its start plus its duration
+    assert lap_bounds(laps, 3, 3)[-1] == T0 + int(275.5 * NS)
+    assert lap_bounds(laps, 2, 4) is None
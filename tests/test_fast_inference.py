@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import GradientBoostingRegressor
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+from stratx.ml.fast_inference import CompiledLapTimeModel
+from stratx.ml.features import CATEGORICAL_FEATURES, LAP_TIME_FEATURES, NUMERICAL_FEATURES
+
+DRIVERS = ['VER', 'HAM', 'LEC', 'NOR']
+TEAMS = ['Red Bull', 'Mercedes', 'Ferrari', 'McLaren']
+CIRCUITS = ['Monza', 'Imola']
+COMPOUNDS = ['SOFT', 'MEDIUM', 'HARD']
+
+
+def laps(n, seed=0):
+    rng = np.random.default_rng(seed)
+    driver = rng.integers(len(DRIVERS), size=n)
+    df = pd.DataFrame({
+        'Driver': [DRIVERS[i] for i in driver],
+        'Team': [TEAMS[i] for i in driver],
+        'Circuit': rng.choice(CIRCUITS, size=n),
+        'Compound': rng.choice(COMPOUNDS, size=n),
+        'TyreLife': rng.integers(1, 40, size=n).astype(float),
+        'LapNumber': rng.integers(1, 60, size=n).astype(float),
+        'TrackTemp': rng.uniform(20, 50, size=n),
+    })
+    y = (80 + 0.05 * df['TyreLife'] - 0.02 * df['LapNumber'] + 0.5 * driver
+         + df['Compound'].map({'SOFT': 0.0, 'MEDIUM': 0.4, 'HARD': 0.8}) + rng.normal(0, 0.1, size=n))
+    return df[LAP_TIME_FEATURES], y
+
+
+def gbr_pipeline(handle_unknown='ignore'):
+    # Same layout as train.build_gbr_pipeline, small enough to fit in a test
+    preprocessor = ColumnTransformer(transformers=[
+        ('num', StandardScaler(), NUMERICAL_FEATURES),
+        ('cat', OneHotEncoder(handle_unknown=handle_unknown), CATEGORICAL_FEATURES),
+    ])
+    return Pipeline(steps=[
+        ('preprocessor', preprocessor),
+        ('regressor', GradientBoostingRegressor(n_estimators=30, max_depth=4, random_state=0)),
+    ])
+
+
+@pytest.fixture(scope="module")
+def pipeline():
+    return gbr_pipeline().fit(*laps(400))
+
+
+def unseen_rows():
+    X, _ = laps(50, seed=1)
+    # Categories the encoder never saw: their one-hot blocks stay empty
+    X.loc[::3, 'Driver'] = 'ZZZ'
+    X.loc[1::4, 'Circuit'] = 'Baku'
+    X.loc[2::5, 'Compound'] = 'INTERMEDIATE'
+    return X
+
+
+@pytest.mark.parametrize("rows", [lambda: laps(50, seed=1)[0], unseen_rows])
+def test_compiled_model_matches_pipeline(pipeline, rows):
+    X = rows()
+    compiled = CompiledLapTimeModel.from_pipeline(pipeline)
+    expected = pipeline.predict(X)
+    records = X.to_dict('records')
+
+    np.testing.assert_allclose(compiled.predict_matrix(compiled.encode(records)), expected, rtol=0, atol=1e-9)
+    np.testing.assert_allclose([compiled.predict_one(r) for r in records], expected, rtol=0, atol=1e-9)
+    np.testing.assert_allclose(compiled.predict(X), expected, rtol=0, atol=1e-9)
+
+
+def test_save_load_round_trip_is_memory_mapped(pipeline, tmp_path):
+    path = str(tmp_path / 'model.compiled.joblib')
+    compiled = CompiledLapTimeModel.from_pipeline(pipeline, source_digest='abc')
+    compiled.save(path)
+
+    loaded = CompiledLapTimeModel.load(path)
+    assert loaded.source_digest == 'abc'
+    assert isinstance(loaded.threshold, np.memmap) and isinstance(loaded.left, np.memmap)
+    X = unseen_rows()
+    np.testing.assert_array_equal(loaded.predict(X), compiled.predict(X))
+
+
+def test_load_rejects_other_files(tmp_path):
+    import joblib
+    path = str(tmp_path / 'other.joblib')
+    joblib.dump({'format_version': -1}, path)
+    with pytest.raises(ValueError):
+        CompiledLapTimeModel.load(path)
+
+
+def test_pipeline_rejecting_unknown_categories_is_not_compiled():
+    # The compiled encoder ignores unknown categories, so it cannot stand in for one that raises
+    with pytest.raises(ValueError):
+        CompiledLapTimeModel.from_pipeline(gbr_pipeline(handle_unknown='error').fit(*laps(100)))
@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+from stratx.ml.grid import GridSimulator, _gap_seconds, cars_from_openf1
+
+
+def cars():
+    return [
+        {"driver_number": 1, "gap": 0.0, "pace": 90.0, "compound": "MEDIUM", "tyre_age": 10},
+        {"driver_number": 4, "gap": 1.2, "pace": 89.8, "compound": "HARD", "tyre_age": 4},
+        {"driver_number": 16, "gap": 3.5, "pace": 90.1, "compound": "SOFT", "tyre_age": 2},
+        {"driver_number": 44, "gap": 12.0, "pace": 90.4, "compound": "MEDIUM", "tyre_age": 20},
+    ]
+
+
+def test_output_shape():
+    result = GridSimulator(samples=200, seed=0).simulate(cars(), current_lap=30, total_laps=50, horizon=3)
+    d = len(cars())
+    assert result["drivers"] == [1, 4, 16, 44]
+    assert result["samples"] == 200 and result["horizon"] == 3
+    positions = np.array(result["position_probabilities"])
+    assert positions.shape == (d, d)
+    # Every car finishes somewhere, every position is taken by someone
+    np.testing.assert_allclose(positions.sum(axis=1), 1.0, atol=0.01)
+    np.testing.assert_allclose(positions.sum(axis=0), 1.0, atol=0.01)
+    assert len(result["expected_position"]) == d
+    assert sum(result["expected_position"]) == pytest.approx(d * (d + 1) / 2, abs=0.05)
+
+
+def test_ahead_matrix_is_complementary():
+    ahead = np.array(GridSimulator(samples=500, seed=3).simulate(cars(), 30, 50, horizon=5)["ahead_probability"])
+    off_diagonal = ~np.eye(len(ahead), dtype=bool)
+    np.testing.assert_allclose((ahead + ahead.T)[off_diagonal], 1.0, atol=1e-9)
+    assert np.all(np.diag(ahead) == 0.0)
+
+
+def test_seeded_runs_are_deterministic():
+    first = GridSimulator(samples=300, seed=7).simulate(cars(), 30, 50)
+    assert GridSimulator(samples=300, seed=7).simulate(cars(), 30, 50) == first
+    assert GridSimulator(samples=300, seed=8).simulate(cars(), 30, 50) != first
+
+
+def test_horizon_is_clipped_to_the_remaining_laps():
+    result = GridSimulator(samples=50, seed=0).simulate(cars(), current_lap=49, total_laps=50, horizon=10)
+    assert result["horizon"] == 1
+    assert GridSimulator(samples=50, seed=0).simulate([], 10, 50)["drivers"] == []
+
+
+@pytest.mark.parametrize("value, expected", [
+    (None, None), (1.5, 1.5), ("+2.345", 2.345), ("+1 LAP", 90.0), ("+2 LAPS", 180.0), ("DNF", None),
+])
+def test_gap_seconds(value, expected):
+    assert _gap_seconds(value, pace=90.0) == expected
+
+
+def test_cars_from_openf1_orders_by_gap_and_places_unknown_last():
+    laps = [{"driver_number": d, "lap_number": n, "lap_duration": 91.0} for d in (1, 44, 63) for n in (1, 2, 3)]
+    intervals = [
+        {"driver_number": 1, "gap_to_leader": None, "date": "2024-05-19T13:05:00"},
+        {"driver_number": 44, "gap_to_leader": 4.0, "date": "2024-05-19T13:04:00"},
+        {"driver_number": 44, "gap_to_leader": "+1 LAP", "date": "2024-05-19T13:05:00"},
+    ]
+    stints = [
+        {"driver_number": 1, "stint_number": 1, "compound": "SOFT", "lap_start": 1, "tyre_age_at_start": 0},
+        {"driver_number": 1, "stint_number": 2, "compound": "hard", "lap_start": 3, "tyre_age_at_start": 2},
+    ]
+    state = cars_from_openf1(laps, intervals, stints, lambda d, driver_laps: 90.0 + d / 100)
+    assert state["current_lap"] == 3
+    assert [c["driver_number"] for c in state["cars"]] == [1, 44, 63]
+    leader, lapped, unknown = state["cars"]
+    assert leader["gap"] == 0.0 and leader["compound"] == "HARD" and leader["tyre_age"] == 3
+    assert lapped["gap"] == pytest.approx(90.44)  # latest interval: one lap at its own pace
+    assert unknown["gap"] > lapped["gap"] and unknown["compound"] == "MEDIUM"
@@ -0,0 +1,77 @@
+import asyncio
+
+from stratx.data.incremental import IncrementalFetcher
+
+
+class ScriptedClient:
+    """Stands in for AsyncOpenF1Client: replies from a list per endpoint and records the params."""
+
+    def __init__(self, replies):
+        self.replies = replies
+        self.calls = []
+
+    async def fetch(self, endpoint, params):
+        self.calls.append((endpoint, dict(params)))
+        return self.replies[endpoint].pop(0)
+
+
+def lap(driver, number, duration=None):
+    return {"driver_number": driver, "lap_number": number, "lap_duration": duration}
+
+
+def test_lap_cursor_is_the_lowest_latest_lap():
+    buffer = [lap(1, 10), lap(1, 11), lap(1, 12), lap(44, 10), lap(44, 11), {"driver_number": 2}]
+    assert IncrementalFetcher._lap_cursor(buffer) == 11
+    assert IncrementalFetcher._lap_cursor([]) is None
+
+
+def test_lapped_cars_open_laps_are_refreshed():
+    client = ScriptedClient({"/laps": [
+        # Leader on lap 12, a lapped car still on lap 11 with no duration yet
+        [lap(1, 11, 90.1), lap(1, 12), lap(44, 10, 91.0), lap(44, 11)],
+        # Re-requested from lap 11: the lapped car's lap completes, the leader starts lap 13
+        [lap(1, 11, 90.1), lap(1, 12, 90.3), lap(1, 13), lap(44, 11, 91.4)],
+        # The cursor holds at 11 until the lapped car starts lap 12
+        [lap(44, 12)],
+        [],
+    ]})
+    fetcher = IncrementalFetcher(client)
+
+    async def run():
+        first = await fetcher.poll("/laps", 9999)
+        second = await fetcher.poll("/laps", 9999)
+        await fetcher.poll("/laps", 9999)
+        await fetcher.poll("/laps", 9999)
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert len(first) == 4
+    # Only changed or new laps come back; the completed lap 11 of car 44 replaces its open copy
+    assert second == [lap(1, 12, 90.3), lap(1, 13), lap(44, 11, 91.4)]
+    buffered = fetcher.rows("/laps", 9999)
+    assert len(buffered) == 6
+    assert lap(44, 11, 91.4) in buffered and lap(44, 11) not in buffered
+
+    filters = [{k: v for k, v in params.items() if k != "session_key"} for _, params in client.calls]
+    assert filters == [{}, {"lap_number>=": 11}, {"lap_number>=": 11}, {"lap_number>=": 12}]
+
+
+def test_dated_polls_overlap_and_skip_rows_already_seen():
+    client = ScriptedClient({"/intervals": [
+        [{"driver_number": 1, "date": "2024-05-19T13:00:01+00:00"},
+         {"driver_number": 4, "date": "2024-05-19T13:00:02+00:00"}],
+        # The overlap window repeats car 4's row and brings a late row of car 16
+        [{"driver_number": 4, "date": "2024-05-19T13:00:02+00:00"},
+         {"driver_number": 16, "date": "2024-05-19T13:00:01.500000+00:00"},
+         {"driver_number": 1, "date": "2024-05-19T13:00:03+00:00"}],
+    ]})
+    fetcher = IncrementalFetcher(client, overlap_seconds=2.0)
+
+    async def run():
+        await fetcher.poll("/intervals", 9999)
+        return await fetcher.poll("/intervals", 9999)
+
+    new_rows = asyncio.run(run())
+    assert [r["driver_number"] for r in new_rows] == [16, 1]
+    assert client.calls[1][1]["date>"] == "2024-05-19T13:00:00+00:00"
+    assert [r["driver_number"] for r in fetcher.rows("/intervals", 9999)] == [1, 16, 4, 1]
@@ -0,0 +1,170 @@
+import asyncio
+
+from conftest import json_reply
+
+from stratx.api import live_feed
+from stratx.api.live_feed import FeedSubscriber, LiveFeedHub, SessionFeed
+from stratx.data.incremental import IncrementalFetcher
+from stratx.data.openf1_client import AsyncOpenF1Client
+from stratx.data.session_store import SessionStore
+
+FINISHED = [{"session_key": 9000, "date_end": "2024-05-19T15:00:00+00:00"}]
+LAPS = [
+    {"driver_number": 1, "lap_number": 1, "lap_duration": 92.0, "date_start": "2024-05-19T13:03:00+00:00"},
+    {"driver_number": 1, "lap_number": 2, "lap_duration": 91.0, "date_start": "2024-05-19T13:04:32+00:00"},
+    {"driver_number": 44, "lap_number": 1, "lap_duration": 92.5, "date_start": "2024-05-19T13:03:01+00:00"},
+]
+CAR_DATA = [{"driver_number": 1, "date": "2024-05-19T13:05:00+00:00", "speed": 301, "rpm": 11800,
+             "n_gear": 8, "throttle": 100, "brake": 0, "drs": 12}]
+
+
+def openf1(path, params):
+    if path.endswith("/sessions"):
+        return json_reply(FINISHED)
+    if path.endswith("/laps"):
+        return json_reply(LAPS)
+    if path.endswith("/car_data"):
+        return json_reply(CAR_DATA)
+    return json_reply([])
+
+
+class FakePredictor:
+    def __init__(self):
+        self.batches = []
+
+    def observe_laps(self, session_key, laps):
+        return len(laps)
+
+    def predict_next_lap_times_batch(self, items):
+        self.batches.append(items)
+        return [90.0 + len(item['current_laps']) for item in items]
+
+
+class FakeFetcher:
+    """No upstream: /laps raises `failures` times, everything else is empty."""
+
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.cursors = {}
+
+    async def poll(self, endpoint, session_key, driver_number=None):
+        if endpoint == "/laps" and self.failures:
+            self.failures -= 1
+            raise RuntimeError("upstream down")
+        return []
+
+    def cursor(self, endpoint, session_key, driver_number=None):
+        return self.cursors.get(endpoint)
+
+    def seed_cursor(self, endpoint, session_key, cursor, driver_number=None):
+        self.cursors.setdefault(endpoint, cursor)
+
+    def rows(self, endpoint, session_key, driver_number=None):
+        return []
+
+
+def event_name(frame):
+    return frame.split(b"\n", 1)[0].decode()
+
+
+def test_subscriber_gets_a_snapshot_then_the_deltas(stub_server):
+    server = stub_server(openf1)
+    predictor = FakePredictor()
+
+    async def run():
+        client = AsyncOpenF1Client(base_url=server.url)
+        hub = LiveFeedHub(IncrementalFetcher(client, store=SessionStore()), predictor=lambda: predictor,
+                          interval=60.0)
+        subscriber = hub.subscribe(9000)
+        try:
+            frames = [await asyncio.wait_for(subscriber.queue.get(), 5.0) for _ in range(4)]
+        finally:
+            await hub.shutdown()
+            await client.aclose()
+        return frames
+
+    frames = asyncio.run(run())
+    assert [event_name(f) for f in frames] == ["event: snapshot", "event: laps", "event: telemetry",
+                                               "event: predictions"]
+    # Each driver is scored with its own laps
+    assert [len(item['current_laps']) for item in predictor.batches[0]] == [2, 1]
+
+
+def test_first_car_data_poll_starts_at_the_latest_lap(stub_server):
+    server = stub_server(openf1)
+
+    async def run():
+        client = AsyncOpenF1Client(base_url=server.url)
+        feed = SessionFeed(9000, IncrementalFetcher(client, store=SessionStore(), overlap_seconds=2.0))
+        try:
+            await feed.tick()
+            await feed.tick()
+        finally:
+            await client.aclose()
+
+    asyncio.run(run())
+    car_data = [params for path, params in server.requests if path == "/car_data"]
+    filters = [[name for name in params if name.startswith("date>")] for params in car_data]
+    # Latest lap started 13:04:32, minus the 2 s overlap; then from the newest sample
+    assert filters == [["date>2024-05-19T13:04:30+00:00"], ["date>2024-05-19T13:04:58+00:00"]]
+
+
+def test_slow_subscriber_is_dropped():
+    async def run():
+        feed = SessionFeed(9000, FakeFetcher())
+        slow, fast = FeedSubscriber(9000, queue_size=2), FeedSubscriber(9000, queue_size=8)
+        feed.subscribers = {slow, fast}
+        remaining = [feed.publish("laps", [{"lap_number": n}]) for n in range(3)]
+        return remaining, slow, fast, feed
+
+    remaining, slow, fast, feed = asyncio.run(run())
+    assert remaining == [2, 2, 1]
+    assert slow.dropped and feed.subscribers == {fast}
+    # Its backlog is discarded; the stream just ends
+    assert slow.queue.qsize() == 1 and slow.queue.get_nowait() is live_feed._CLOSE
+    assert fast.queue.qsize() == 3
+
+
+def test_poller_stops_with_its_last_subscriber():
+    async def run():
+        hub = LiveFeedHub(FakeFetcher(), interval=0.01)
+        first, second = hub.subscribe(9000), hub.subscribe(9000)
+        task = hub.feeds[9000].task
+        assert hub.subscribe(9001) is not None and hub.feeds[9001].task is not task
+        await asyncio.sleep(0.05)
+        assert hub.feeds[9000].ticks > 0
+        hub.unsubscribe(first)
+        await asyncio.sleep(0)
+        assert not task.done()
+        hub.unsubscribe(second)
+        assert 9000 not in hub.feeds
+        # Cancellation unwinds through the gathered polls, which can take a few loop iterations
+        await asyncio.wait([task], timeout=1.0)
+        stopped = task.cancelled()
+        await hub.shutdown()
+        return stopped
+
+    assert asyncio.run(run())
+
+
+def test_poller_backs_off_on_upstream_errors(monkeypatch):
+    delays = []
+    sleep = asyncio.sleep
+
+    async def record_sleep(delay):
+        delays.append(delay)
+        await sleep(0)
+
+    async def run():
+        feed = SessionFeed(9000, FakeFetcher(failures=6), interval=1.0)
+        monkeypatch.setattr(asyncio, "sleep", record_sleep)
+        task = asyncio.get_running_loop().create_task(feed.run())
+        while len(delays) < 8:
+            await sleep(0)
+        task.cancel()
+        return feed.ticks
+
+    ticks = asyncio.run(run())
+    # Doubling up to 30 s while it fails, back to the poll interval once it recovers
+    assert delays[:8] == [2.0, 4.0, 8.0, 16.0, 30.0, 30.0, 1.0, 1.0]
+    assert ticks >= 2
@@ -0,0 +1,78 @@
+import pytest
+
+from stratx.metrics import Counter, Histogram, Registry, _Metric, upstream_call, UPSTREAM_REQUESTS
+
+
+def sample_lines(registry):
+    return [line for line in registry.render().splitlines() if not line.startswith("#")]
+
+
+def test_metric_base_is_abstract():
+    with pytest.raises(TypeError):
+        _Metric("x", "no samples")
+
+
+def test_counter_renders_help_type_and_escaped_labels():
+    registry = Registry()
+    counter = registry.counter("requests_total", "Requests", ["path"])
+    counter.inc(path='/a"b\\c\nd')
+    counter.inc(2, path="/plain")
+    lines = registry.render().splitlines()
+    assert lines[:2] == ["# HELP requests_total Requests", "# TYPE requests_total counter"]
+    assert 'requests_total{path="/a\\"b\\\\c\\nd"} 1' in lines
+    assert 'requests_total{path="/plain"} 2' in lines
+
+
+def test_counter_rejects_wrong_labels():
+    counter = Counter("c", "help", ["a"])
+    with pytest.raises(ValueError):
+        counter.inc(b="x")
+
+
+def test_histogram_buckets_are_cumulative_and_end_in_inf():
+    registry = Registry()
+    histogram = registry.histogram("latency_seconds", "Latency", ["route"], buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.7, 3.0):
+        histogram.observe(value, route="/x")
+    assert sample_lines(registry) == [
+        'latency_seconds_bucket{route="/x",le="0.1"} 1',
+        'latency_seconds_bucket{route="/x",le="1"} 3',
+        'latency_seconds_bucket{route="/x",le="+Inf"} 4',
+        'latency_seconds_sum{route="/x"} 4.25',
+        'latency_seconds_count{route="/x"} 4',
+    ]
+    assert histogram.count(route="/x") == 4
+
+
+def test_histogram_boundary_value_lands_in_its_bucket():
+    histogram = Histogram("h", "help", buckets=(1.0,))
+    histogram.observe(1.0)
+    assert histogram.render()[2] == 'h_bucket{le="1"} 1'
+
+
+def test_broken_collector_does_not_break_the_scrape():
+    registry = Registry()
+    registry.counter("ok_total", "fine").inc()
+
+    def broken():
+        raise RuntimeError("gone")
+
+    registry.gauge_callback("broken", "raises", broken)
+    text = registry.render()
+    assert "ok_total 1" in text
+    assert "# broken unavailable: gone" in text
+
+
+def test_upstream_call_counts_ok_and_error():
+    labels = {"service": "test", "endpoint": "/upstream_call"}
+    ok_before = UPSTREAM_REQUESTS.value(outcome="ok", **labels)
+    error_before = UPSTREAM_REQUESTS.value(outcome="error", **labels)
+
+    with upstream_call(**labels):
+        pass
+    with pytest.raises(OSError):
+        with upstream_call(**labels):
+            raise OSError("down")
+
+    assert UPSTREAM_REQUESTS.value(outcome="ok", **labels) == ok_before + 1
+    assert UPSTREAM_REQUESTS.value(outcome="error", **labels) == error_before + 1
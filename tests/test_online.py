@@ -0,0 +1,70 @@
+import pytest
+
+from stratx.ml.online import OnlineLapTimeModel
+
+
+def pace(lap_number, tyre_age):
+    return 90.0 - 0.06 * lap_number + 0.05 * tyre_age
+
+
+def lap(number, duration, driver=1, pit_out=False):
+    return {"driver_number": driver, "lap_number": number, "lap_duration": duration, "is_pit_out_lap": pit_out}
+
+
+def stint(first, last, stint_start=1, driver=1):
+    return [lap(n, pace(n, n - stint_start + 1), driver) for n in range(first, last + 1)]
+
+
+def test_standing_start_open_and_duplicate_laps_are_skipped():
+    model = OnlineLapTimeModel()
+    laps = stint(1, 8) + [lap(9, None)]
+    # Lap 1 (standing start) and the open lap 9 are not used
+    assert model.observe(9999, laps) == 7
+    assert model.observe(9999, stint(1, 8)) == 0
+    assert model.coefficients(9999, "1")["laps_used"] == 7
+    assert model.predict(9999, "1") == pytest.approx(pace(9, 9), abs=0.05)
+
+
+def test_outliers_are_skipped_once_the_fit_has_enough_laps():
+    model = OnlineLapTimeModel(outlier_seconds=3.0, min_laps=3)
+    model.observe(9999, stint(1, 8))
+    before = model.coefficients(9999, "1")
+    # A safety car lap, far off the fit
+    assert model.observe(9999, [lap(9, pace(9, 9) + 25.0)]) == 0
+    assert model.coefficients(9999, "1") == before
+    # The lap still counts as seen: the next prediction is for lap 10
+    assert model.predict(9999, "1") == pytest.approx(pace(10, 10), abs=0.05)
+
+
+def test_early_laps_are_not_judged_as_outliers():
+    model = OnlineLapTimeModel(outlier_seconds=3.0, min_laps=3)
+    assert model.observe(9999, [lap(2, 90.0), lap(3, 95.0)]) == 2
+    assert model.predict(9999, "1") is None
+
+
+def test_pit_out_lap_is_skipped_and_restarts_the_stint():
+    model = OnlineLapTimeModel()
+    model.observe(9999, stint(1, 15))
+    # Lap 16 is the slow pit out lap on fresh tyres
+    assert model.observe(9999, [lap(16, pace(16, 1) + 20.0, pit_out=True)]) == 0
+    assert model.coefficients(9999, "1")["laps_used"] == 14
+    # Tyre age counts from the pit out lap: lap 17 is the second lap of the new stint
+    assert model.predict(9999, "1") == pytest.approx(pace(17, 2), abs=0.05)
+    assert model.observe(9999, stint(17, 20, stint_start=16)) == 4
+
+
+def test_drivers_are_fitted_separately():
+    model = OnlineLapTimeModel()
+    slower = [dict(l, lap_duration=l["lap_duration"] + 1.0) for l in stint(1, 8, driver=44)]
+    assert model.observe(9999, stint(1, 8) + slower) == 14
+    assert model.predict(9999, "44") - model.predict(9999, "1") == pytest.approx(1.0, abs=0.05)
+    assert model.predict(1234, "1") is None
+
+
+def test_residual_offset_is_learned_from_remembered_predictions():
+    model = OnlineLapTimeModel()
+    model.observe(9999, stint(1, 5))
+    assert model.correct(9999, "1", 88.0) == 88.0
+    model.observe(9999, [lap(6, 89.0)])
+    corrected = model.correct(9999, "1", 88.0)
+    assert 88.0 < corrected < 89.0
@@ -0,0 +1,148 @@
+import asyncio
+import threading
+
+from conftest import json_reply
+
+from stratx.data.openf1_client import AsyncOpenF1Client, OpenF1Client
+
+LAPS = [{"driver_number": 1, "lap_number": 1, "lap_duration": 91.2}]
+FINISHED = [{"session_key": 9000, "date_end": "2024-05-19T15:00:00+00:00"}]
+
+
+def openf1(path, params):
+    if path.endswith("/sessions"):
+        return json_reply(FINISHED)
+    if path.endswith("/laps"):
+        return json_reply(LAPS)
+    if path.endswith("/broken"):
+        return 200, {"Content-Type": "application/json"}, b"{not json"
+    return json_reply({"detail": "server error"}, status=500)
+
+
+def test_async_client_reuses_pooled_connections(stub_server):
+    server = stub_server(openf1)
+
+    async def run():
+        client = AsyncOpenF1Client(base_url=server.url)
+        try:
+            await client.get_session(9000)
+            for driver in range(1, 6):
+                await client.get_laps(9000, driver)
+        finally:
+            await client.aclose()
+
+    asyncio.run(run())
+    # The session is finished, so it is not checked again; every request uses the first connection
+    assert server.calls("/sessions") == 1 and server.calls("/laps") == 5
+    assert len(server.connections) == 1
+
+
+def test_async_fetch_many_runs_concurrently(stub_server):
+    server = stub_server(openf1, delay=0.5)
+
+    async def run():
+        client = AsyncOpenF1Client(base_url=server.url, max_concurrency=8)
+        try:
+            loop = asyncio.get_running_loop()
+            started = loop.time()
+            results = await client.fetch_many([("/laps", {"driver_number": d}) for d in range(8)])
+            return results, loop.time() - started
+        finally:
+            await client.aclose()
+
+    results, elapsed = asyncio.run(run())
+    assert results == [LAPS] * 8
+    # One after another would take 8 x 0.5 s
+    assert elapsed < 2.0
+    assert len(server.connections) == 8
+
+
+def test_async_concurrent_identical_requests_coalesce(stub_server):
+    server = stub_server(openf1, delay=0.2)
+
+    async def run():
+        client = AsyncOpenF1Client(base_url=server.url)
+        try:
+            return await asyncio.gather(*(client.get_laps(9000) for _ in range(10))), client.cache.stats()
+        finally:
+            await client.aclose()
+
+    results, stats = asyncio.run(run())
+    assert all(r == LAPS for r in results)
+    assert server.calls("/laps") == 1
+    assert stats["coalesced"] == 9
+
+
+def test_sync_concurrent_identical_requests_coalesce(stub_server):
+    server = stub_server(openf1, delay=0.2)
+    client = OpenF1Client(base_url=server.url)
+    client.get_session(9000)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(client.get_laps(9000))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    client.close()
+    assert results == [LAPS] * 8
+    assert server.calls("/laps") == 1
+
+
+def test_errors_map_to_empty_list(stub_server):
+    server = stub_server(openf1)
+
+    async def run():
+        client = AsyncOpenF1Client(base_url=server.url)
+        try:
+            return await client.fetch_many([("/pit", {"session_key": 9000}), ("/broken", None)])
+        finally:
+            await client.aclose()
+
+    assert asyncio.run(run()) == [[], []]
+    client = OpenF1Client(base_url=server.url)
+    assert client.get_pit_stops(9000) == []
+    client.close()
+
+
+def test_unreachable_server_maps_to_empty_list(stub_server):
+    server = stub_server(openf1)
+    url = server.url
+    server.close()
+
+    async def run():
+        client = AsyncOpenF1Client(base_url=url, timeout=1.0)
+        try:
+            return (await client.fetch_many([("/laps", {"driver_number": 1})]))[0]
+        finally:
+            await client.aclose()
+
+    assert asyncio.run(run()) == []
+    assert OpenF1Client(base_url=url, timeout=1.0)._fetch("/laps", {"driver_number": 1}) == []
+
+
+def test_errors_are_not_cached(stub_server):
+    replies = iter([json_reply({}, status=503), json_reply(LAPS)])
+    server = stub_server(lambda path, params: next(replies))
+
+    async def run():
+        client = AsyncOpenF1Client(base_url=server.url)
+        try:
+            return [(await client.fetch_many([("/laps", {"driver_number": 1})]))[0] for _ in range(2)]
+        finally:
+            await client.aclose()
+
+    assert asyncio.run(run()) == [[], LAPS]
+
+
+def test_async_client_survives_a_new_event_loop(stub_server):
+    server = stub_server(openf1)
+    client = AsyncOpenF1Client(base_url=server.url)
+
+    async def run(driver):
+        return await client.fetch("/laps", {"driver_number": driver})
+
+    # e.g. one TestClient per test, or a reload: the pool from the closed loop must not be reused
+    assert asyncio.run(run(1)) == LAPS
+    assert asyncio.run(run(2)) == LAPS
+    asyncio.run(client.aclose())
+    assert server.calls("/laps") == 2
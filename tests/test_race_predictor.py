@@ -0,0 +1,40 @@
+import numpy as np
+
+from stratx.metrics import INFERENCE_FALLBACKS
+from stratx.ml.race_predictor import RacePredictor
+
+
+class FakeModel:
+    """Stands in for CompiledLapTimeModel: 80 s + tyre life, and fails on driver 'BAD'."""
+
+    def predict_rows(self, rows):
+        if any(row['Driver'] == 'BAD' for row in rows):
+            raise ValueError("unknown driver")
+        return np.array([80.0 + row['TyreLife'] for row in rows])
+
+
+def item(driver, tyre_life=5, laps=(92.0, 93.0)):
+    return {
+        'driver_id': driver,
+        'current_laps': [{'lap_duration': t} for t in laps],
+        'context': {'Compound': 'MEDIUM', 'TyreLife': tyre_life, 'LapNumber': 10},
+    }
+
+
+def predictor(tmp_path):
+    predictor = RacePredictor(model_dir=str(tmp_path))
+    predictor.fast_lap_time_model = FakeModel()
+    return predictor
+
+
+def test_batch_scores_every_item_with_a_context(tmp_path):
+    batch = [item('VER', 3), item('HAM', 10), {'driver_id': 'NOR', 'current_laps': [{'lap_duration': 95.0}]}]
+    assert predictor(tmp_path).predict_next_lap_times_batch(batch) == [83.0, 90.0, 95.0]
+
+
+def test_only_failing_batch_items_fall_back(tmp_path):
+    before = INFERENCE_FALLBACKS.value(model="lap_time_batch")
+    batch = [item('VER', 3), item('BAD'), item('HAM', 'worn'), item('LEC', 7)]
+    # BAD trips the model, HAM's context cannot be featurized: both use their recent average
+    assert predictor(tmp_path).predict_next_lap_times_batch(batch) == [83.0, 92.5, 92.5, 87.0]
+    assert INFERENCE_FALLBACKS.value(model="lap_time_batch") - before == 2
@@ -0,0 +1,80 @@
+import asyncio
+import json
+from concurrent.futures import Future
+
+import numpy as np
+import pytest
+
+from stratx.api import race_results as rr
+
+
+@pytest.fixture(autouse=True)
+def empty_caches(monkeypatch):
+    monkeypatch.setattr(rr, "_RACE_DATA_CACHE", {})
+    monkeypatch.setattr(rr, "_DRIVER_PERFORMANCE_CACHE", {})
+    monkeypatch.setattr(rr, "_ENCODED_ROUNDS", {})
+    monkeypatch.setattr(rr, "_ENCODED_ALL", None)
+    monkeypatch.setattr(rr, "_ROUND_STATUS", {r: {"state": "pending"} for r in rr.ROUNDS})
+
+
+def load(round_number):
+    future = Future()
+    future.set_result(({"round": round_number, "results": []}, {}))
+    rr._round_loaded(round_number, 0.0, "snapshot", future)
+
+
+def season_rounds():
+    return [race["round"] for race in json.loads(rr._encoded_all().body)]
+
+
+def test_season_payload_follows_loaded_rounds():
+    load(2)
+    load(1)
+    assert season_rounds() == [1, 2]
+    assert rr._encoded_all() is rr._encoded_all()
+    load(3)
+    assert season_rounds() == [1, 2, 3]
+
+
+def test_round_loaded_while_joining_is_not_lost(monkeypatch):
+    load(1)
+    load(2)
+    join = rr.EncodedPayload.join
+
+    def join_racing_a_load(payloads):
+        # A round finishes in the executor's callback thread while the season is being joined
+        monkeypatch.setattr(rr.EncodedPayload, "join", join)
+        load(3)
+        return join(payloads)
+
+    monkeypatch.setattr(rr.EncodedPayload, "join", join_racing_a_load)
+    assert season_rounds() == [1, 2]  # built from the rounds there were when the request came in
+    # ...but not kept: the next request sees round 3
+    assert season_rounds() == [1, 2, 3]
+
+
+def test_driver_performance_serves_snapshot_laps(tmp_path, monkeypatch):
+    from stratx.data.race_snapshot import RaceSnapshotStore
+
+    store = RaceSnapshotStore(str(tmp_path))
+    store.save(rr.SEASON, 1, {"round": 1, "results": []}, {
+        "VER": {
+            "driver_number": "1", "fastest_lap": 90.5, "average_lap": 91.0, "total_laps": 3,
+            "stints": [], "finish_position": 1,
+            "lap_numbers": np.array([1, 2, -1], dtype=np.int16),
+            "lap_times": np.array([92.0, 90.5, np.nan]),
+        },
+    })
+    race, performance = store.load(rr.SEASON, 1)
+    assert isinstance(performance["VER"]["lap_times"], np.memmap)
+    future = Future()
+    future.set_result((race, performance))
+    rr._round_loaded(1, 0.0, "snapshot", future)
+
+    body = asyncio.run(rr.get_driver_race_performance("VER", 1))
+    assert body["laps"] == [
+        {"lap_number": 1, "lap_time": 92.0},
+        {"lap_number": 2, "lap_time": 90.5},
+        {"lap_number": None, "lap_time": None},
+    ]
+    json.dumps(body)
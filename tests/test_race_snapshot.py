@@ -0,0 +1,148 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from stratx.data.race_snapshot import RaceSnapshotStore
+
+DAY = 24 * 3600.0
+
+
+class Clock:
+    def __init__(self, now: float = 1_700_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def race():
+    return {"round": 3, "race_name": "Test Grand Prix", "total_laps": 2, "results": [
+        {"position": 1, "driver": "VER", "driver_number": 1, "team": "Red Bull Racing", "time": "1:30:00",
+         "points": 25, "status": "Finished", "grid_position": 2},
+    ]}
+
+
+def performance():
+    return {"VER": {"driver_number": "1", "lap_numbers": np.array([1, 2], dtype=np.int16),
+                    "lap_times": np.array([np.nan, 91.5]), "fastest_lap": "0 days 00:01:31.500000",
+                    "average_lap": "0 days 00:01:31.500000", "total_laps": 2, "stints": [],
+                    "finish_position": 1}}
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def source(tmp_path):
+    directory = tmp_path / "fastf1" / "2025_round_3"
+    directory.mkdir(parents=True)
+    (directory / "timing_data.ff1pkl").write_bytes(b"x" * 10)
+    return directory
+
+
+def store(tmp_path, clock, **kwargs):
+    return RaceSnapshotStore(str(tmp_path / "snapshots"), clock=clock, **kwargs)
+
+
+def test_fresh_snapshot_loads(tmp_path, clock, source):
+    store(tmp_path, clock).save(2025, 3, race(), performance(), str(source))
+    clock.now += DAY
+    assert store(tmp_path, clock).load(2025, 3) is not None
+
+
+def test_payload_version_change_invalidates(tmp_path, clock, source):
+    store(tmp_path, clock, payload_version=1).save(2025, 3, race(), performance(), str(source))
+    assert store(tmp_path, clock, payload_version=2).load(2025, 3) is None
+
+
+def test_max_age_invalidates(tmp_path, clock, source):
+    store(tmp_path, clock, max_age=2 * DAY).save(2025, 3, race(), performance(), str(source))
+    clock.now += 3 * DAY
+    assert store(tmp_path, clock, max_age=30 * DAY).load(2025, 3) is None
+    # A lower limit configured later applies to existing snapshots too
+    store(tmp_path, clock, max_age=30 * DAY).save(2025, 3, race(), performance(), str(source))
+    clock.now += 2 * DAY
+    assert store(tmp_path, clock, max_age=DAY).load(2025, 3) is None
+
+
+def test_wiped_source_is_kept_until_max_age(tmp_path, clock, source):
+    store(tmp_path, clock, max_age=2 * DAY).save(2025, 3, race(), performance(), str(source))
+    for name in os.listdir(source):
+        os.remove(source / name)
+    source.rmdir()
+    assert store(tmp_path, clock, max_age=2 * DAY).load(2025, 3) is not None
+    clock.now += 3 * DAY
+    assert store(tmp_path, clock, max_age=2 * DAY).load(2025, 3) is None
+
+
+def test_changed_source_invalidates(tmp_path, clock, source):
+    store(tmp_path, clock).save(2025, 3, race(), performance(), str(source))
+    (source / "timing_data.ff1pkl").write_bytes(b"y" * 20)
+    assert store(tmp_path, clock).load(2025, 3) is None
+
+
+def test_snapshot_without_age_is_stale(tmp_path, clock, source):
+    snapshots = store(tmp_path, clock)
+    snapshots.save(2025, 3, race(), performance(), str(source))
+    meta_path = os.path.join(snapshots.path(2025, 3), "meta.json")
+    with open(meta_path) as f:
+        meta = json.load(f)
+    del meta["created_at"]
+    with open(meta_path, "w") as f:
+        json.dump(meta, f)
+    assert snapshots.load(2025, 3) is None
+
+
+def fastf1_session():
+    """A loaded FastF1 race Session as _format_race/_distill_laps read it, with the usual gaps."""
+    import pandas as pd
+    from types import SimpleNamespace
+
+    results = pd.DataFrame({
+        "Position": [1.0, 2.0, np.nan],
+        "Abbreviation": ["VER", None, "HAM"],
+        "DriverNumber": ["1", "4", "44"],
+        "TeamName": ["Red Bull Racing", "McLaren", None],
+        "Time": [pd.Timedelta(seconds=5400.5), pd.Timedelta(seconds=3.2), pd.NaT],
+        "Points": [25.0, 18.0, np.nan],
+        "Status": ["Finished", None, "Retired"],
+        "GridPosition": [2.0, np.nan, 1.0],
+    })
+    laps = pd.DataFrame({
+        "Driver": ["VER", "VER", "VER", "HAM", "HAM"],
+        "DriverNumber": ["1", "1", "1", "44", "44"],
+        "LapNumber": [1.0, 2.0, 3.0, 1.0, 2.0],
+        "LapTime": pd.to_timedelta([np.nan, 91.25, 90.75, np.nan, 92.5], unit="s"),
+        "Stint": [1.0, 1.0, 2.0, 1.0, 1.0],
+        "Compound": ["MEDIUM", "MEDIUM", "HARD", "SOFT", "SOFT"],
+        "Position": [1.0, 1.0, 1.0, 2.0, np.nan],
+    })
+    event = pd.Series({"EventName": "Test Grand Prix", "Country": "Nowhere", "Location": "Somewhere",
+                       "OfficialEventName": "FORMULA 1 TEST GRAND PRIX 2025", "EventDate": pd.Timestamp("2025-03-16")})
+    return SimpleNamespace(results=results, laps=laps, event=event, total_laps=3)
+
+
+def test_snapshot_round_trips_a_fresh_payload(tmp_path, clock):
+    from stratx.api.race_results import _distill_laps, _format_race
+
+    session = fastf1_session()
+    fresh_race, fresh_performance = _format_race(session, 3), _distill_laps(session.laps)
+    assert any(None in (row["driver"], row["team"], row["status"]) for row in fresh_race["results"])
+
+    snapshots = store(tmp_path, clock)
+    snapshots.save(2025, 3, fresh_race, fresh_performance)
+    race, performance = snapshots.load(2025, 3)
+
+    assert race == fresh_race
+    assert json.dumps(race) == json.dumps(fresh_race)
+    assert performance.keys() == fresh_performance.keys()
+    for driver, fresh in fresh_performance.items():
+        restored = performance[driver]
+        for field in ("lap_numbers", "lap_times"):
+            np.testing.assert_array_equal(restored[field], fresh[field])
+        assert {k: v for k, v in restored.items() if not k.startswith("lap_")} == \
+            {k: v for k, v in fresh.items() if not k.startswith("lap_")}
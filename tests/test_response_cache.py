@@ -0,0 +1,54 @@
+from stratx.data.response_cache import ResponseCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def key(endpoint, **params):
+    return ResponseCache.make_key(endpoint, params)
+
+
+def test_byte_budget_evicts_least_recently_used():
+    cache = ResponseCache(max_bytes=100)
+    for driver in range(3):
+        cache.set(key("/car_data", session_key=9000, driver_number=driver), [driver], 9000, size=40)
+    # 120 bytes > 100: the oldest entry goes
+    assert cache.get(key("/car_data", session_key=9000, driver_number=0)) is None
+    assert cache.get(key("/car_data", session_key=9000, driver_number=2)) == [2]
+    assert cache.nbytes() == 80 and cache.stats()["evictions"] == 1
+
+
+def test_payload_over_the_budget_is_not_cached():
+    cache = ResponseCache(max_bytes=100)
+    cache.set(key("/laps", session_key=9000), ["small"], 9000, size=10)
+    cache.set(key("/car_data", session_key=9000), ["huge"], 9000, size=500)
+    assert cache.get(key("/car_data", session_key=9000)) is None
+    assert cache.get(key("/laps", session_key=9000)) == ["small"]
+    assert cache.nbytes() == 10
+
+
+def test_replacing_an_entry_updates_its_size():
+    cache = ResponseCache()
+    cache.set(key("/laps"), [1], size=30)
+    cache.set(key("/laps"), [1, 2], size=50)
+    assert len(cache) == 1 and cache.stats()["bytes"] == 50
+
+
+def test_cursor_queries_expire_even_for_finished_sessions():
+    clock = Clock()
+    cache = ResponseCache(ttls={"/car_data": 60.0}, cursor_ttl=1.0, clock=clock)
+    cache.mark_session_finished(9000)
+    full = key("/car_data", session_key=9000)
+    cursor = key("/car_data", **{"session_key": 9000, "date>": "2024-05-19T13:03:35"})
+    cache.set(full, ["all"], 9000, size=10)
+    cache.set(cursor, ["new"], 9000, size=10)
+    clock.now = 2.0
+    assert cache.get(cursor) is None
+    clock.now = 3600.0
+    assert cache.get(full) == ["all"]  # pinned
+    assert cache.nbytes() == 10
@@ -0,0 +1,93 @@
+import numpy as np
+
+from stratx.data.session_store import CAR_DATA_SCHEMA, POSITION_SCHEMA, ColumnBuffer, SessionStore
+from stratx.data.timeutils import NAT_NS
+
+
+def batch(dates, offset=0.0):
+    """Position columns whose x encodes the date, so misaligned columns are easy to spot."""
+    dates = np.asarray(dates, dtype=np.int64)
+    return {"date": dates, "x": dates + offset, "y": np.zeros(len(dates)), "z": np.zeros(len(dates))}
+
+
+def assert_aligned(buffer):
+    dates = buffer.column("date")
+    assert np.all(np.diff(dates) > 0)
+    np.testing.assert_array_equal(buffer.column("x"), dates.astype(np.float32))
+
+
+def test_append_in_order():
+    buffer = ColumnBuffer(POSITION_SCHEMA)
+    assert buffer.append(batch([1, 2, 3])) == 3
+    assert buffer.append(batch([4, 5])) == 2
+    np.testing.assert_array_equal(buffer.column("date"), [1, 2, 3, 4, 5])
+    assert_aligned(buffer)
+
+
+def test_overlapping_and_repeated_rows_are_skipped():
+    buffer = ColumnBuffer(POSITION_SCHEMA)
+    buffer.append(batch([10, 20, 30]))
+    # An overlapping poll repeats 20 and 30; the batch itself repeats 40
+    assert buffer.append(batch([20, 30, 40, 40, 50])) == 2
+    assert buffer.append(batch([30, 50])) == 0
+    np.testing.assert_array_equal(buffer.column("date"), [10, 20, 30, 40, 50])
+    assert_aligned(buffer)
+
+
+def test_late_rows_are_merged_in_date_order():
+    buffer = ColumnBuffer(POSITION_SCHEMA)
+    buffer.append(batch([10, 20, 30, 40]))
+    # Late rows land inside the tail, one before everything held, unsorted within the batch
+    assert buffer.append(batch([35, 5, 25, 45])) == 4
+    np.testing.assert_array_equal(buffer.column("date"), [5, 10, 20, 25, 30, 35, 40, 45])
+    assert_aligned(buffer)
+
+
+def test_rows_without_a_date_are_dropped():
+    buffer = ColumnBuffer(POSITION_SCHEMA)
+    assert buffer.append(batch([NAT_NS, 7, NAT_NS])) == 1
+    np.testing.assert_array_equal(buffer.column("date"), [7])
+
+
+def test_growth_keeps_the_rows():
+    buffer = ColumnBuffer(POSITION_SCHEMA, capacity=4)
+    for start in range(0, 100, 10):
+        buffer.append(batch(np.arange(start, start + 10)))
+    assert len(buffer) == 100 and buffer.capacity >= 100
+    np.testing.assert_array_equal(buffer.column("date"), np.arange(100))
+    assert_aligned(buffer)
+
+
+def test_window_bounds():
+    buffer = ColumnBuffer(POSITION_SCHEMA)
+    buffer.append(batch([10, 20, 30, 40]))
+    np.testing.assert_array_equal(buffer.window(20, 40)["date"], [20, 30])
+    np.testing.assert_array_equal(buffer.window(None, 25)["x"], [10, 20])
+    assert len(buffer.window(50)["date"]) == 0
+
+
+def test_store_splits_by_driver_and_deduplicates_polls():
+    rows = [
+        {"driver_number": 1, "date": "2024-05-19T13:00:00.250000+00:00", "speed": 250, "n_gear": 7},
+        {"driver_number": 44, "date": "2024-05-19T13:00:00.100000+00:00", "speed": 248, "n_gear": None},
+        {"driver_number": 1, "date": "2024-05-19T13:00:00.500000+00:00", "speed": 251, "n_gear": 7},
+        {"date": "2024-05-19T13:00:00.500000+00:00", "speed": 1},
+    ]
+    store = SessionStore(initial_capacity=8)
+    assert store.ingest("/car_data", 9999, rows) == 3
+    assert store.ingest("/car_data", 9999, rows[:2]) == 0
+    assert store.drivers("/car_data", 9999) == [1, 44]
+
+    window = store.window("/car_data", 9999, 44)
+    assert set(window) == set(CAR_DATA_SCHEMA)
+    assert window["n_gear"].tolist() == [-1] and np.isnan(window["rpm"][0])
+
+    records = store.records("/car_data", 9999)
+    assert [(r["driver_number"], r["date"]) for r in records] == [
+        (44, "2024-05-19T13:00:00.100000+00:00"),
+        (1, "2024-05-19T13:00:00.250000+00:00"),
+        (1, "2024-05-19T13:00:00.500000+00:00"),
+    ]
+
+    store.drop_session(9999)
+    assert store.drivers("/car_data", 9999) == [] and store.nbytes() == 0
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from stratx.ml.strategy import StrategySimulator
+
+
+@pytest.fixture
+def simulator():
+    return StrategySimulator(samples=64, seed=0)
+
+
+@pytest.mark.parametrize("current_lap, tyre_age", [(49, None), (55, None), (50, 3), (49, 49)])
+def test_no_stop_lap_left(simulator, current_lap, tyre_age):
+    # No lap left to stop after: staying out is the only candidate, even without a stop so far
+    result = simulator.simulate(current_lap, 50, "MEDIUM", tyre_age)
+    assert result["strategy"] == {"stops": [], "compounds": ["MEDIUM"]}
+    assert result["open_lap"] is None and result["optimal_lap"] is None
+    assert result["strategies_evaluated"] == 1
+
+
+def test_last_stop_lap_must_change_compound(simulator):
+    result = simulator.simulate(48, 50, "MEDIUM", None)
+    assert result["strategy"]["stops"] == [49]
+    assert result["strategy"]["compounds"][1] != "MEDIUM"
+
+
+def test_candidates_without_stop_laps(simulator):
+    stops, compounds = simulator.candidates(49, 50, "MEDIUM", 49)
+    assert stops.shape == (1, 2) and (stops == 50).all()
+    assert compounds.shape == (1, 3)
+
+
+def test_pruning_keeps_the_plan():
+    # Long race from lap 0: enough candidates for the cap to apply
+    capped = StrategySimulator(samples=64, seed=0, max_strategies=2000)
+    full = StrategySimulator(samples=64, seed=0, max_strategies=10 ** 9)
+    a, b = capped.simulate(0, 70, "HARD", None), full.simulate(0, 70, "HARD", None)
+    assert a["strategies_considered"] == b["strategies_considered"] > 2000
+    assert a["strategies_evaluated"] <= 2000
+    assert a["strategy"] == b["strategy"]
+    assert a["optimal_lap"] == b["optimal_lap"]
+
+
+@pytest.mark.parametrize("current_lap, total_laps, compound, tyre_age", [
+    (20, 50, "MEDIUM", 20), (0, 57, "SOFT", None), (30, 66, "HARD", 4), (35, 52, "MEDIUM", 30),
+])
+def test_dominance_pruning_changes_no_output(monkeypatch, current_lap, total_laps, compound, tyre_age):
+    # Below the cap only candidates that lose every sample within their plan are dropped
+    simulator = StrategySimulator(samples=64, seed=0, max_strategies=10 ** 9)
+    pruned = simulator.simulate(current_lap, total_laps, compound, tyre_age)
+    monkeypatch.setattr(StrategySimulator, "_undominated",
+                        staticmethod(lambda fixed, *args: np.arange(len(fixed))))
+    full = simulator.simulate(current_lap, total_laps, compound, tyre_age)
+    assert pruned.pop("strategies_evaluated") < full.pop("strategies_evaluated") == full["strategies_considered"]
+    assert pruned == full